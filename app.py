@@ -1,137 +1,136 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 # Import et ajustement des librairies datetime :
 from datetime import datetime, timedelta 
 import os
 import sys
 
-# Import de Meteostat pour l'appel API en temps réel
-from meteostat import Point, Daily 
+from meteo.instrumentation import MESURES, activer, chrono, nouvelle_execution
+from meteo.observations import SourceMeteostat, StockObservations
+from meteo.prechargement import JOURS_PRECALCULES, Prechargement, SourceResiliente, StockPrevisions, cle_previsions
+from meteo.prevision import COLONNES_REQUISES
+from meteo.stations import STATION_DEFAUT, TAILLE_LRU_MODELES, CacheModeles, charger_station, registre, version_active
 
 # --- CONFIGURATION DU PROJET ---
-MODEL_PATH = 'models/final_model.pkl'
-DATA_PATH = 'data/meteo_brazzaville_daily.csv'
-BRAZZAVILLE_STATION_ID = '64450' 
-MODEL_MAE = 1.32 
-
-# COORDONNÉES DE BRAZZAVILLE (Station ID 64450)
-BRAZZAVILLE_LAT = -4.25
-BRAZZAVILLE_LON = 15.25
+# Backend de prédiction : 'compile' (NumPy, sans xgboost), 'booster' (xgboost natif) ou 'sklearn' (pickle)
+PREDICTEUR_BACKEND = os.environ.get('METEO_PREDICTEUR', 'compile')
+# Horizon affiché (1 à 7 jours) et mode : 'recursif' (models/) ou 'direct' (models/direct/, script 03 --horizon-direct)
+HORIZON_PREVISION = int(os.environ.get('METEO_HORIZON', 2))
+MODE_PREVISION = os.environ.get('METEO_MODE_PREVISION', 'recursif')
+# Modèle, normales et données de chaque station : registre de meteo/stations.py (models/ et data/ pour Brazzaville)
+STOCK_PATH = 'data/observations.sqlite'
+# Observations et prévisions rafraîchies en arrière-plan (meteo/prechargement.py), chaque jour à METEO_HEURE_RAFRAICHISSEMENT
+ATTENTE_PREMIER_RAFRAICHISSEMENT_S = 60  # stock vide au premier démarrage : attente maximale avant d'afficher
+STATION_PAR_DEFAUT = os.environ.get('METEO_STATION', STATION_DEFAUT)  # Brazzaville (64450)
+MODEL_MAE = 1.32  # valeur affichée si le manifeste du modèle ne fournit pas la MAE
 # --- FIN CONFIGURATION ---
 
-# 1. Configuration de l'interface Streamlit
-st.set_page_config(page_title="Prévision Météo Brazzaville (J+2) - Master IA", layout="wide")
-st.title("Prévisions Météo Brazzaville et Analyse Climatique")
+LIBELLE_HORIZONS = {1: "J+1", 2: "J+1 et J+2"}.get(HORIZON_PREVISION, f"J+1 à J+{HORIZON_PREVISION}")
+
+STATIONS_CONNUES = registre()
+nom_station = lambda station: STATIONS_CONNUES.get(station, {}).get('nom', station)
+
+# 1. Configuration de l'interface Streamlit (station choisie dans la barre latérale)
+st.set_page_config(page_title=f"Prévision Météo {nom_station(STATION_PAR_DEFAUT)} (J+{HORIZON_PREVISION}) - Master IA", layout="wide")
+st.sidebar.header("Station")
+STATION_ID = st.sidebar.selectbox(
+    "Station Meteostat :",
+    list(STATIONS_CONNUES),
+    index=list(STATIONS_CONNUES).index(STATION_PAR_DEFAUT) if STATION_PAR_DEFAUT in STATIONS_CONNUES else 0,
+    format_func=lambda station: f"{nom_station(station)} ({station})",
+)
+# Panneau de debug : latences par étape de cette exécution (active l'instrumentation, désactivée par défaut)
+MODE_DEBUG = st.sidebar.checkbox("Mode debug : latences par étape", value=MESURES.actif)
+if MODE_DEBUG and not MESURES.actif:
+    activer()
+panneau_debug = st.sidebar.empty()
+etapes_execution = nouvelle_execution()
+st.title(f"Prévisions Météo {nom_station(STATION_ID)} et Analyse Climatique")
 st.markdown("---")
 
 
 # --- FONCTIONS CLÉS ---
 
+def charger_ressources(station):
+    """
+    Charge le modèle (version active du registre) et les normales climatiques (1991-2020) d'une station.
+    """
+    # Moteur de prévision par lots (J+1 direct, horizons suivants récursifs ou directs) partagé par
+    # toutes les sessions, avec les intervalles calibrés à l'entraînement si le modèle fournit les bornes quantiles.
+    # Normales précalculées à l'entraînement ; à défaut, calculées à partir des données brutes.
+    with chrono('app.chargement_modele'):
+        moteur, normales, version, manifeste = charger_station(station, PREDICTEUR_BACKEND, HORIZON_PREVISION, MODE_PREVISION)
+    mae = manifeste.get('mae', {}).get('global', MODEL_MAE)
+    return moteur, normales, mae, version
+
 @st.cache_resource
-def load_resources():
-    """Charge le modèle, les données historiques, et calcule les normales climatiques (1991-2020)."""
+def load_modeles():
+    """
+    Cache LRU des modèles du processus : les stations les moins récemment consultées sont libérées
+    au-delà de TAILLE_LRU_MODELES modèles, et un modèle republié par le script 03 est chargé en
+    arrière-plan puis substitué sans redémarrage de l'application.
+    """
+    return CacheModeles(charger_ressources, TAILLE_LRU_MODELES, sonde=version_active)
+
+def load_resources(station):
+    """Ressources de la version active de la station : (moteur, normales, MAE, version)."""
     try:
-        multi_output_model = joblib.load(MODEL_PATH)
-        if not multi_output_model.estimators_ or not multi_output_model.estimators_[0].get_booster().feature_names:
-             raise ValueError("Le modèle chargé n'a pas les attributs d'estimateur ou de noms de features attendus.")
-        
-        feature_order = multi_output_model.estimators_[0].get_booster().feature_names
-        
-        # Charger les données brutes pour le calcul des normales
-        df_brut = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
-        
-        # --- CALCUL DES NORMALES CLIMATIQUES (Moyenne 1991-2020) ---
-        df_normales = df_brut.copy()
-        df_normales['Jour_de_Annee'] = df_normales.index.dayofyear
-        
-        normales_journalieres = df_normales.groupby('Jour_de_Annee').agg(
-            Tmax_Normale=('temperature_max_jour', 'mean'),
-            Tmin_Normale=('temperature_min_jour', 'mean')
-        ).reset_index()
-        
-        return multi_output_model, feature_order, normales_journalieres
+        return load_modeles().lire(station)
     except Exception as e:
         st.error(f"Erreur de chargement des ressources (modèle/normales). Assurez-vous que les fichiers existent.")
         st.exception(e)
         st.stop()
         
-def get_real_time_input(date_ref):
+@st.cache_resource
+def load_stock():
+    """Ouvre le stock local d'observations (une connexion SQLite par processus)."""
+    return StockObservations(STOCK_PATH)
+
+@st.cache_resource
+def load_prechargement():
     """
-    Récupère les 7 jours d'observations réelles précédant la date de référence (J-7 à J-1) via API.
+    Démarre (une fois par processus) le rafraîchissement en arrière-plan : synchronisation Meteostat
+    avec délai maximal et nouvelles tentatives, puis prévision de toute la plage sélectionnable.
     """
-    with st.spinner(f"Connexion à Meteostat (Station {BRAZZAVILLE_STATION_ID}) pour les observations récentes..."):
-        
-        # CORRECTION TYPERROR : Convertir l'objet date (de st.date_input) en datetime (minuit)
-        date_ref_dt = datetime.combine(date_ref, datetime.min.time())
+    return Prechargement(load_stock(), StockPrevisions(STOCK_PATH), SourceResiliente(SourceMeteostat())).demarrer()
 
-        # Les variables start et end sont maintenant des objets datetime.datetime
-        start = date_ref_dt - timedelta(days=7)
-        end = date_ref_dt - timedelta(days=1)
-        
-        location = Point(BRAZZAVILLE_LAT, BRAZZAVILLE_LON) 
-        
-        data = Daily(location, start, end)
-        data = data.fetch()
-        
-        # Renommer les colonnes
-        data = data.rename(columns={
-            'tmax': 'temperature_max_jour',
-            'tmin': 'temperature_min_jour',
-            'prcp': 'precipitation_somme_jour',
-            'wspd': 'vitesse_vent_moyenne_jour'
-        })
-        
-        # CORRECTION KEYERROR : Utiliser le nom de colonne renommé
-        data = data[['temperature_max_jour', 'temperature_min_jour', 
-                     'precipitation_somme_jour', 'vitesse_vent_moyenne_jour']]
-        
-        data = data.sort_index()
-        
-        return data
-
-def creer_features_pour_prediction(df_historique_7_jours, date_cible, feature_order):
-    """Crée les features Lag et Temporelles pour la date cible."""
-    df_temp = df_historique_7_jours.copy()
-    
-    # Création des Lag Features
-    lags = [1, 2, 3, 7]
-    for lag in lags:
-        df_temp[f'Tmax_Lag_{lag}'] = df_temp['temperature_max_jour'].shift(lag)
-        df_temp[f'Tmin_Lag_{lag}'] = df_temp['temperature_min_jour'].shift(lag)
-        df_temp[f'Prcp_Lag_{lag}'] = df_temp['precipitation_somme_jour'].shift(lag)
-
-    # Création des Features Temporelles pour la date cible
-    df_temp['Mois'] = date_cible.month
-    df_temp['Jour_de_Annee'] = date_cible.timetuple().tm_yday
-    df_temp['Jour_de_Semaine'] = date_cible.weekday()
-    
-    # Isoler le dernier jour (qui est la date cible)
-    X_pred_raw = df_temp.iloc[-1].to_frame().T
-    
-    # Nettoyer et Assurer l'ordre des colonnes
-    colonnes_brutes = ['temperature_max_jour', 'temperature_min_jour', 
-                      'precipitation_somme_jour', 'vitesse_vent_moyenne_jour']
-    X_pred = X_pred_raw.drop(columns=colonnes_brutes, errors='ignore')
-    
-    try:
-        X_pred = X_pred[feature_order]
-    except KeyError as e:
-        st.error(f"Erreur Fatale : Une feature (colonne) est manquante pour l'input du modèle. {e}")
-        return None
-
-    return X_pred
+def get_precomputed_forecast(station, version, moteur, date_ref):
+    """Prévision précalculée pour la date de référence et la configuration du moteur, ou None (calcul à la demande)."""
+    with chrono('app.lecture_prevision'):
+        return load_prechargement().previsions.lire(station, cle_previsions(version, moteur), date_ref)
 
+def get_real_time_input(station, date_ref, taille):
+    """
+    Lit dans le stock local les `taille` jours d'observations réelles précédant la date de référence
+    (J-7 à J-1 pour les lags, plus loin si le modèle utilise des statistiques glissantes).
+    """
+    with chrono('app.lecture_observations'):
+        return load_stock().fenetre(station, date_ref, taille=taille)
+
+def afficher_latences():
+    """Remplit le panneau de debug avec les durées des étapes mesurées pendant cette exécution."""
+    if not MODE_DEBUG:
+        return
+    with panneau_debug.container():
+        st.subheader("Latences de la dernière exécution")
+        if etapes_execution:
+            st.dataframe(pd.DataFrame({'Étape': list(etapes_execution),
+                                       'Durée (ms)': [round(duree * 1e3, 3) for duree in etapes_execution.values()]}),
+                         hide_index=True)
+        else:
+            st.caption("Aucune étape mesurée : ressources et observations servies depuis le cache.")
 
 # --- LOGIQUE PRINCIPALE ---
-multi_output_model, feature_order, normales_journalieres = load_resources()
+moteur, normales, mae_modele, version_modele = load_resources(STATION_ID)
+prechargement = load_prechargement()
+prechargement.suivre(STATION_ID, moteur, version_modele)
 
 # 2. Sélecteur de Date (J) par l'utilisateur
 st.sidebar.header("Choisir la Date de Référence (J)")
-st.sidebar.markdown("Le modèle prédira pour J+1 et J+2 (temps réel).")
+st.sidebar.markdown(f"Le modèle prédira pour {LIBELLE_HORIZONS} (temps réel).")
 max_date_selectable = datetime.now().date() + timedelta(days=1)
-min_date_selectable = max_date_selectable - timedelta(days=100) 
+min_date_selectable = max_date_selectable - timedelta(days=JOURS_PRECALCULES) 
 
 REF_DATE = st.sidebar.date_input(
     "Date de Prévision (J) :",
@@ -140,12 +139,23 @@ REF_DATE = st.sidebar.date_input(
     max_value=max_date_selectable
 )
 
-# 3. Récupération des données d'input réelles
-df_observations_reelles = get_real_time_input(REF_DATE) 
+# 3. Lecture des observations réelles dans le stock local (synchronisé en arrière-plan)
+if load_stock().derniere_date(STATION_ID) is None:
+    with st.spinner(f"Premier chargement des observations de la station {STATION_ID} (Meteostat)..."):
+        prechargement.attendre(STATION_ID, ATTENTE_PREMIER_RAFRAICHISSEMENT_S)
+etat_prechargement = prechargement.etats.get(STATION_ID)
+if etat_prechargement and etat_prechargement.get('erreur'):
+    st.warning(f"Synchronisation Meteostat impossible, utilisation des observations déjà stockées "
+               f"(jusqu'au {etat_prechargement.get('observations_jusqu_au') or '-'}) : {etat_prechargement['erreur']}")
+
+df_observations_reelles = get_real_time_input(STATION_ID, REF_DATE, moteur.taille_historique) 
 
-if df_observations_reelles is None or len(df_observations_reelles) < 7:
+# Jours J-7..J-1 réellement observés : une ligne stockée sans Tmax/Tmin (pas encore publiée) ne compte pas
+if df_observations_reelles is None or ((df_observations_reelles.index >= pd.Timestamp(REF_DATE - timedelta(days=7)))
+                                       & df_observations_reelles[COLONNES_REQUISES].notna().all(axis=1)).sum() < 7:
     st.error(f"**Données Insuffisantes :** L'API n'a pas pu fournir les 7 jours d'observations (J-7 à J-1) pour la date choisie ({REF_DATE.strftime('%d %B %Y')}).")
     st.markdown("Veuillez choisir une date plus ancienne ou vérifier la connexion internet/disponibilité des données de la station.")
+    afficher_latences()
     st.stop()
     
 st.success(f"7 jours d'observations réelles chargés avec succès (du {(REF_DATE - timedelta(days=7)).strftime('%d %B %Y')} au {(REF_DATE - timedelta(days=1)).strftime('%d %B %Y')}).")
@@ -153,93 +163,63 @@ st.markdown("---")
 
 
 # --- BOUTON DE PRÉDICTION ---
-if st.button("Lancer la Prévision pour J+1 et J+2", type="primary"):
+if st.button(f"Lancer la Prévision pour {LIBELLE_HORIZONS}", type="primary"):
     
     with st.spinner(f'Calcul des prévisions pour le {REF_DATE.strftime("%d/%m")} en cours...'):
         
-        # --- PRÉDICTION J+1 (Demain) ---
-        date_pred_j1 = REF_DATE + timedelta(days=1)
+        # Prévision précalculée en arrière-plan ; à défaut (rafraîchissement en cours, date hors plage),
+        # un seul passage dans le moteur : un appel predict par horizon en mode récursif, un seul en mode direct
+        # (les bornes des intervalles sortent des mêmes appels)
+        prevision = get_precomputed_forecast(STATION_ID, version_modele, moteur, REF_DATE)
+        if prevision is None:
+            prevision = moteur.prevoir(df_observations_reelles, [REF_DATE])
         
-        # 1. Préparation de l'input pour J+1:
-        df_input_pour_j1 = pd.concat([df_observations_reelles, pd.DataFrame(index=[REF_DATE])])
-        
-        # 2. Création des features et prédiction J+1 (cible temporelle: J)
-        X_pred_j1 = creer_features_pour_prediction(df_input_pour_j1, REF_DATE, feature_order)
-        
-        predictions_j1 = multi_output_model.predict(X_pred_j1.values)[0]
-        tmax_j1 = predictions_j1[0]
-        tmin_j1 = predictions_j1[1]
-
-        
-        # --- PRÉDICTION J+2 (Après-demain) : Prédiction Récursive ---
-        date_pred_j2 = REF_DATE + timedelta(days=2)
-        
-        # 1. Créer la ligne d'observation (J+1) en utilisant la prédiction J+1 (tmax_j1/tmin_j1)
-        prcp_j_assumee = df_observations_reelles['precipitation_somme_jour'].iloc[-1]
-        wspd_j_assume = df_observations_reelles['vitesse_vent_moyenne_jour'].iloc[-1]
-
-        nouvelle_observation_j_plus_1 = pd.DataFrame({
-            'temperature_max_jour': [tmax_j1], 
-            'temperature_min_jour': [tmin_j1],
-            'precipitation_somme_jour': [prcp_j_assumee],
-            'vitesse_vent_moyenne_jour': [wspd_j_assume]
-        }, index=[date_pred_j1]) 
-
-        # 2. History pour J+2: Utiliser les 6 dernières observations réelles (J-6 à J-1) + la prédiction J+1
-        df_j2_history_base = df_observations_reelles.iloc[1:] 
-        
-        # On ajoute la prédiction J+1 pour créer l'historique de Lag
-        df_j2_history_complete = pd.concat([df_j2_history_base, nouvelle_observation_j_plus_1])
-        
-        # 3. Ajouter la ligne vide pour J+2 (cible)
-        df_input_j2_final = pd.concat([df_j2_history_complete, pd.DataFrame(index=[date_pred_j2])])
-        
-        # 4. Création des features J+2 (cible temporelle: J+2)
-        X_pred_j2 = creer_features_pour_prediction(df_input_j2_final, date_pred_j2, feature_order)
-
-        predictions_j2 = multi_output_model.predict(X_pred_j2.values)[0]
-        tmax_j2 = predictions_j2[0]
-        tmin_j2 = predictions_j2[1]
+        # Normales et écarts de toutes les dates prévues en une lecture de table
+        with chrono('app.normales'):
+            dates_prevues = prevision['date_prevue'].values
+            valeurs_normales = normales.pour_dates(dates_prevues)
+            ecarts_tmax, ecarts_tmin = normales.anomalies(dates_prevues, prevision['Tmax_Prevue'], prevision['Tmin_Prevue'])
         
     
     # --- AFFICHAGE DES RÉSULTATS + ANALYSE CLIMATIQUE ---
     st.success("Prévisions générées avec succès!")
 
-    col1, col2 = st.columns(2)
+    colonnes = st.columns(moteur.horizon)
     
-    for date_pred, tmax_pred, tmin_pred in [(date_pred_j1, tmax_j1, tmin_j1), (date_pred_j2, tmax_j2, tmin_j2)]:
+    for i, col in enumerate(colonnes):
         
-        jour_de_annee = date_pred.timetuple().tm_yday
-        # Récupération de la normale (1991-2020) pour ce jour de l'année
-        normale_du_jour = normales_journalieres[normales_journalieres['Jour_de_Annee'] == jour_de_annee].iloc[0]
-        tmax_normale = normale_du_jour['Tmax_Normale']
-        tmin_normale = normale_du_jour['Tmin_Normale']
-
-        # Calculer l'écart
-        ecart_tmax = tmax_pred - tmax_normale
-        ecart_tmin = tmin_pred - tmin_normale
-        
-        col = col1 if date_pred == date_pred_j1 else col2
+        date_pred = prevision['date_prevue'].iloc[i]
+        tmax_pred, tmin_pred = prevision['Tmax_Prevue'].iloc[i], prevision['Tmin_Prevue'].iloc[i]
+        tmax_normale, tmin_normale = valeurs_normales['Tmax_Normale'][i], valeurs_normales['Tmin_Normale'][i]
+        ecart_tmax, ecart_tmin = ecarts_tmax[i], ecarts_tmin[i]
         
         with col:
             st.header(f"Prévision pour le :")
             st.subheader(date_pred.strftime('%d %B %Y'))
 
             st.markdown(f"**T. MAX Prédite :** `{tmax_pred:.2f} °C`")
+            if 'Tmax_Q10' in prevision:
+                st.caption(f"Intervalle de prévision 80 % : {prevision['Tmax_Q10'].iloc[i]:.1f} - {prevision['Tmax_Q90'].iloc[i]:.1f} °C")
             st.metric(
                 "Écart vs. Normale (Tmax)", 
                 f"{ecart_tmax:.2f} °C", 
                 delta=f"(Normale 1991-2020 : {tmax_normale:.2f} °C)",
                 delta_color="inverse" if ecart_tmax < 0 else "normal"
             )
+            st.caption(f"Plage habituelle (P10-P90) : {valeurs_normales['Tmax_P10'][i]:.1f} - {valeurs_normales['Tmax_P90'][i]:.1f} °C")
 
             st.markdown(f"**T. MIN Prédite :** `{tmin_pred:.2f} °C`")
+            if 'Tmin_Q10' in prevision:
+                st.caption(f"Intervalle de prévision 80 % : {prevision['Tmin_Q10'].iloc[i]:.1f} - {prevision['Tmin_Q90'].iloc[i]:.1f} °C")
             st.metric(
                 "Écart vs. Normale (Tmin)", 
                 f"{ecart_tmin:.2f} °C", 
                 delta=f"(Normale 1991-2020 : {tmin_normale:.2f} °C)",
                 delta_color="inverse" if ecart_tmin < 0 else "normal"
             )
+            st.caption(f"Plage habituelle (P10-P90) : {valeurs_normales['Tmin_P10'][i]:.1f} - {valeurs_normales['Tmin_P90'][i]:.1f} °C")
             st.markdown("---")
             
-    st.caption(f"Le modèle (MAE $\\approx$ {MODEL_MAE:.2f} °C) utilise les observations en temps réel de la station {BRAZZAVILLE_STATION_ID} pour prédire.")
\ No newline at end of file
+    st.caption(f"Le modèle (MAE $\\approx$ {mae_modele:.2f} °C) utilise les observations en temps réel de la station {STATION_ID} pour prédire.")
+
+afficher_latences()
@@ -0,0 +1,45 @@
+"""
+Temps de démarrage à froid du chargement du modèle, mesuré dans un interpréteur neuf :
+pickle scikit-learn (joblib.load), boosters UBJSON natifs et ensemble compilé NumPy (meteo/modeles.py).
+
+Usage (depuis la racine du dépôt, après le script 03) : python benchmarks/bench_demarrage.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+# --- CONFIGURATION ---
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPETITIONS = 5
+CHEMINS = {
+    'pickle (joblib + sklearn)': "import joblib; joblib.load('models/final_model.pkl')",
+    'UBJSON (xgboost seul)': "from meteo.modeles import charger_modele; charger_modele('models', 'booster')",
+    'compilé (NumPy seul)': "from meteo.modeles import charger_modele; charger_modele('models', 'compile')",
+}
+# Le temps est mesuré dans le sous-processus, imports compris, hors démarrage de l'interpréteur
+GABARIT = (
+    "import time; debut = time.perf_counter()\n"
+    "{code}\n"
+    "import sys; print(time.perf_counter() - debut, len(sys.modules))"
+)
+# --- FIN CONFIGURATION ---
+
+
+def mesurer(code):
+    resultat = subprocess.run([sys.executable, '-c', GABARIT.format(code=code)], cwd=RACINE,
+                              capture_output=True, text=True, check=True)
+    duree, nb_modules = resultat.stdout.split()
+    return float(duree), int(nb_modules)
+
+
+def main():
+    for nom, code in CHEMINS.items():
+        mesures = [mesurer(code) for _ in range(REPETITIONS)]
+        durees = [duree for duree, _ in mesures]
+        print(f"{nom:28s} : médiane {statistics.median(durees) * 1e3:7.1f} ms "
+              f"(min {min(durees) * 1e3:.1f} ms, {mesures[0][1]} modules importés)")
+
+
+if __name__ == '__main__':
+    main()
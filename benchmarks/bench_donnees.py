@@ -0,0 +1,60 @@
+"""
+Temps de chargement et empreinte mémoire : CSV (pd.read_csv) contre bundle binaire (meteo/donnees.py).
+
+Le CSV comparé est l'export du bundle courant (écrit dans un dossier temporaire) : un CSV de
+data/ plus ancien que le bundle, ou d'une autre disposition des colonnes, ne fausse pas la mesure.
+
+Usage (depuis la racine du dépôt, après les scripts 01 et 02) :
+    python benchmarks/bench_donnees.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import chemin_bundle, lire_bundle
+
+# --- CONFIGURATION ---
+FICHIERS = ['data/meteo_brazzaville_daily.csv', 'data/features_finales.csv']  # bundles correspondants
+REPETITIONS = 20
+# --- FIN CONFIGURATION ---
+
+
+def chronometrer(fonction):
+    """Meilleur temps sur REPETITIONS exécutions (en secondes) et dernier résultat."""
+    meilleur = float('inf')
+    for _ in range(REPETITIONS):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return resultat, meilleur
+
+
+def mesurer(chemin_csv, export):
+    df_csv, t_csv = chronometrer(lambda: pd.read_csv(export, index_col='time', parse_dates=True))
+    df_bundle, t_bundle = chronometrer(lambda: lire_bundle(chemin_bundle(chemin_csv)))
+
+    assert list(df_csv.columns) == list(df_bundle.columns) and df_csv.index.equals(df_bundle.index)
+    assert np.allclose(df_csv.to_numpy(dtype=np.float64), df_bundle.to_numpy(dtype=np.float64), rtol=1e-6, equal_nan=True)
+
+    memoire_csv = df_csv.memory_usage(deep=True).sum() / 1024
+    memoire_bundle = df_bundle.memory_usage(deep=True).sum() / 1024
+    print(f"{chemin_csv} ({len(df_csv)} lignes)")
+    print(f"   chargement : CSV {t_csv * 1e3:.2f} ms | bundle {t_bundle * 1e3:.2f} ms ({t_csv / t_bundle:.1f}x)")
+    print(f"   mémoire    : CSV {memoire_csv:.0f} Ko | bundle {memoire_bundle:.0f} Ko")
+
+
+
+def main():
+    with tempfile.TemporaryDirectory() as dossier:
+        for chemin_csv in FICHIERS:
+            export = os.path.join(dossier, os.path.basename(chemin_csv))
+            lire_bundle(chemin_bundle(chemin_csv)).to_csv(export)
+            mesurer(chemin_csv, export)
+
+if __name__ == '__main__':
+    main()
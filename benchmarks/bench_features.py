@@ -0,0 +1,119 @@
+"""
+Parité et temps de calcul du constructeur de features NumPy (meteo/features.py)
+face à la version pandas d'origine (shift par colonne puis réordonnancement, `rolling`
+pour les statistiques glissantes), et temps de la reconstruction complète du script 02
+(calendrier, imputation, features).
+
+Usage (depuis la racine du dépôt) : python benchmarks/bench_features.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.features import (COLONNES_OBSERVATIONS, DUREE_ANNEE, FEATURE_ORDER, FENETRES_GLISSANTES, VARIABLES,
+                            ConstructeurFeatures)
+from meteo.lacunes import preparer_serie
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+REPETITIONS_LIGNE = 200
+TOLERANCE = 1e-5  # écart relatif toléré (float32 contre float64)
+TOLERANCE_ABSOLUE = 1e-4  # écarts-types nuls : sommes cumulées contre algorithme en ligne de pandas
+SEUIL_RECONSTRUCTION = 1.0  # secondes, reconstruction complète 1991-2020
+# --- FIN CONFIGURATION ---
+
+
+def glissantes_pandas(df):
+    """Référence : statistiques glissantes sur les n jours précédents (`rolling(n)` décalé d'un jour)."""
+    for n in FENETRES_GLISSANTES:
+        for variable, j in VARIABLES.items():
+            fenetre = df[COLONNES_OBSERVATIONS[j]].rolling(n)
+            df[f'{variable}_Moy_{n}'] = fenetre.mean().shift(1)
+            df[f'{variable}_Std_{n}'] = fenetre.std().shift(1)
+            df[f'{variable}_Somme_{n}'] = fenetre.sum().shift(1)
+    angle = 2 * np.pi * df.index.dayofyear / DUREE_ANNEE
+    df['Jour_Sin'], df['Jour_Cos'] = np.sin(angle), np.cos(angle)
+    return df
+
+
+def historique_pandas(df):
+    """Référence : logique d'origine de 02_feature_engineering.py, complétée des statistiques glissantes."""
+    df = df.copy()
+    df['Mois'] = df.index.month
+    df['Jour_de_Annee'] = df.index.dayofyear
+    df['Jour_de_Semaine'] = df.index.dayofweek
+    for lag in [1, 2, 3, 7]:
+        df[f'Tmax_Lag_{lag}'] = df['temperature_max_jour'].shift(lag)
+        df[f'Tmin_Lag_{lag}'] = df['temperature_min_jour'].shift(lag)
+        df[f'Prcp_Lag_{lag}'] = df['precipitation_somme_jour'].shift(lag)
+    return glissantes_pandas(df)[FEATURE_ORDER]
+
+
+def ligne_pandas(df_historique, date_cible):
+    """Référence : creer_features_pour_prediction d'origine (app.py / script 04), complétée des statistiques glissantes."""
+    df_temp = pd.concat([df_historique, pd.DataFrame(index=pd.DatetimeIndex([date_cible]))])
+    for lag in [1, 2, 3, 7]:
+        df_temp[f'Tmax_Lag_{lag}'] = df_temp['temperature_max_jour'].shift(lag)
+        df_temp[f'Tmin_Lag_{lag}'] = df_temp['temperature_min_jour'].shift(lag)
+        df_temp[f'Prcp_Lag_{lag}'] = df_temp['precipitation_somme_jour'].shift(lag)
+    df_temp['Mois'] = date_cible.month
+    df_temp['Jour_de_Annee'] = date_cible.timetuple().tm_yday
+    df_temp['Jour_de_Semaine'] = date_cible.weekday()
+    return glissantes_pandas(df_temp).iloc[-1].to_frame().T[FEATURE_ORDER]
+
+
+def chronometrer(fonction, repetitions=1):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        resultat = fonction()
+    return resultat, (time.perf_counter() - debut) / repetitions
+
+
+def main():
+    df = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
+    constructeur = ConstructeurFeatures(FEATURE_ORDER)
+    valeurs = df[COLONNES_OBSERVATIONS].to_numpy(dtype=np.float32)
+
+    # 1. Mode historique complet (entraînement)
+    reference, t_pandas = chronometrer(lambda: historique_pandas(df))
+    X, t_numpy = chronometrer(lambda: constructeur.construire_historique(valeurs, df.index.values))
+    assert np.allclose(X, reference.to_numpy(dtype=np.float64), rtol=TOLERANCE, atol=TOLERANCE_ABSOLUE, equal_nan=True), \
+        "Écart entre le constructeur NumPy et la référence pandas (historique)"
+    print(f"Historique complet ({len(df)} jours) : pandas {t_pandas * 1e3:.2f} ms | NumPy {t_numpy * 1e3:.2f} ms")
+
+    # 2. Mode ligne unique (inférence) sur la dernière fenêtre (plus long lag ou plus longue statistique glissante)
+    fenetre = df.iloc[-constructeur.taille_fenetre:]
+    date_cible = df.index[-1] + pd.Timedelta(days=1)
+    reference, t_pandas = chronometrer(lambda: ligne_pandas(fenetre, date_cible), REPETITIONS_LIGNE)
+    valeurs_fenetre = fenetre[COLONNES_OBSERVATIONS].to_numpy(dtype=np.float32)
+    ligne, t_numpy = chronometrer(lambda: constructeur.construire_ligne(valeurs_fenetre, date_cible), REPETITIONS_LIGNE)
+    assert np.allclose(ligne, reference.to_numpy(dtype=np.float64), rtol=TOLERANCE, atol=TOLERANCE_ABSOLUE), \
+        "Écart entre le constructeur NumPy et la référence pandas (ligne unique)"
+    print(f"Ligne unique : pandas {t_pandas * 1e6:.1f} µs | NumPy {t_numpy * 1e6:.1f} µs")
+
+    # 3. Reconstruction complète : calendrier journalier, imputation des lacunes, features et masque
+    def reconstruire():
+        dates, valeurs_completes, masque = preparer_serie(df)
+        X = constructeur.construire_historique(valeurs_completes, dates)
+        return dates, X, constructeur.construire_historique(masque.astype(np.float32), dates)
+
+    (dates, X, masque_lags), t_reconstruction = chronometrer(reconstruire)
+    # Les lags sont des décalages en jours : référence pandas par date sur le calendrier complet
+    calendrier = df.reindex(pd.DatetimeIndex(dates))
+    reference = calendrier['temperature_max_jour'].shift(7).to_numpy()
+    observes = masque_lags[:, FEATURE_ORDER.index('Tmax_Lag_7')] == 0
+    assert np.allclose(X[observes, FEATURE_ORDER.index('Tmax_Lag_7')], reference[observes], rtol=TOLERANCE), \
+        "Tmax_Lag_7 ne correspond pas à l'observation d'il y a 7 jours"
+    print(f"Reconstruction complète ({len(dates)} jours, {len(dates) - len(df)} ajoutés) : "
+          f"{t_reconstruction * 1e3:.1f} ms (seuil {SEUIL_RECONSTRUCTION * 1e3:.0f} ms)")
+    assert t_reconstruction < SEUIL_RECONSTRUCTION, "Reconstruction complète trop lente"
+
+    print("Parité OK.")
+
+
+if __name__ == '__main__':
+    main()
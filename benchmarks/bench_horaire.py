@@ -0,0 +1,136 @@
+"""
+Ingestion horaire (meteo/horaire.py) sur des relevés horaires synthétiques, sans réseau.
+
+Un fichier « bulk » Meteostat (heures UTC) est simulé à partir du CSV journalier fourni : cycle
+diurne entre Tmin et Tmax (minimum à 6 h, maximum à 15 h locales), pluie répartie sur l'après-midi,
+relevés manquants au hasard. Il est découpé en fichiers annuels, puis agrégé :
+
+  1. parité : Tmax/Tmin/pluie agrégées égales aux valeurs journalières d'origine (jours complets) ;
+  2. temps à froid avec 1 worker puis `WORKERS`, et temps à chaud (toutes les années en cache) ;
+     une année tronquée par la source n'est pas mise en cache et est relue à l'exécution suivante ;
+  3. mémoire : pic d'allocation (tracemalloc) pour 5 années puis pour toute la période.
+
+Usage (depuis la racine du dépôt) : python benchmarks/bench_horaire.py
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.horaire import FUSEAU, WORKERS, SourceHoraireFichiers, decouper, journalier
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+STATION = '64450'
+TAUX_MANQUANTS = 0.05  # relevés horaires supprimés au hasard
+TOLERANCE = 0.06  # °C / mm : fichiers annuels écrits au dixième (précision Meteostat)
+HEURES_PLUIE = [14, 15, 16, 17]  # heures locales
+ANNEE_TRONQUEE = 2005  # la source n'en renvoie que le premier semestre
+CROISSANCE_MEMOIRE_MAX = 2.0  # pic d'allocation de toute la période / pic de 5 années
+# --- FIN CONFIGURATION ---
+
+
+def simuler_bulk(df, chemin, graine=0):
+    """Écrit le fichier bulk horaire (sans en-tête, date et heure UTC) correspondant aux jours de `df`."""
+    generateur = np.random.default_rng(graine)
+    heures_locales = np.arange(24)
+    # Profil diurne dans [0, 1] : 0 à 6 h, 1 à 15 h
+    profil = np.interp(heures_locales, [0, 6, 15, 24], [0.3, 0.0, 1.0, 0.3])
+    tmin, tmax = df['temperature_min_jour'].to_numpy(), df['temperature_max_jour'].to_numpy()
+    temp = tmin[:, None] + (tmax - tmin)[:, None] * profil[None, :]
+    pluie = np.zeros_like(temp)
+    pluie[:, HEURES_PLUIE] = df['precipitation_somme_jour'].to_numpy()[:, None] / len(HEURES_PLUIE)
+    vent = np.repeat(df['vitesse_vent_moyenne_jour'].to_numpy()[:, None], 24, axis=1)
+    locales = (df.index.values.astype('datetime64[h]')[:, None] + heures_locales.astype('timedelta64[h]')[None, :]).ravel()
+    utc = pd.DatetimeIndex(locales).tz_localize(FUSEAU).tz_convert('UTC')
+    bulk = pd.DataFrame({'date': utc.strftime('%Y-%m-%d'), 'hour': utc.hour, 'temp': temp.ravel(), 'dwpt': np.nan,
+                         'rhum': 80.0, 'prcp': pluie.ravel(), 'snow': np.nan, 'wdir': np.nan, 'wspd': vent.ravel(),
+                         'wpgt': np.nan, 'pres': 1010.0, 'tsun': np.nan, 'coco': np.nan})
+    # Relevés manquants, hors des heures des extrêmes et de la pluie pour garder la parité vérifiable
+    garde = generateur.random(len(bulk)) >= TAUX_MANQUANTS
+    garde |= np.isin(np.tile(heures_locales, len(df)), [6, 15] + HEURES_PLUIE)
+    bulk[garde].to_csv(chemin, header=False, index=False, float_format='%.2f')
+    return int(garde.sum())
+
+
+class SourceTronquee:
+    """Source dont l'année `annee_tronquee` s'arrête au 30 juin (délai dépassé, panne partielle)."""
+
+    def __init__(self, source, annee_tronquee):
+        self.source = source
+        self.annee_tronquee = annee_tronquee
+
+    def annee(self, station, annee):
+        df = self.source.annee(station, annee)
+        return df[df.index < f'{annee}-07-01'] if annee == self.annee_tronquee else df
+
+
+def mesurer(fonction):
+    debut = time.perf_counter()
+    resultat = fonction()
+    return resultat, time.perf_counter() - debut
+
+
+def main():
+    df = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
+    df = df.asfreq('D').interpolate(limit_direction='both')  # journées synthétiques complètes
+    debut, fin = df.index.min(), df.index.max()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        bulk = os.path.join(dossier, f'{STATION}.csv.gz')
+        releves = simuler_bulk(df, bulk)
+        annuels = os.path.join(dossier, 'horaire')
+        _, t_decoupe = mesurer(lambda: decouper(bulk, annuels))
+        print(f"Bulk simulé : {releves:,} relevés horaires, découpés en fichiers annuels en {t_decoupe:.1f} s")
+        source = SourceHoraireFichiers(annuels)
+
+        # 1. Parité avec les valeurs journalières d'origine
+        (agregats, _), t_1 = mesurer(lambda: journalier(STATION, source, debut, fin, os.path.join(dossier, 'cache_1'), workers=1))
+        communs = agregats.index.intersection(df.index)
+        # Le cumul de pluie additionne un arrondi par heure de pluie
+        tolerances = {'temperature_max_jour': TOLERANCE, 'temperature_min_jour': TOLERANCE,
+                      'precipitation_somme_jour': TOLERANCE * len(HEURES_PLUIE)}
+        for colonne, tolerance in tolerances.items():
+            ecart = (agregats.loc[communs, colonne] - df.loc[communs, colonne]).abs().max()
+            assert ecart <= tolerance, f"{colonne} : écart {ecart:.3f}"
+        assert len(communs) == len(df), f"{len(df) - len(communs)} jour(s) non agrégé(s)"
+        assert agregats['heures_observees'].between(1, 24).all()
+        print(f"Parité OK : {len(communs):,} jours, complétude moyenne {agregats['heures_observees'].mean():.1f} h/jour")
+
+        # 2. Temps à froid (1 worker puis WORKERS), puis à chaud (cache)
+        cache = os.path.join(dossier, 'cache')
+        (_, annees), t_froid = mesurer(lambda: journalier(STATION, source, debut, fin, cache, workers=WORKERS))
+        (_, annees_chaud), t_chaud = mesurer(lambda: journalier(STATION, source, debut, fin, cache, workers=WORKERS))
+        assert annees['incompletes'] == 0 and annees_chaud == {'cache': annees['calculees'], 'calculees': 0, 'incompletes': 0}, annees_chaud
+        print(f"{annees['calculees']} années à froid : {t_1:.2f} s (1 worker), {t_froid:.2f} s ({WORKERS} workers) ; "
+              f"à chaud (cache) : {t_chaud * 1e3:.0f} ms")
+
+        # 2 bis. Année tronquée : hors cache, complétée dès que la source la renvoie entière
+        cache = os.path.join(dossier, 'cache_tronque')
+        _, annees = journalier(STATION, SourceTronquee(source, ANNEE_TRONQUEE), debut, fin, cache, workers=WORKERS)
+        assert annees['incompletes'] == 1, annees
+        agregats, annees = journalier(STATION, source, debut, fin, cache, workers=WORKERS)
+        assert (annees['calculees'], annees['incompletes']) == (1, 0), annees
+        assert agregats.index.year.value_counts()[ANNEE_TRONQUEE] == 365
+        print(f"Année {ANNEE_TRONQUEE} tronquée : non mise en cache, relue complète à l'exécution suivante")
+
+        # 3. Pic d'allocation : 5 années, puis toute la période (sans cache)
+        pics = []
+        for fin_periode in (debut + pd.DateOffset(years=5) - pd.Timedelta(days=1), fin):
+            tracemalloc.start()
+            journalier(STATION, source, debut, fin_periode, os.path.join(dossier, f'cache_{len(pics)}m'), workers=WORKERS)
+            pics.append(tracemalloc.get_traced_memory()[1] / 1e6)
+            tracemalloc.stop()
+    croissance = pics[1] / pics[0]
+    print(f"Pic d'allocation : {pics[0]:.1f} Mo (5 ans) -> {pics[1]:.1f} Mo ({fin.year - debut.year + 1} ans), "
+          f"x{croissance:.2f} (seuil x{CROISSANCE_MEMOIRE_MAX})")
+    assert croissance < CROISSANCE_MEMOIRE_MAX, "La mémoire croît avec la période"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Prévision J+1..J+7 : MAE par horizon et coût de chaque mode du moteur ('recursif', 'direct')
+sur les années de test, avec les mêmes dates de référence et le même backend compilé.
+
+Le mode récursif fait un appel `predict` par horizon, plus un pour le jour J (prévisions
+réinjectées comme lags, alignées sur les lignes d'entraînement : cible D+1 depuis les jours
+jusqu'à D-1 et le calendrier de D) ; le mode direct fait un seul appel sur les features de J,
+avec un booster par horizon.
+
+Usage (depuis la racine du dépôt, après le script 03 --horizon-direct 7) :
+    python benchmarks/bench_horizons.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.features import COLONNES_OBSERVATIONS, HORIZON_MAX, TARGET_COLUMNS
+from meteo.intervalles import mae_par_horizon
+from meteo.lacunes import preparer_serie
+from meteo.modeles import charger_modele, dossier_modele
+from meteo.prevision import MODES, MoteurPrevision
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+MODEL_DIR = 'models'
+TEST_SPLIT_DATE = '2018-01-01'
+REPETITIONS_LIGNE = 200
+# --- FIN CONFIGURATION ---
+
+
+def main():
+    dates, valeurs, masque = preparer_serie(lire_donnees(DATA_PATH))
+    serie = pd.DataFrame(valeurs, index=pd.DatetimeIndex(dates), columns=COLONNES_OBSERVATIONS)
+    imputations = pd.DataFrame(masque, index=serie.index, columns=COLONNES_OBSERVATIONS)
+    dates_test = pd.date_range(TEST_SPLIT_DATE, serie.index.max())
+
+    moteurs = {}
+    for mode in MODES:
+        dossier = dossier_modele(mode, MODEL_DIR)
+        if not os.path.exists(dossier):
+            print(f"Mode '{mode}' ignoré : {dossier}/ introuvable (script 03 --horizon-direct {HORIZON_MAX}).")
+            continue
+        predicteur, feature_order, _ = charger_modele(dossier, 'compile')
+        moteurs[mode] = MoteurPrevision(predicteur, feature_order, horizon=HORIZON_MAX, mode=mode)
+
+    # Coût : une date (application, service) et toutes les dates de test (backtest) ; fenêtres extraites une fois
+    # par mode (le mode récursif lit un jour de plus)
+    print(f"Dates de référence de test depuis {TEST_SPLIT_DATE}, horizon J+1..J+{HORIZON_MAX}\n")
+    print(f"{'mode':10s} {'date (ms)':>10s} {'lot (ms)':>10s} {'dates/s':>10s}")
+    maes = {}
+    for mode, moteur in moteurs.items():
+        fenetres, valides = moteur.fenetres_depuis_observations(serie, dates_test.values)
+        fenetres, dates_lot = fenetres[valides], dates_test.values.astype('datetime64[D]')[valides]
+        moteur.prevoir_fenetres(fenetres[:1], dates_lot[:1])  # préchauffage
+        debut = time.perf_counter()
+        for _ in range(REPETITIONS_LIGNE):
+            moteur.prevoir_fenetres(fenetres[-1:], dates_lot[-1:])
+        latence = (time.perf_counter() - debut) / REPETITIONS_LIGNE
+
+        debut = time.perf_counter()
+        moteur.prevoir_fenetres(fenetres, dates_lot)
+        duree_lot = time.perf_counter() - debut
+        print(f"{mode:10s} {latence * 1e3:10.3f} {duree_lot * 1e3:10.1f} {len(fenetres) / duree_lot:10.0f}")
+        maes[mode] = mae_par_horizon(moteur.prevoir(serie, dates_test), serie, imputations)
+
+    print(f"\nMAE de test par horizon (°C) : {' / '.join(maes)}")
+    for horizon in maes[next(iter(maes))]:
+        print(f"J+{horizon} : " + ', '.join(f"{cible} " + ' / '.join(f"{maes[mode][horizon][cible]:.3f}" for mode in maes)
+                                      for cible in TARGET_COLUMNS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Substitution à chaud d'un modèle republié (meteo/registre_modeles.py, `CacheModeles` de meteo/stations.py).
+
+Sur une copie du dossier models/ : des fils de prévision sollicitent le cache en continu pendant
+qu'une nouvelle version est publiée, puis pendant un retour arrière. Vérifie qu'aucune prévision
+n'échoue, que les ressources obtenues avant la publication continuent de prévoir avec l'ancien
+modèle, et mesure le délai entre la publication et la première prévision servie par la nouvelle version.
+
+Usage (depuis la racine du dépôt, après le script 03) : python benchmarks/bench_hot_swap.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.modeles import completer_manifeste
+from meteo.registre_modeles import dossier_courant, nouvelle_version, publier, revenir, version_courante
+from meteo.stations import STATION_DEFAUT, CacheModeles, charger_station, version_active
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+MODEL_DIR = 'models'
+FILS = 4
+INTERVALLE_S = 0.2  # vérification du pointeur (2 s dans l'application)
+DELAI_MAX_S = 10.0  # délai maximal toléré avant que la nouvelle version soit servie
+# --- FIN CONFIGURATION ---
+
+
+def copier_version(racine):
+    """Republie le modèle actif sous une nouvelle version (manifeste modifié, donc nouvelle empreinte)."""
+    version, dossier = nouvelle_version(racine)
+    shutil.rmtree(dossier)
+    shutil.copytree(dossier_courant(racine), dossier, ignore=shutil.ignore_patterns('*.partage', 'versions', 'stations'))
+    completer_manifeste(dossier, publication={'version': version})
+    return version
+
+
+def attendre_version(cache, version, debut):
+    """Sollicite le cache jusqu'à ce qu'il serve `version` ; retourne le délai depuis `debut`."""
+    while cache.lire(STATION_DEFAUT)[2] != version:
+        assert time.perf_counter() - debut < DELAI_MAX_S, f"Version {version} non servie après {DELAI_MAX_S} s"
+        time.sleep(0.01)
+    return time.perf_counter() - debut
+
+
+def main():
+    df = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
+    dates = [df.index[-1] + pd.Timedelta(days=1)]
+
+    with tempfile.TemporaryDirectory() as racine:
+        shutil.copytree(MODEL_DIR, racine, dirs_exist_ok=True, ignore=shutil.ignore_patterns('*.partage'))
+        cache = CacheModeles(lambda s: charger_station(s, 'compile', 2, model_dir=racine), sonde=lambda s: version_active(s, racine),
+                             intervalle=INTERVALLE_S)
+        ancien = cache.lire(STATION_DEFAUT)
+        fenetre = df.iloc[-ancien[0].taille_historique:]
+        reference = ancien[0].prevoir(fenetre, dates)
+
+        erreurs, prevues, arret = [], [0], threading.Event()
+
+        def prevoir_en_continu():
+            while not arret.is_set():
+                try:
+                    moteur = cache.lire(STATION_DEFAUT)[0]
+                    moteur.prevoir(fenetre, dates)
+                    prevues[0] += 1
+                except Exception as e:
+                    erreurs.append(repr(e))
+
+        fils = [threading.Thread(target=prevoir_en_continu) for _ in range(FILS)]
+        for fil in fils:
+            fil.start()
+        try:
+            # 1. Publication d'une nouvelle version (la première importe le modèle à plat comme version initiale)
+            t0 = time.perf_counter()
+            nouvelle = copier_version(racine)
+            publier(racine, nouvelle)
+            t_publication = time.perf_counter() - t0
+            version_nouvelle = charger_station(STATION_DEFAUT, 'compile', 2, model_dir=racine)[2]
+            delai = attendre_version(cache, version_nouvelle, t0)
+            print(f"Publication de {nouvelle} : {t_publication * 1e3:.1f} ms, servie après {delai * 1e3:.0f} ms "
+                  f"(vérification toutes les {INTERVALLE_S} s)")
+
+            # 2. Les ressources obtenues avant la publication prévoient toujours avec l'ancien modèle
+            assert ancien[0].prevoir(fenetre, dates).equals(reference), "Ancien moteur modifié par la substitution"
+
+            # 3. Retour arrière vers la version précédente
+            t0 = time.perf_counter()
+            restauree = revenir(racine)
+            delai = attendre_version(cache, ancien[2], t0)
+            print(f"Retour arrière vers {restauree} : servie après {delai * 1e3:.0f} ms")
+            assert version_courante(racine) == restauree
+        finally:
+            arret.set()
+            for fil in fils:
+                fil.join()
+
+    assert not erreurs, f"{len(erreurs)} prévision(s) en échec : {erreurs[:3]}"
+    print(f"{prevues[0]} prévisions pendant les substitutions, aucune en échec ; compteurs du cache : {cache.compteurs}")
+
+
+if __name__ == '__main__':
+    main()
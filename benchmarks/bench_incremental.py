@@ -0,0 +1,66 @@
+"""
+Mise à jour incrémentale du jeu de features (meteo/mise_a_jour.py) face à la reconstruction complète.
+
+La série brute est coupée `JOURS_NOUVEAUX` jours avant sa fin. On reconstruit le jeu complet
+sur la partie ancienne, puis on ajoute les jours restants par la queue. Les lignes ajoutées
+(et les HORIZON_MAX - 1 dernières lignes existantes, dont les cibles directes sont complétées) sont comparées à celles de la reconstruction complète sur toute la série. Seules les pluies
+imputées par la climatologie peuvent différer, car la climatologie de la queue est celle de
+la série tronquée.
+
+Usage (depuis la racine du dépôt) : python benchmarks/bench_incremental.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.features import HORIZON_MAX
+from meteo.lacunes import preparer_serie
+from meteo.mise_a_jour import construire_jeu, ecrire_queue, nouvelles_lignes
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+JOURS_NOUVEAUX = [1, 7, 92]
+TOLERANCE = 1e-5
+# --- FIN CONFIGURATION ---
+
+
+def main():
+    df = lire_donnees(DATA_PATH)
+    debut = time.perf_counter()
+    reference = construire_jeu(*preparer_serie(df))
+    t_complet = time.perf_counter() - debut
+    print(f"Reconstruction complète ({len(df)} jours bruts) : {t_complet * 1e3:.1f} ms")
+
+    for jours in JOURS_NOUVEAUX:
+        coupure = df.index.max() - pd.Timedelta(days=jours)
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, 'features_finales.queue.npz')
+            dates, valeurs, masque = preparer_serie(df[df.index <= coupure])
+            ancien = construire_jeu(dates, valeurs, masque)
+            ecrire_queue(chemin, dates, valeurs, masque)
+
+            debut = time.perf_counter()
+            lignes, _ = nouvelles_lignes(df, chemin, ancien.index.max())
+            t_increment = time.perf_counter() - debut
+
+        attendues = reference[reference.index > ancien.index.max() - pd.Timedelta(days=HORIZON_MAX - 1)]
+        assert lignes.index.equals(attendues.index), "Lignes ajoutées différentes de la reconstruction complète"
+        calculees, references = lignes.to_numpy(), attendues.to_numpy()
+        ecarts = (np.abs(calculees - references) > TOLERANCE) | (np.isnan(calculees) != np.isnan(references))
+        colonnes = sorted(set(lignes.columns[ecarts.any(axis=0)]))
+        # Lags et statistiques glissantes de pluie : seules features calculées à partir de pluies imputées
+        assert all(c.startswith('Prcp_') for c in colonnes), f"Écarts hors pluie imputée : {colonnes}"
+        print(f"+{jours:>3} jour(s) : {len(lignes):>3} ligne(s) en {t_increment * 1e3:.1f} ms "
+              f"({t_complet / t_increment:.0f}x) | lignes avec écart de pluie imputée : {int(ecarts.any(axis=1).sum())}")
+
+    print("Parité OK.")
+
+
+if __name__ == '__main__':
+    main()
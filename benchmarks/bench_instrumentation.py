@@ -0,0 +1,68 @@
+"""
+Coût de l'instrumentation (meteo/instrumentation.py) : d'un chronomètre seul, puis d'une
+prévision J+1/J+2 sur une date (le chemin de l'application) avec instrumentation
+désactivée et activée.
+
+Usage (depuis la racine du dépôt, après le script 03) : python benchmarks/bench_instrumentation.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo import instrumentation
+from meteo.donnees import lire_donnees
+from meteo.modeles import charger_modele
+from meteo.prevision import MoteurPrevision
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+MODEL_DIR = 'models'
+REPETITIONS_CHRONO = 200_000
+REPETITIONS_PREVISION = 2000
+# --- FIN CONFIGURATION ---
+
+
+def cout_chrono():
+    debut = time.perf_counter()
+    for _ in range(REPETITIONS_CHRONO):
+        with instrumentation.chrono('bench.vide'):
+            pass
+    return (time.perf_counter() - debut) / REPETITIONS_CHRONO
+
+
+def cout_prevision(moteur, fenetres, dates):
+    moteur.prevoir_fenetres(fenetres, dates)  # préchauffage
+    durees = np.empty(REPETITIONS_PREVISION)
+    for i in range(REPETITIONS_PREVISION):
+        debut = time.perf_counter()
+        moteur.prevoir_fenetres(fenetres, dates)
+        durees[i] = time.perf_counter() - debut
+    return float(np.median(durees))
+
+
+def main():
+    predicteur, feature_order, _ = charger_modele(MODEL_DIR, 'compile')
+    moteur = MoteurPrevision(predicteur, feature_order)
+    df = lire_donnees(DATA_PATH)
+    dates = np.array([df.index.max() + np.timedelta64(1, 'D')], dtype='datetime64[D]')
+    fenetres, _ = moteur.fenetres_depuis_observations(df, dates)
+
+    resultats = {}
+    for actif in (False, True):
+        instrumentation.activer(actif)
+        resultats[actif] = (cout_chrono(), cout_prevision(moteur, fenetres, dates))
+    instrumentation.activer(False)
+
+    print(f"{'instrumentation':16s} {'chrono (µs)':>12s} {'prévision (µs)':>15s}")
+    for actif, (chrono, prevision) in resultats.items():
+        print(f"{'activée' if actif else 'désactivée':16s} {chrono * 1e6:12.3f} {prevision * 1e6:15.1f}")
+    surcout = resultats[True][1] / resultats[False][1] - 1
+    print(f"\nSurcoût activée sur une prévision : {surcout:+.1%} ; désactivée, un chronomètre coûte "
+          f"{resultats[False][0] * 1e9:.0f} ns ({resultats[False][0] / resultats[False][1]:.2%} de la prévision par appel).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Prévision par lots en flux (script 04 `--lot`, meteo/lots.py) sur un ensemble de scénarios synthétique.
+
+Chaque membre de l'ensemble est la série 1991-2020 du CSV fourni, perturbée d'un bruit gaussien.
+Vérifie la parité avec `MoteurPrevision.prevoir` série par série (la coupure des tranches ne
+change rien), puis mesure le débit (lignes/s) et la mémoire maximale (RSS) du script 04 pour deux
+tailles d'entrée : avec des tranches de taille fixe, la mémoire ne doit pas croître avec l'entrée.
+
+Usage (depuis la racine du dépôt, après le script 03) : python benchmarks/bench_lots.py [--membres 200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.features import COLONNES_OBSERVATIONS
+from meteo.lots import TAILLE_LOT, PrevisionLots, lire_par_lots
+from meteo.stations import STATION_DEFAUT, charger_station
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+SCRIPT_04 = 'scripts/04_predict_next_day.py'
+MEMBRES = 40  # ~370 000 lignes (--membres 400 : ~3,7 millions)
+MEMBRES_PARITE = 3
+TAILLE_LOT_PARITE = 5_000  # petite tranche : plusieurs coupures au milieu des séries
+BRUIT = 0.5  # écart-type du bruit ajouté aux observations de chaque membre
+TOLERANCE = 1e-4
+CROISSANCE_MEMOIRE_MAX = 1.25  # RSS maximale de l'entrée complète / RSS du quart de l'entrée
+# Mesure de la mémoire maximale du script 04 dans un interpréteur neuf
+GABARIT = (
+    "import resource, runpy, sys\n"
+    "sys.argv = {argv!r}\n"
+    "try:\n"
+    "    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)"
+)
+# --- FIN CONFIGURATION ---
+
+
+def ecrire_ensemble(df, membres, chemin, graine=0):
+    """Écrit `membres` séries perturbées, triées par série puis par date, sans les garder en mémoire."""
+    generateur = np.random.default_rng(graine)
+    valeurs = df[COLONNES_OBSERVATIONS].to_numpy()
+    with open(chemin, 'w', encoding='utf-8', newline='') as f:
+        for membre in range(membres):
+            bruit = generateur.normal(0, BRUIT, valeurs.shape)
+            bruit[:, 2] = 0  # précipitations inchangées
+            serie = pd.DataFrame(valeurs + bruit, columns=COLONNES_OBSERVATIONS)
+            serie.insert(0, 'serie', f'm{membre:04d}')
+            serie.insert(1, 'time', df.index.strftime('%Y-%m-%d'))
+            serie.to_csv(f, header=membre == 0, index=False, float_format='%.2f')
+
+
+def executer_04(entree, sortie, taille_lot):
+    """Lance le script 04 en mode lot ; retourne (rapport de la sortie d'erreur, RSS maximale en Mo)."""
+    argv = [SCRIPT_04, '--lot', entree, '--sortie', sortie, '--taille-lot', str(taille_lot)]
+    resultat = subprocess.run([sys.executable, '-c', GABARIT.format(argv=argv)], capture_output=True, text=True, check=True)
+    lignes = resultat.stderr.strip().splitlines()
+    return lignes[-2], int(lignes[-1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit et mémoire de la prévision par lots en flux.")
+    parser.add_argument('--membres', type=int, default=MEMBRES)
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
+    moteur = charger_station(STATION_DEFAUT, 'booster', 2)[0]  # backend du mode --lot du script 04
+
+    with tempfile.TemporaryDirectory() as dossier:
+        # 1. Parité avec la prévision série par série, tranches coupant les séries
+        entree = os.path.join(dossier, 'parite.csv')
+        ecrire_ensemble(df, MEMBRES_PARITE, entree)
+        morceaux = []
+        PrevisionLots(lambda station: moteur, STATION_DEFAUT).traiter(lire_par_lots(entree, TAILLE_LOT_PARITE), morceaux.append)
+        lots = pd.concat(morceaux, ignore_index=True)
+        ensemble = pd.read_csv(entree, parse_dates=['time'])
+        for membre, serie in ensemble.groupby('serie'):
+            serie = serie.set_index('time')
+            reference = moteur.prevoir(serie, serie.index + pd.Timedelta(days=1))
+            obtenu = lots[lots['serie'] == membre].reset_index(drop=True)
+            colonnes = [c for c in reference.columns if c.startswith(('Tmax', 'Tmin'))]
+            assert (obtenu['date_reference'].values == reference['date_reference'].values).all()
+            assert np.allclose(obtenu[colonnes], reference[colonnes], atol=TOLERANCE, equal_nan=True), \
+                f"Écart avec MoteurPrevision.prevoir pour {membre}"
+        print(f"Parité OK : {MEMBRES_PARITE} membres, {len(ensemble):,} lignes en tranches de {TAILLE_LOT_PARITE:,}")
+
+        # 1 bis. Série qui reparaît dans une tranche ultérieure (entrée non groupée par série) : rejetée
+        melange = pd.concat([ensemble, ensemble[ensemble['serie'] == ensemble['serie'].iloc[0]]], ignore_index=True)
+        try:
+            lots_melange = [melange.iloc[debut:debut + TAILLE_LOT_PARITE] for debut in range(0, len(melange), TAILLE_LOT_PARITE)]
+            PrevisionLots(lambda station: moteur, STATION_DEFAUT).traiter(lots_melange, lambda _: None)
+            raise AssertionError("ValueError attendue pour une série non contiguë")
+        except ValueError:
+            pass
+        print("Série reparaissant dans une tranche ultérieure : rejetée")
+
+        # 2. Débit et mémoire du script 04 : un quart de l'ensemble, puis l'ensemble complet
+        memoires = []
+        for membres in (max(args.membres // 4, 1), args.membres):
+            entree = os.path.join(dossier, f'ensemble_{membres}.csv')
+            ecrire_ensemble(df, membres, entree)
+            rapport, rss = executer_04(entree, os.path.join(dossier, 'previsions.csv'), TAILLE_LOT)
+            memoires.append(rss)
+            print(f"{membres:4d} membres ({os.path.getsize(entree) / 1e6:.0f} Mo) : {rapport} | RSS max {rss:.0f} Mo")
+            os.remove(entree)
+
+    croissance = memoires[1] / memoires[0]
+    print(f"Mémoire maximale : x{croissance:.2f} pour une entrée x{args.membres / max(args.membres // 4, 1):.0f} "
+          f"(seuil x{CROISSANCE_MEMOIRE_MAX})")
+    assert croissance < CROISSANCE_MEMOIRE_MAX, "La mémoire croît avec la taille de l'entrée"
+
+
+if __name__ == '__main__':
+    main()
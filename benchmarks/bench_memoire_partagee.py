@@ -0,0 +1,111 @@
+"""
+Mémoire de N processus de service (application ou service derrière un répartiteur de charge)
+qui chargent le même modèle compilé, les normales et l'historique des observations :
+
+  - 'privé'   : archives .npz copiées dans chaque processus (METEO_MEMOIRE_PARTAGEE=0),
+                historique relu du CSV en DataFrame ;
+  - 'partagé' : tableaux .npy mappés en lecture seule (meteo/partage.py), historique lu
+                dans le bundle mappé (meteo/donnees.py).
+
+Les N processus sont mesurés en même temps (barrière), après une requête et une lecture de
+toutes les pages du modèle (régime établi d'un service). RSS compte les pages partagées dans
+chaque processus ; USS (pages privées) et PSS (pages partagées divisées entre les processus)
+montrent ce que chaque worker ajoute réellement. Linux uniquement (/proc/self/smaps_rollup).
+
+Usage (depuis la racine du dépôt, après les scripts 02 et 03) :
+    python benchmarks/bench_memoire_partagee.py [--workers 4] [--mode recursif]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+DATE_REQUETE = '2020-06-15'
+CHAMPS_SMAPS = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}
+# --- FIN CONFIGURATION ---
+
+
+def memoire_mo():
+    """RSS, PSS et USS du processus courant (Mo)."""
+    mesures = {'rss': 0.0, 'pss': 0.0, 'uss': 0.0}
+    with open('/proc/self/smaps_rollup') as f:
+        for ligne in f:
+            champ = ligne.split(':')[0]
+            if champ in CHAMPS_SMAPS:
+                mesures[CHAMPS_SMAPS[champ]] += int(ligne.split()[1]) / 1024
+    return mesures
+
+
+def worker(mode_partage, mode_prevision, barriere, resultats):
+    import numpy as np
+    import pandas as pd
+
+    from meteo.donnees import chemin_bundle, lire_tableaux
+    from meteo.features import COLONNES_OBSERVATIONS
+    from meteo.stations import STATION_DEFAUT, charger_station
+
+    avant = memoire_mo()
+    moteur, normales, _, _ = charger_station(STATION_DEFAUT, 'compile', 2, mode_prevision)
+    if mode_partage:
+        # DataFrame construit sur la matrice mappée, sans copie (les colonnes du bundle brut sont les observations)
+        dates, tableaux, manifeste = lire_tableaux(chemin_bundle(DATA_PATH))
+        historique = pd.DataFrame(tableaux['float32'], index=pd.DatetimeIndex(np.asarray(dates)),
+                                  columns=manifeste['float32'], copy=False)[COLONNES_OBSERVATIONS]
+    else:
+        historique = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
+    # Une requête (une date), puis le régime établi : au fil des requêtes, toutes les pages du modèle
+    # et des normales finissent par être lues (parcourues ici sans allouer de temporaires)
+    prevision = moteur.prevoir(historique, [pd.Timestamp(DATE_REQUETE)])
+    normales.anomalies(prevision['date_prevue'].values, prevision['Tmax_Prevue'], prevision['Tmin_Prevue'])
+    for tableau in [*moteur.modele.t.values(), normales.table, historique.to_numpy()]:
+        np.asarray(tableau).sum()
+    barriere.wait()  # tous les workers sont chargés : les pages partagées le sont entre N processus
+    apres = memoire_mo()
+    barriere.wait()
+    resultats.put({'avant': avant, 'apres': apres})
+
+
+def mesurer(mode_partage, mode_prevision, n_workers):
+    os.environ['METEO_MEMOIRE_PARTAGEE'] = '1' if mode_partage else '0'  # hérité par les processus créés
+    contexte = multiprocessing.get_context('spawn')
+    barriere, resultats = contexte.Barrier(n_workers), contexte.Queue()
+    processus = [contexte.Process(target=worker, args=(mode_partage, mode_prevision, barriere, resultats))
+                 for _ in range(n_workers)]
+    for p in processus:
+        p.start()
+    mesures = [resultats.get() for _ in processus]
+    for p in processus:
+        p.join()
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', default='recursif', help="Mode du moteur ('recursif' ou 'direct').")
+    args = parser.parse_args()
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("Mesure impossible : /proc/self/smaps_rollup absent (Linux uniquement).")
+        sys.exit(1)
+
+    from meteo.donnees import chemin_bundle, convertir_csv
+    if not os.path.isdir(chemin_bundle(DATA_PATH)):
+        convertir_csv(DATA_PATH)
+
+    print(f"{args.workers} workers, modèle compilé '{args.mode}', normales et historique {DATA_PATH}\n")
+    print(f"{'mode':10s} {'RSS/worker':>11s} {'USS/worker':>11s} {'PSS/worker':>11s} {'PSS total':>10s} "
+          f"{'ajout RSS':>10s} {'ajout USS':>10s}   (Mo ; ajout = après chargement - après imports)")
+    for nom, partage in (('privé', False), ('partagé', True)):
+        mesures = mesurer(partage, args.mode, args.workers)
+        moyenne = {cle: sum(m['apres'][cle] for m in mesures) / len(mesures) for cle in ('rss', 'uss', 'pss')}
+        ajout = {cle: sum(m['apres'][cle] - m['avant'][cle] for m in mesures) / len(mesures) for cle in ('rss', 'uss')}
+        print(f"{nom:10s} {moyenne['rss']:11.1f} {moyenne['uss']:11.1f} {moyenne['pss']:11.1f} "
+              f"{moyenne['pss'] * len(mesures):10.1f} {ajout['rss']:10.1f} {ajout['uss']:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
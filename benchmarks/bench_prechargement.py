@@ -0,0 +1,161 @@
+"""
+Préchargement en arrière-plan (meteo/prechargement.py) avec des sources locales simulées, sans réseau.
+
+Trois sources construites sur le CSV fourni remplacent Meteostat : une source fiable, une source qui
+échoue aux deux premiers appels (nouvelles tentatives) et une source bloquée (délai maximal dépassé,
+repli sur le stock existant, état « obsolète »). La date du jour est simulée (`AUJOURD_HUI`) et
+les attentes entre tentatives sont enregistrées au lieu d'être dormies.
+
+Compare ensuite la lecture d'une prévision précalculée au calcul à la demande de l'application
+(lecture des observations précédant J dans le stock puis `moteur.prevoir`).
+
+Usage (depuis la racine du dépôt, après les scripts 02 et 03) : python benchmarks/bench_prechargement.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.observations import SourceDataFrame, StockObservations
+from meteo.prechargement import ErreurSource, Prechargement, SourceResiliente, StockPrevisions, cle_previsions, plage_dates
+from meteo.stations import STATION_DEFAUT, charger_station
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+AUJOURD_HUI = date(2020, 12, 31)
+TIMEOUT_S = 0.5
+REPETITIONS = 200
+# --- FIN CONFIGURATION ---
+
+
+class SourceInstable(SourceDataFrame):
+    """Échoue aux `echecs` premiers appels, puis répond normalement."""
+
+    def __init__(self, df, echecs):
+        super().__init__(df)
+        self.echecs = echecs
+        self.appels = 0
+
+    def recuperer(self, station, debut, fin):
+        self.appels += 1
+        if self.appels <= self.echecs:
+            raise ConnectionError(f"échec simulé n°{self.appels}")
+        return super().recuperer(station, debut, fin)
+
+
+class SourceBloquee(SourceDataFrame):
+    """Ne répond jamais (jusqu'à `liberer`)."""
+
+    def __init__(self, df):
+        super().__init__(df)
+        self.liberation = threading.Event()
+
+    def recuperer(self, station, debut, fin):
+        self.liberation.wait()
+        return super().recuperer(station, debut, fin)
+
+
+class Horloge:
+    """Heure simulée : AUJOURD_HUI à 07:00 (après l'heure de rafraîchissement par défaut)."""
+
+    def __call__(self):
+        return pd.Timestamp(AUJOURD_HUI).to_pydatetime().replace(hour=7)
+
+
+def prechargement(dossier, source, nom):
+    chemin = os.path.join(dossier, f'{nom}.sqlite')
+    return Prechargement(StockObservations(chemin), StockPrevisions(chemin), source, horloge=Horloge())
+
+
+def main():
+    df = pd.read_csv(DATA_PATH, index_col='time', parse_dates=True)
+    moteur, _, version, _ = charger_station(STATION_DEFAUT, 'compile', 2)
+    debut, fin = plage_dates(AUJOURD_HUI)
+    attentes = []
+
+    with tempfile.TemporaryDirectory() as dossier:
+        # 1. Source instable : deux échecs puis succès, attentes exponentielles 2 s puis 4 s (simulées)
+        instable = SourceInstable(df, echecs=2)
+        p = prechargement(dossier, SourceResiliente(instable, attendre=attentes.append), 'instable').demarrer()
+        p.suivre(STATION_DEFAUT, moteur, version)
+        assert p.attendre(STATION_DEFAUT, 30), "Premier rafraîchissement non terminé"
+        etat = p.etats[STATION_DEFAUT]
+        p.arreter()
+        assert etat['erreur'] is None and not etat['obsolete'], etat
+        assert instable.appels == 3 and [round(a) for a in attentes] == [2, 4], (instable.appels, attentes)
+        print(f"Source instable : {instable.appels} appels, attentes {[round(a, 2) for a in attentes]} s, "
+              f"{etat['jours_ajoutes']} jours ajoutés, {etat['dates_precalculees']} dates précalculées")
+
+        # 2. Source bloquée sur un stock arrêté 10 jours plus tôt : délai dépassé à chaque tentative,
+        #    prévisions calculées sur le stock existant, station signalée obsolète
+        bloquee = SourceBloquee(df)
+        p = prechargement(dossier, SourceResiliente(bloquee, tentatives=2, timeout=TIMEOUT_S, attendre=lambda _: None), 'bloquee')
+        p.stock.enregistrer(STATION_DEFAUT, df[(df.index >= pd.Timestamp(debut - timedelta(days=moteur.taille_historique)))
+                                              & (df.index <= pd.Timestamp(AUJOURD_HUI - timedelta(days=11)))])
+        t0 = time.perf_counter()
+        p.suivre(STATION_DEFAUT, moteur, version)
+        p.rafraichir()
+        duree = time.perf_counter() - t0
+        bloquee.liberation.set()
+        etat = p.etats[STATION_DEFAUT]
+        assert etat['obsolete'] and 'TimeoutError' in etat['erreur'], etat
+        assert p.source.compteurs['timeouts'] == 2
+        print(f"Source bloquée : abandon après {duree:.2f} s (2 x {TIMEOUT_S} s), obsolète, observations jusqu'au "
+              f"{etat['observations_jusqu_au']}, {etat['dates_precalculees']} dates précalculées sur le stock existant")
+
+        # 3. Erreur définitive (module absent) : pas de nouvelle tentative
+        class SourceSansModule:
+            appels = 0
+
+            def recuperer(self, station, debut, fin):
+                SourceSansModule.appels += 1
+                raise ImportError("No module named 'meteostat'")
+        try:
+            SourceResiliente(SourceSansModule(), attendre=attentes.append).recuperer(STATION_DEFAUT, debut, fin)
+            raise AssertionError("ErreurSource attendue")
+        except ErreurSource:
+            assert SourceSansModule.appels == 1
+        print("Module absent : 1 seul appel, pas de nouvelle tentative")
+
+        # 4. Lecture précalculée contre calcul à la demande (chemin du bouton de l'application)
+        p = prechargement(dossier, SourceResiliente(SourceDataFrame(df)), 'instable')
+        date_ref = AUJOURD_HUI - timedelta(days=30)
+        cle = cle_previsions(version, moteur)
+        precalculee = p.previsions.lire(STATION_DEFAUT, cle, date_ref)
+        directe = moteur.prevoir(p.stock.fenetre(STATION_DEFAUT, date_ref, moteur.taille_historique), [date_ref])
+        colonnes = [c for c in directe.columns if c.startswith(('Tmax', 'Tmin'))]
+        assert (precalculee[colonnes] - directe[colonnes]).abs().max().max() < 1e-4, "Prévision précalculée différente"
+
+        t0 = time.perf_counter()
+        for _ in range(REPETITIONS):
+            p.previsions.lire(STATION_DEFAUT, cle, date_ref)
+        t_lecture = (time.perf_counter() - t0) / REPETITIONS
+        t0 = time.perf_counter()
+        for _ in range(REPETITIONS):
+            moteur.prevoir(p.stock.fenetre(STATION_DEFAUT, date_ref, moteur.taille_historique), [date_ref])
+        t_calcul = (time.perf_counter() - t0) / REPETITIONS
+        print(f"Prévision du {date_ref} : précalculée {t_lecture * 1e3:.2f} ms, à la demande {t_calcul * 1e3:.2f} ms "
+              f"({t_calcul / t_lecture:.1f}x)")
+
+        # 5. Changement d'horizon puis de version : prévisions J+2 non servies pour J+7, anciennes versions purgées
+        moteur_7, _, _, _ = charger_station(STATION_DEFAUT, 'compile', 7)
+        assert p.previsions.lire(STATION_DEFAUT, cle_previsions(version, moteur_7), date_ref) is None
+        p.suivre(STATION_DEFAUT, moteur_7, version)
+        p.rafraichir()
+        assert len(p.previsions.lire(STATION_DEFAUT, cle_previsions(version, moteur_7), date_ref)) == 7
+        assert p.previsions.lire(STATION_DEFAUT, cle, date_ref) is not None  # autre horizon du même modèle : conservé
+        p.suivre(STATION_DEFAUT, moteur, 'nouvelle')
+        p.rafraichir()
+        etat = p.etats[STATION_DEFAUT]
+        assert etat['previsions_purgees'] == 2 * etat['dates_precalculees'], etat
+        assert p.previsions.lire(STATION_DEFAUT, cle, date_ref) is None
+        print(f"Horizon J+7 : prévisions J+2 non servies ; nouvelle version : {etat['previsions_purgees']} lignes purgées")
+
+
+if __name__ == '__main__':
+    main()
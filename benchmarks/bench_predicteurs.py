@@ -0,0 +1,58 @@
+"""
+Latence sur une ligne et débit par lot de chaque backend de prédiction
+('sklearn', 'booster', 'compile'), avec vérification que leurs sorties concordent.
+
+Usage (depuis la racine du dépôt, après le script 03) : python benchmarks/bench_predicteurs.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.modeles import charger_modele
+from meteo.predicteurs import BACKENDS
+
+# --- CONFIGURATION ---
+FEATURES_PATH = 'data/features_finales.csv'
+MODEL_DIR = 'models'
+TEST_SPLIT_DATE = '2018-01-01'
+REPETITIONS_LIGNE = 200
+TOLERANCE = 1e-3  # °C : les backends ne somment pas les feuilles dans le même ordre
+# --- FIN CONFIGURATION ---
+
+
+def main():
+    df = lire_donnees(FEATURES_PATH)
+    predicteurs = {backend: charger_modele(MODEL_DIR, backend)[0] for backend in BACKENDS}
+    feature_order = predicteurs['sklearn'].feature_order
+    X_lot = df.loc[df.index >= TEST_SPLIT_DATE, feature_order].to_numpy(dtype=np.float32)
+    X_ligne = X_lot[-1:]
+
+    # Référence : booster natif, toutes sorties (ponctuelles puis bornes quantiles) ; le pickle
+    # scikit-learn ne contient que les sorties ponctuelles, comparées aux premières colonnes
+    reference = predicteurs['booster'].predict(X_lot)
+    print(f"Lot de test : {len(X_lot)} lignes (depuis {TEST_SPLIT_DATE})\n")
+    print(f"{'backend':10s} {'ligne (ms)':>12s} {'lot (ms)':>10s} {'lignes/s':>12s} {'écart max':>10s}")
+    for backend, predicteur in predicteurs.items():
+        predicteur.predict(X_ligne)  # préchauffage
+        debut = time.perf_counter()
+        for _ in range(REPETITIONS_LIGNE):
+            predicteur.predict(X_ligne)
+        latence = (time.perf_counter() - debut) / REPETITIONS_LIGNE
+
+        debut = time.perf_counter()
+        sortie = predicteur.predict(X_lot)
+        duree_lot = time.perf_counter() - debut
+
+        ecart = float(np.abs(sortie - reference[:, :sortie.shape[1]]).max())
+        assert ecart <= TOLERANCE, f"Le backend '{backend}' s'écarte de la référence de {ecart:.2e} °C"
+        print(f"{backend:10s} {latence * 1e3:12.3f} {duree_lot * 1e3:10.1f} {len(X_lot) / duree_lot:12.0f} {ecart:10.1e}")
+
+    print("\nSorties concordantes pour tous les backends.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Entraînement et service de N stations synthétiques (meteo/stations.py, scripts/07_multi_stations.py).
+
+Chaque station est la série de Brazzaville décalée (températures), mise à l'échelle (pluie, vent),
+bruitée et trouée au hasard. Tout est écrit dans un dossier temporaire qui sert de racine
+(data/, models/, stock SQLite) : le dépôt n'est pas modifié.
+
+  1. collecte (source CSV), features et entraînement des N stations par le script 07,
+     en séquentiel puis avec plusieurs workers ;
+  2. service : requêtes tournant sur toutes les stations, avec un LRU de modèles borné puis
+     avec tous les modèles en mémoire (un processus neuf par configuration), pour comparer
+     la mémoire résidente et la latence à froid / à chaud.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_stations.py [--stations 6] [--workers 3] [--lru 2]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.features import COLONNES_OBSERVATIONS
+from meteo.lacunes import retirer_imputation_moyenne
+from meteo.stations import REGISTRE_PATH, chemins_station
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+SCRIPT_STATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', '07_multi_stations.py')
+PARAMS_RAPIDES = {'n_estimators': 300, 'learning_rate': 0.1}  # entraînement court : on mesure l'orchestration
+PROPORTION_TROUS = 0.02
+DATES_SERVICE = ['2020-06-15', '2020-09-01', '2020-12-01']
+TOURS_SERVICE = 3
+# --- FIN CONFIGURATION ---
+
+
+def rss_mo():
+    """Mémoire résidente actuelle du processus (Mo)."""
+    with open('/proc/self/status') as f:
+        for ligne in f:
+            if ligne.startswith('VmRSS:'):
+                return int(ligne.split()[1]) / 1024
+    return float('nan')
+
+
+def creer_stations(racine, n):
+    """Écrit les CSV bruts et le registre de `n` stations synthétiques dans `racine`."""
+    base = retirer_imputation_moyenne(lire_donnees(DATA_PATH))
+    rng = np.random.default_rng(42)
+    stations = {}
+    for k in range(n):
+        station = f'SYN{k + 1:02d}'
+        df = base.copy()
+        df[COLONNES_OBSERVATIONS[:2]] += rng.uniform(-3, 3) + rng.normal(0, 0.6, (len(df), 2))
+        df[COLONNES_OBSERVATIONS[2:]] *= rng.uniform(0.6, 1.4, 2)
+        df = df.round(1).mask(rng.random(df.shape) < PROPORTION_TROUS)
+        chemin = os.path.join(racine, chemins_station(station)['brut'])
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        df.to_csv(chemin)
+        stations[station] = {'nom': f'Synthétique {k + 1}', 'lat': 0.0, 'lon': 0.0}
+    with open(os.path.join(racine, REGISTRE_PATH), 'w', encoding='utf-8') as f:
+        json.dump(stations, f, ensure_ascii=False, indent=2)
+    return list(stations)
+
+
+def entrainer(racine, stations, workers):
+    """Pipeline 01-03 de toutes les stations par le script 07 ; retourne la durée (s)."""
+    debut = time.perf_counter()
+    subprocess.run([sys.executable, SCRIPT_STATIONS, '--stations', *stations, '--source', 'csv',
+                    '--workers', str(workers), '--params', json.dumps(PARAMS_RAPIDES)],
+                   cwd=racine, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - debut
+
+
+def servir(racine, stations, taille_lru, resultats):
+    """Processus de service : requêtes tournant sur les stations, RSS après chaque tour."""
+    os.chdir(racine)
+    from meteo.service import creer_service
+
+    service = creer_service(model_dir='models', data_dir='data', stock_path='data/observations.sqlite',
+                            station=stations[0], taille_lru=taille_lru, ttl=0)  # sans cache de résultats : chaque requête calcule
+    froides, chaudes, rss = [], [], []
+    for _ in range(TOURS_SERVICE):
+        for station in stations:
+            for jour in DATES_SERVICE:
+                charge = station in service.modeles
+                debut = time.perf_counter()
+                asyncio.run(service.prevision(date.fromisoformat(jour), 2, station))
+                (chaudes if charge else froides).append(time.perf_counter() - debut)
+        rss.append(rss_mo())
+    resultats.put({'froides': froides, 'chaudes': chaudes, 'rss': rss, 'compteurs': dict(service.modeles.compteurs)})
+
+
+def mesurer_service(racine, stations, taille_lru):
+    contexte = multiprocessing.get_context('spawn')
+    resultats = contexte.Queue()
+    processus = contexte.Process(target=servir, args=(racine, stations, taille_lru, resultats))
+    processus.start()
+    mesures = resultats.get()
+    processus.join()
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stations', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--lru', type=int, default=2, help="Modèles gardés en mémoire par le service borné.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as racine:
+        stations = creer_stations(racine, args.stations)
+        print(f"{len(stations)} stations synthétiques écrites dans {racine}")
+
+        # 1. Entraînement : séquentiel puis parallèle (les artefacts du second écrasent ceux du premier)
+        duree_seq = entrainer(racine, stations, 1)
+        duree_par = entrainer(racine, stations, args.workers)
+        print(f"\nPipeline 01-03 : séquentiel {duree_seq:.1f} s | {args.workers} workers {duree_par:.1f} s "
+              f"({duree_seq / duree_par:.1f}x) | {duree_par / len(stations):.1f} s par station")
+
+        # 2. Service : LRU borné vs. tous les modèles en mémoire
+        print(f"\n{'modèles en mémoire':>20s} {'froid p50 (ms)':>15s} {'chaud p50 (ms)':>15s} "
+              f"{'RSS par tour (Mo)':>24s} {'chargements':>12s}")
+        for taille in (args.lru, len(stations)):
+            mesures = mesurer_service(racine, stations, taille)
+            rss = ' -> '.join(f"{valeur:.0f}" for valeur in mesures['rss'])
+            print(f"{taille:>20d} {np.median(mesures['froides']) * 1e3:15.1f} "
+                  f"{np.median(mesures['chaudes']) * 1e3 if mesures['chaudes'] else float('nan'):15.2f} "
+                  f"{rss:>24s} {mesures['compteurs']['chargements']:>12d}")
+
+
+if __name__ == '__main__':
+    main()
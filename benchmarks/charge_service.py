@@ -0,0 +1,90 @@
+"""
+Test de charge du service HTTP de prévision (meteo/service.py) contre une source
+d'observations locale : le stock est alimenté depuis le CSV fourni (aucun appel réseau).
+
+Rapporte les latences p50/p99, le débit (requêtes/s) et la répartition
+calculs / cache / requêtes coalescées.
+
+Usage (depuis la racine du dépôt, après le script 03) :
+    python benchmarks/charge_service.py [--clients 50] [--requetes 40] [--dates 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.observations import SourceCSV, StockObservations
+from meteo.service import creer_service, demarrer_serveur
+
+# --- CONFIGURATION ---
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+STATION_ID = '64450'
+PERIODE_DATES = ('2019-01-10', '2020-12-31')
+# --- FIN CONFIGURATION ---
+
+
+async def client(port, dates, n_requetes, latences, statuts):
+    """Une connexion persistante qui enchaîne `n_requetes` requêtes sur des dates tirées au hasard."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for _ in range(n_requetes):
+        requete = f"GET /forecast?date={random.choice(dates)}&horizon=2 HTTP/1.1\r\nHost: local\r\n\r\n"
+        debut = time.perf_counter()
+        writer.write(requete.encode('latin-1'))
+        await writer.drain()
+        statut = int((await reader.readline()).split()[1])
+        longueur = 0
+        while (entete := await reader.readline()) != b'\r\n':
+            nom, _, valeur = entete.decode('latin-1').partition(':')
+            if nom.lower() == 'content-length':
+                longueur = int(valeur)
+        await reader.readexactly(longueur)
+        latences.append(time.perf_counter() - debut)
+        statuts[statut] = statuts.get(statut, 0) + 1
+    writer.close()
+
+
+async def charge(service, n_clients, n_requetes, dates):
+    serveur = await demarrer_serveur(service, port=0)
+    port = serveur.sockets[0].getsockname()[1]
+    latences, statuts = [], {}
+    async with serveur:
+        debut = time.perf_counter()
+        await asyncio.gather(*(client(port, dates, n_requetes, latences, statuts) for _ in range(n_clients)))
+        duree = time.perf_counter() - debut
+    return np.array(latences), statuts, duree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requetes', type=int, default=40, help="Requêtes par client.")
+    parser.add_argument('--dates', type=int, default=30, help="Nombre de dates de référence distinctes demandées.")
+    parser.add_argument('--backend', default='compile')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        # Source locale en guise de Meteostat : le stock temporaire est rempli depuis le CSV
+        stock_path = os.path.join(dossier, 'observations.sqlite')
+        StockObservations(stock_path).synchroniser(STATION_ID, SourceCSV(DATA_PATH), '1991-01-01', '2020-12-31')
+        service = creer_service(backend=args.backend, stock_path=stock_path)
+
+        toutes_les_dates = [str(d) for d in np.arange(*PERIODE_DATES, dtype='datetime64[D]')]
+        dates = random.Random(42).sample(toutes_les_dates, args.dates)
+        latences, statuts, duree = asyncio.run(charge(service, args.clients, args.requetes, dates))
+
+    print(f"{len(latences)} requêtes ({args.clients} clients x {args.requetes}, {args.dates} dates distinctes, "
+          f"backend '{args.backend}')")
+    print(f"   latence p50 : {np.percentile(latences, 50) * 1e3:.2f} ms | p99 : {np.percentile(latences, 99) * 1e3:.2f} ms")
+    print(f"   débit       : {len(latences) / duree:.0f} requêtes/s")
+    print(f"   statuts     : {statuts}")
+    print(f"   service     : {service.compteurs}")
+
+
+if __name__ == '__main__':
+    main()
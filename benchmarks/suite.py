@@ -0,0 +1,240 @@
+"""
+Suite de benchmarks reproductible du pipeline, hors ligne sur les fichiers de data/ :
+lecture du CSV brut, construction des features 1991-2020 (script 02), entraînement à graine fixe
+et arbres réduits, prévision d'une date, prévision par lot 2018-2020 et démarrage à froid de
+l'application (corps de `load_resources` dans un interpréteur neuf).
+
+Le modèle mesuré est entraîné par la suite elle-même dans un dossier temporaire : les mesures
+ne dépendent pas de l'état de models/, et la MAE de test (2018-2020) de ce modèle réduit est
+enregistrée avec les durées pour suivre aussi la précision.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/suite.py executer [--sortie resultats/benchmarks/reference.json]
+    python benchmarks/suite.py comparer reference.json candidat.json [--tolerance 0.2]
+
+`comparer` compare la meilleure durée de chaque étape et sort avec le code 1 si une étape est plus
+lente que la référence au-delà de la tolérance (et du plancher de bruit), ou si la MAE de test augmente.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.features import COLONNES_OBSERVATIONS, TARGET_COLUMNS, separer_features_cibles
+from meteo.lacunes import preparer_serie
+from meteo.mise_a_jour import construire_jeu
+from meteo.modeles import charger_modele, exporter_boosters
+from meteo.normales import NORMALES_PATH, NormalesClimatiques
+from meteo.prevision import MoteurPrevision
+from meteo.stations import STATION_DEFAUT
+
+# --- CONFIGURATION ---
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = 'data/meteo_brazzaville_daily.csv'
+DOSSIER_RESULTATS = 'resultats/benchmarks'
+TEST_SPLIT_DATE = '2018-01-01'
+PARAMS_ENTRAINEMENT = {  # arbres réduits et un seul thread : durée et MAE comparables d'une exécution à l'autre
+    'n_estimators': 200, 'learning_rate': 0.05, 'max_depth': 5, 'random_state': 42, 'n_jobs': 1,
+}
+REPETITIONS = {
+    'chargement_csv': 5,
+    'features': 5,
+    'entrainement': 3,
+    'prediction_ligne': 200,
+    'prediction_lot': 5,
+    'demarrage_app': 5,
+}
+HORIZON_APP = 2  # mêmes réglages que l'application (app.py)
+BACKEND_APP = 'compile'
+TOLERANCE = 0.25  # ralentissement relatif toléré par étape (meilleure des répétitions, la moins sensible au bruit)
+PLANCHER_S = 0.0005  # écarts absolus inférieurs ignorés (bruit de mesure)
+TOLERANCE_MAE = 0.01  # hausse de MAE tolérée (°C)
+# Démarrage mesuré dans le sous-processus, imports compris, hors démarrage de l'interpréteur
+GABARIT_DEMARRAGE = (
+    "import time; debut = time.perf_counter()\n"
+    "import sys; sys.path.insert(0, {racine!r})\n"
+    "from meteo.stations import charger_station\n"
+    "charger_station({station!r}, {backend!r}, {horizon}, 'recursif', model_dir={dossier!r})\n"
+    "print(time.perf_counter() - debut)"
+)
+# --- FIN CONFIGURATION ---
+
+
+def chronometrer(fonction, repetitions):
+    """Durées (s) de `repetitions` appels et résultat du dernier."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - debut)
+    return durees, resultat
+
+
+def resume(durees):
+    return {'mediane_s': statistics.median(durees), 'min_s': min(durees), 'max_s': max(durees),
+            'repetitions': len(durees)}
+
+
+def environnement():
+    import xgboost
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RACINE, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'xgboost': xgboost.__version__, 'plateforme': platform.platform(), 'cpu': os.cpu_count(),
+            'commit': commit}
+
+
+def entrainer(X_train, Y_train):
+    from xgboost import XGBRegressor
+
+    return [XGBRegressor(**PARAMS_ENTRAINEMENT).fit(X_train, Y_train[cible]) for cible in TARGET_COLUMNS]
+
+
+def executer(args):
+    mesures = {}
+
+    # 1. Lecture du CSV brut (sans bundle)
+    durees, df_brut = chronometrer(lambda: pd.read_csv(DATA_PATH, index_col='time', parse_dates=True),
+                                   REPETITIONS['chargement_csv'])
+    mesures['chargement_csv'] = resume(durees)
+
+    # 2. Features 1991-2020 : calendrier complet, imputation des lacunes, features et cibles (script 02)
+    def features():
+        return construire_jeu(*preparer_serie(df_brut))
+
+    durees, df = chronometrer(features, REPETITIONS['features'])
+    mesures['features'] = resume(durees)
+
+    # 3. Entraînement à graine fixe, arbres réduits (Tmax/Tmin J+1)
+    X, Y = separer_features_cibles(df)
+    test = X.index >= TEST_SPLIT_DATE
+    durees, estimateurs = chronometrer(lambda: entrainer(X[~test], Y[~test]), REPETITIONS['entrainement'])
+    mesures['entrainement'] = resume(durees)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        erreurs = {cible: float(np.mean(np.abs(estimateur.predict(X[test]) - Y.loc[test, cible])))
+                   for cible, estimateur in zip(TARGET_COLUMNS, estimateurs)}
+        mae = {**erreurs, 'global': float(np.mean(list(erreurs.values())))}
+        exporter_boosters(estimateurs, TARGET_COLUMNS, dossier, mae)
+        NormalesClimatiques.calculer(df_brut).sauvegarder(os.path.join(dossier, os.path.basename(NORMALES_PATH)))
+
+        # 4. Prévision d'une date (application, service) et par lot sur 2018-2020 (backtest)
+        predicteur, feature_order, _ = charger_modele(dossier, BACKEND_APP)
+        moteur = MoteurPrevision(predicteur, feature_order, horizon=HORIZON_APP)
+        dates, valeurs, _ = preparer_serie(df_brut)
+        serie = pd.DataFrame(valeurs, index=pd.DatetimeIndex(dates), columns=COLONNES_OBSERVATIONS)
+        dates_test = pd.date_range(TEST_SPLIT_DATE, serie.index.max())
+        fenetres, valides = moteur.fenetres_depuis_observations(serie, dates_test.values)
+        fenetre, date_ref = fenetres[valides][-1:], dates_test.values.astype('datetime64[D]')[valides][-1:]
+        moteur.prevoir_fenetres(fenetre, date_ref)  # préchauffage
+        durees, _ = chronometrer(lambda: moteur.prevoir_fenetres(fenetre, date_ref), REPETITIONS['prediction_ligne'])
+        mesures['prediction_ligne'] = resume(durees)
+        durees, _ = chronometrer(lambda: moteur.prevoir(serie, dates_test), REPETITIONS['prediction_lot'])
+        mesures['prediction_lot'] = resume(durees)
+
+        # 5. Démarrage à froid de l'application : chargement du modèle et des normales (load_resources)
+        code = GABARIT_DEMARRAGE.format(racine=RACINE, station=STATION_DEFAUT, backend=BACKEND_APP,
+                                        horizon=HORIZON_APP, dossier=dossier)
+        durees = [float(subprocess.run([sys.executable, '-c', code], cwd=RACINE, capture_output=True, text=True,
+                                       check=True).stdout) for _ in range(REPETITIONS['demarrage_app'])]
+        mesures['demarrage_app'] = resume(durees)
+
+    resultats = {
+        'horodatage': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environnement': environnement(),
+        'parametres': {'donnees': DATA_PATH, 'lignes_features': len(df), 'test_depuis': TEST_SPLIT_DATE,
+                       'dates_lot': len(dates_test), 'entrainement': PARAMS_ENTRAINEMENT, 'backend': BACKEND_APP},
+        'mesures': mesures,
+        'mae_test': mae,
+    }
+    sortie = args.sortie or os.path.join(DOSSIER_RESULTATS, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(sortie) or '.', exist_ok=True)
+    with open(sortie, 'w', encoding='utf-8') as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+
+    print(f"{'étape':18s} {'médiane (ms)':>13s} {'min (ms)':>10s} {'répétitions':>12s}")
+    for cas, stats in mesures.items():
+        print(f"{cas:18s} {stats['mediane_s'] * 1e3:13.3f} {stats['min_s'] * 1e3:10.3f} {stats['repetitions']:12d}")
+    print(f"\nMAE de test du modèle réduit : {', '.join(f'{cible} {valeur:.3f}' for cible, valeur in mae.items())} °C")
+    print(f"Résultats écrits dans : {sortie}")
+
+
+def comparer(args):
+    with open(args.reference, encoding='utf-8') as f:
+        reference = json.load(f)
+    with open(args.candidat, encoding='utf-8') as f:
+        candidat = json.load(f)
+
+    differences = {cle: (reference['environnement'].get(cle), valeur)
+                   for cle, valeur in candidat['environnement'].items()
+                   if cle != 'commit' and reference['environnement'].get(cle) != valeur}
+    if differences:
+        print("Attention, environnements différents : "
+              + ', '.join(f"{cle} {avant} -> {apres}" for cle, (avant, apres) in differences.items()))
+    print(f"Référence {reference['environnement'].get('commit')} ({reference['horodatage']}) | "
+          f"candidat {candidat['environnement'].get('commit')} ({candidat['horodatage']})\n")
+
+    regressions = []
+    print(f"{'étape (min)':18s} {'référence (ms)':>15s} {'candidat (ms)':>14s} {'ratio':>7s}  statut")
+    for cas, stats in candidat['mesures'].items():
+        if cas not in reference['mesures']:
+            print(f"{cas:18s} {'-':>15s} {stats['min_s'] * 1e3:14.3f} {'-':>7s}  nouvelle")
+            continue
+        avant, apres = reference['mesures'][cas]['min_s'], stats['min_s']
+        ratio = apres / avant
+        if ratio > 1 + args.tolerance and apres - avant > PLANCHER_S:
+            statut = 'RÉGRESSION'
+            regressions.append(cas)
+        else:
+            statut = 'amélioration' if ratio < 1 - args.tolerance and avant - apres > PLANCHER_S else 'ok'
+        print(f"{cas:18s} {avant * 1e3:15.3f} {apres * 1e3:14.3f} {ratio:7.2f}  {statut}")
+
+    print()
+    for cible, apres in candidat['mae_test'].items():
+        avant = reference['mae_test'].get(cible)
+        if avant is None:
+            continue
+        statut = 'ok'
+        if apres - avant > args.tolerance_mae:
+            statut = 'RÉGRESSION'
+            regressions.append(f'mae_{cible}')
+        print(f"MAE {cible:14s} {avant:15.3f} {apres:14.3f} {apres - avant:+7.3f}  {statut}")
+
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nAucune régression.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    parser_executer = commandes.add_parser('executer', help="Exécute la suite et écrit les résultats en JSON.")
+    parser_executer.add_argument('--sortie', help=f"Fichier JSON (défaut : {DOSSIER_RESULTATS}/suite_<date>.json).")
+    parser_comparer = commandes.add_parser('comparer', help="Compare deux résultats ; code de sortie 1 si régression.")
+    parser_comparer.add_argument('reference')
+    parser_comparer.add_argument('candidat')
+    parser_comparer.add_argument('--tolerance', type=float, default=TOLERANCE,
+                                 help="Ralentissement relatif toléré par étape (meilleures durées).")
+    parser_comparer.add_argument('--tolerance-mae', type=float, default=TOLERANCE_MAE,
+                                 help="Hausse de MAE de test tolérée (°C).")
+    args = parser.parse_args()
+    executer(args) if args.commande == 'executer' else comparer(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Briques partagées par l'application Streamlit et les scripts du pipeline."""
@@ -0,0 +1,192 @@
+"""
+Recherche d'hyperparamètres et backtest glissant (walk-forward) sur 1991-2020.
+
+Chaque combinaison de paramètres est évaluée sur des plis à origine glissante :
+entraînement sur toutes les années antérieures, early stopping sur les années de
+validation qui suivent, test sur l'année suivante. Les plis tournent dans un pool
+de processus, avec un nombre de threads XGBoost par pli borné pour ne pas
+surcharger les cœurs. Chaque résultat est mis en cache sur disque sous une clé
+(paramètres, pli, empreinte des données) : une exécution interrompue reprend là
+où elle s'est arrêtée et une exécution répétée ne recalcule rien.
+"""
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from meteo.features import TARGET_COLUMNS, separer_features_cibles
+
+# --- CONFIGURATION ---
+CACHE_DIR = 'resultats/backtest_cache'
+VERSION_EVALUATION = 1  # à incrémenter si la procédure d'évaluation d'un pli change
+PARAMETRES_FIXES = {'n_estimators': 5000, 'random_state': 42}
+EARLY_STOPPING_ROUNDS = 200
+# --- FIN CONFIGURATION ---
+
+
+def grille(parametres):
+    """Produit cartésien d'une grille {nom: [valeurs]} en liste de dictionnaires."""
+    noms = sorted(parametres)
+    return [dict(zip(noms, valeurs)) for valeurs in itertools.product(*(parametres[nom] for nom in noms))]
+
+
+def plis_glissants(annee_debut=1991, premiere_annee_test=2008, derniere_annee_test=2020,
+                   annees_validation=2, annees_test=1):
+    """
+    Plis à origine glissante et fenêtre d'entraînement croissante.
+    Chaque pli est un dictionnaire de bornes de dates ISO (début inclus, fin exclue).
+    """
+    plis = []
+    for annee_test in range(premiere_annee_test, derniere_annee_test + 1, annees_test):
+        annee_validation = annee_test - annees_validation
+        plis.append({
+            'train': [f'{annee_debut}-01-01', f'{annee_validation}-01-01'],
+            'validation': [f'{annee_validation}-01-01', f'{annee_test}-01-01'],
+            'test': [f'{annee_test}-01-01', f'{annee_test + annees_test}-01-01'],
+        })
+    return plis
+
+
+def empreinte_fichier(chemin, taille_bloc=1 << 20):
+    """Empreinte SHA-256 d'un fichier ou de tous les fichiers d'un dossier (bundle)."""
+    chemins = [chemin] if os.path.isfile(chemin) else sorted(
+        os.path.join(chemin, nom) for nom in os.listdir(chemin))
+    h = hashlib.sha256()
+    for fichier in chemins:
+        h.update(os.path.basename(fichier).encode())
+        with open(fichier, 'rb') as f:
+            for bloc in iter(lambda: f.read(taille_bloc), b''):
+                h.update(bloc)
+    return h.hexdigest()
+
+
+def cle_resultat(parametres, pli, empreinte_donnees):
+    contenu = json.dumps({'parametres': parametres, 'pli': pli, 'donnees': empreinte_donnees,
+                          'version': VERSION_EVALUATION}, sort_keys=True)
+    return hashlib.sha256(contenu.encode()).hexdigest()[:20]
+
+
+class CacheResultats:
+    """Un fichier JSON par (paramètres, pli, données), écrit de façon atomique."""
+
+    def __init__(self, dossier=CACHE_DIR):
+        self.dossier = dossier
+        os.makedirs(dossier, exist_ok=True)
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f'{cle}.json')
+
+    def lire(self, cle):
+        try:
+            with open(self._chemin(cle), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def ecrire(self, cle, resultat):
+        temporaire = self._chemin(cle) + f'.{os.getpid()}.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(resultat, f, ensure_ascii=False)
+        os.replace(temporaire, self._chemin(cle))
+
+
+# --- ÉVALUATION D'UN PLI (exécutée dans les processus du pool) ---
+
+_DONNEES_PROCESSUS = {}
+
+
+def _donnees(chemin_features):
+    """Jeu de features chargé une seule fois par processus."""
+    if chemin_features not in _DONNEES_PROCESSUS:
+        from meteo.donnees import lire_donnees
+
+        _DONNEES_PROCESSUS[chemin_features] = lire_donnees(chemin_features)
+    return _DONNEES_PROCESSUS[chemin_features]
+
+
+def evaluer_pli(chemin_features, parametres, pli, n_threads):
+    """Entraîne un modèle par cible (early stopping sur la validation) et mesure la MAE sur le test du pli."""
+    from xgboost import XGBRegressor
+
+    df = _donnees(chemin_features)
+    X, _ = separer_features_cibles(df)
+    periodes = {nom: (df.index >= debut) & (df.index < fin) for nom, (debut, fin) in pli.items()}
+
+    resultat = {'parametres': parametres, 'pli': pli, 'mae': {}, 'arbres': {}}
+    debut_entrainement = time.perf_counter()
+    for cible in TARGET_COLUMNS:
+        modele = XGBRegressor(**PARAMETRES_FIXES, **parametres, n_jobs=n_threads,
+                              early_stopping_rounds=EARLY_STOPPING_ROUNDS, eval_metric='mae')
+        modele.fit(X[periodes['train']], df.loc[periodes['train'], cible],
+                   eval_set=[(X[periodes['validation']], df.loc[periodes['validation'], cible])], verbose=False)
+        predictions = modele.predict(X[periodes['test']])
+        resultat['mae'][cible] = float(np.mean(np.abs(predictions - df.loc[periodes['test'], cible].to_numpy())))
+        resultat['arbres'][cible] = int(modele.best_iteration + 1)
+    resultat['duree_s'] = time.perf_counter() - debut_entrainement
+    return resultat
+
+
+# --- ORCHESTRATION ---
+
+def executer(chemin_features, combinaisons, plis, n_processus=None, cache=None, journal=print):
+    """
+    Évalue toutes les (combinaison, pli) absentes du cache dans un pool de processus.
+    Retourne la liste de tous les résultats (cache + nouveaux).
+    """
+    from meteo.donnees import source_donnees
+
+    cache = cache or CacheResultats()
+    empreinte = empreinte_fichier(source_donnees(chemin_features))
+
+    resultats, a_calculer = [], []
+    for parametres in combinaisons:
+        for pli in plis:
+            cle = cle_resultat(parametres, pli, empreinte)
+            resultat = cache.lire(cle)
+            if resultat is None:
+                a_calculer.append((cle, parametres, pli))
+            else:
+                resultats.append(resultat)
+    journal(f"{len(resultats)} pli(s) déjà en cache, {len(a_calculer)} à calculer.")
+    if not a_calculer:
+        return resultats
+
+    n_coeurs = os.cpu_count() or 1
+    n_processus = min(n_processus or n_coeurs, len(a_calculer))
+    n_threads = max(1, n_coeurs // n_processus)
+    with ProcessPoolExecutor(max_workers=n_processus) as pool:
+        taches = {pool.submit(evaluer_pli, chemin_features, parametres, pli, n_threads): cle
+                  for cle, parametres, pli in a_calculer}
+        for i, tache in enumerate(as_completed(taches), start=1):
+            resultat = tache.result()
+            # Écrit dès la fin de chaque pli : une interruption ne perd que les plis en cours
+            cache.ecrire(taches[tache], resultat)
+            resultats.append(resultat)
+            journal(f"[{i}/{len(a_calculer)}] {resultat['parametres']} test {resultat['pli']['test'][0][:4]} : "
+                    f"MAE {np.mean(list(resultat['mae'].values())):.3f} °C ({resultat['duree_s']:.1f} s)")
+    return resultats
+
+
+def classement(resultats):
+    """Leaderboard : MAE moyenne par cible et globale, et temps d'entraînement cumulé, par combinaison."""
+    lignes = []
+    for resultat in resultats:
+        ligne = {'parametres': json.dumps(resultat['parametres'], sort_keys=True),
+                 'duree_s': resultat['duree_s']}
+        for cible in TARGET_COLUMNS:
+            ligne[f'MAE_{cible}'] = resultat['mae'][cible]
+            ligne[f'arbres_{cible}'] = resultat['arbres'][cible]
+        lignes.append(ligne)
+    df = pd.DataFrame(lignes)
+    agregations = {f'MAE_{cible}': 'mean' for cible in TARGET_COLUMNS}
+    agregations.update({f'arbres_{cible}': 'mean' for cible in TARGET_COLUMNS})
+    agregations['duree_s'] = 'sum'
+    tableau = df.groupby('parametres').agg(agregations)
+    tableau.insert(0, 'plis', df.groupby('parametres').size())
+    tableau.insert(1, 'MAE_globale', tableau[[f'MAE_{cible}' for cible in TARGET_COLUMNS]].mean(axis=1))
+    return tableau.sort_values('MAE_globale')
@@ -0,0 +1,187 @@
+"""
+Format binaire colonnaire des jeux de données du pipeline.
+
+Un jeu `data/<nom>.csv` est stocké à côté, dans le dossier `data/<nom>.bundle/` :
+  - `index.npy`   : dates (datetime64[D]) ;
+  - `float32.npy` : colonnes réelles, matrice (n_jours, n_colonnes) en float32 ;
+  - `int16.npy`   : colonnes entières (features calendaires) en int16 ;
+  - `colonnes.json` : ordre et type des colonnes, nom de l'index.
+
+Les tableaux sont relus en mémoire partagée (`np.load(mmap_mode='r')`), sans
+analyse de texte. Le CSV reste disponible comme export et comme repli.
+
+Un bundle n'est jamais réécrit sur place : il est écrit dans un dossier temporaire puis mis en
+place par renommage, l'ancien dossier étant ensuite supprimé. Un processus qui a mappé les
+anciens fichiers (application, script 02 --incremental) garde des tableaux complets et cohérents ;
+un lecteur qui tombe entre les deux renommages relit le nouveau bundle.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+EXTENSION_BUNDLE = '.bundle'
+MANIFESTE = 'colonnes.json'
+SUFFIXE_TEMPORAIRE = '.tmp'  # dossiers en cours d'écriture ou remplacés (data/.<nom>.bundle.*.tmp)
+TENTATIVES_LECTURE = 5  # lecture d'un bundle remplacé pendant qu'on le lit
+ATTENTE_LECTURE_S = 0.01
+# --- FIN CONFIGURATION ---
+
+
+def chemin_bundle(chemin_csv):
+    """Dossier bundle associé à un chemin CSV (data/x.csv -> data/x.bundle)."""
+    return os.path.splitext(chemin_csv)[0] + EXTENSION_BUNDLE
+
+
+def ecrire_bundle(df, chemin):
+    """
+    Écrit un DataFrame indexé par date au format bundle (colonnes entières en int16, les autres en float32).
+    Le bundle est écrit dans un dossier temporaire, puis remplace l'ancien par renommage.
+    """
+    entieres = [c for c in df.columns if pd.api.types.is_integer_dtype(df[c])]
+    reelles = [c for c in df.columns if c not in entieres]
+
+    parent, nom = os.path.split(os.path.abspath(chemin))
+    os.makedirs(parent, exist_ok=True)
+    temporaire = tempfile.mkdtemp(prefix=f'.{nom}.', suffix=SUFFIXE_TEMPORAIRE, dir=parent)
+    ancien = None
+    try:
+        np.save(os.path.join(temporaire, 'index.npy'), df.index.values.astype('datetime64[D]'))
+        np.save(os.path.join(temporaire, 'float32.npy'), df[reelles].to_numpy(dtype=np.float32).reshape(len(df), len(reelles)))
+        np.save(os.path.join(temporaire, 'int16.npy'), df[entieres].to_numpy(dtype=np.int16).reshape(len(df), len(entieres)))
+        # Le manifeste est écrit en dernier : un bundle sans manifeste est considéré incomplet
+        manifeste = {'index': df.index.name or 'time', 'colonnes': list(df.columns),
+                     'float32': reelles, 'int16': entieres}
+        with open(os.path.join(temporaire, MANIFESTE), 'w', encoding='utf-8') as f:
+            json.dump(manifeste, f, ensure_ascii=False, indent=2)
+        os.chmod(temporaire, 0o755)  # mkdtemp crée le dossier en 0o700
+
+        # Mise en place : l'ancien dossier est écarté (ses fichiers restent valides pour qui les a mappés)
+        if os.path.isdir(chemin):
+            ancien = tempfile.mkdtemp(prefix=f'.{nom}.', suffix=SUFFIXE_TEMPORAIRE, dir=parent)
+            os.replace(chemin, ancien)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        if ancien and not os.path.exists(chemin):
+            os.replace(ancien, chemin)
+        shutil.rmtree(temporaire, ignore_errors=True)
+        raise
+    if ancien:
+        shutil.rmtree(ancien, ignore_errors=True)
+
+
+def _lire_tableaux(chemin):
+    with open(os.path.join(chemin, MANIFESTE), encoding='utf-8') as f:
+        manifeste = json.load(f)
+    dates = np.load(os.path.join(chemin, 'index.npy'), mmap_mode='r')
+    tableaux = {type_: np.load(os.path.join(chemin, f'{type_}.npy'), mmap_mode='r') for type_ in ('float32', 'int16')}
+    if any(len(tableau) != len(dates) for tableau in tableaux.values()) or \
+            [tableaux[type_].shape[1] for type_ in tableaux] != [len(manifeste[type_]) for type_ in tableaux]:
+        # Fichiers lus de part et d'autre d'un remplacement du bundle
+        raise FileNotFoundError(f"Bundle {chemin} remplacé pendant la lecture.")
+    return dates, tableaux, manifeste
+
+
+def lire_tableaux(chemin):
+    """
+    Lit un bundle sans passer par pandas.
+    Retourne (dates, tableaux, manifeste) où `tableaux` associe 'float32' et 'int16' à des matrices mappées en mémoire.
+    Un bundle remplacé pendant la lecture (`ecrire_bundle` dans un autre processus) est relu.
+    """
+    for tentative in range(TENTATIVES_LECTURE):
+        try:
+            return _lire_tableaux(chemin)
+        except FileNotFoundError:
+            if tentative == TENTATIVES_LECTURE - 1:
+                raise
+            time.sleep(ATTENTE_LECTURE_S)
+
+
+def lire_bundle(chemin):
+    """Lit un bundle en DataFrame (colonnes dans l'ordre d'origine, index DatetimeIndex)."""
+    dates, tableaux, manifeste = lire_tableaux(chemin)
+    colonnes = {}
+    for type_ in ('float32', 'int16'):
+        for j, nom in enumerate(manifeste[type_]):
+            colonnes[nom] = tableaux[type_][:, j]
+    index = pd.DatetimeIndex(np.asarray(dates), name=manifeste['index'])
+    return pd.DataFrame({nom: colonnes[nom] for nom in manifeste['colonnes']}, index=index)
+
+
+def _remplacement_en_cours(chemin):
+    """Vrai si `ecrire_bundle` écrit ou met en place ce bundle (dossiers temporaires présents)."""
+    parent, nom = os.path.split(os.path.abspath(chemin))
+    return os.path.isdir(parent) and any(entree.startswith(f'.{nom}.') and entree.endswith(SUFFIXE_TEMPORAIRE) for entree in os.listdir(parent))
+
+
+def _bundle_a_jour(chemin_csv):
+    """Vrai si le bundle existe et n'est pas plus ancien que le CSV correspondant."""
+    manifeste = os.path.join(chemin_bundle(chemin_csv), MANIFESTE)
+    for _ in range(TENTATIVES_LECTURE - 1):
+        # Entre les deux renommages d'`ecrire_bundle`, le bundle est absent un court instant
+        if os.path.exists(manifeste) or not _remplacement_en_cours(chemin_bundle(chemin_csv)):
+            break
+        time.sleep(ATTENTE_LECTURE_S)
+    if not os.path.exists(manifeste):
+        return False
+    return not os.path.exists(chemin_csv) or os.path.getmtime(manifeste) >= os.path.getmtime(chemin_csv)
+
+
+def source_donnees(chemin_csv):
+    """Chemin effectivement lu par `lire_donnees` : le bundle s'il est à jour, sinon le CSV."""
+    return chemin_bundle(chemin_csv) if _bundle_a_jour(chemin_csv) else chemin_csv
+
+
+def lire_donnees(chemin_csv):
+    """
+    Charge un jeu de données du pipeline : le bundle s'il est à jour, sinon le CSV.
+    Lève FileNotFoundError si aucun des deux n'existe.
+    """
+    for tentative in range(TENTATIVES_LECTURE):
+        source = source_donnees(chemin_csv)
+        try:
+            if source != chemin_csv:
+                return lire_bundle(source)
+            return pd.read_csv(chemin_csv, index_col='time', parse_dates=True)
+        except FileNotFoundError:
+            # Bundle remplacé entre la vérification et la lecture : nouvelle vérification
+            if tentative == TENTATIVES_LECTURE - 1 or not _remplacement_en_cours(chemin_bundle(chemin_csv)):
+                raise
+            time.sleep(ATTENTE_LECTURE_S)
+
+
+def ecrire_donnees(df, chemin_csv, export_csv=False):
+    """Écrit le bundle d'un jeu de données, et le CSV associé si `export_csv`."""
+    ecrire_bundle(df, chemin_bundle(chemin_csv))
+    if export_csv:
+        df.to_csv(chemin_csv)
+
+
+def ajouter_donnees(df, chemin_csv, export_csv=False):
+    """
+    Ajoute les lignes de `df` à la fin d'un jeu existant ; les lignes existantes à partir de
+    la première date de `df` sont remplacées. Le bundle est réécrit (quelques millisecondes) ;
+    le CSV, s'il est demandé, est complété en fin de fichier quand rien n'est remplacé, réécrit sinon.
+    Retourne le nombre de lignes ajoutées (hors remplacements).
+    """
+    existant = lire_donnees(chemin_csv)
+    conserve = existant[existant.index < df.index.min()] if len(df) else existant
+    complet = pd.concat([conserve, df])
+    ecrire_bundle(complet, chemin_bundle(chemin_csv))
+    if export_csv and os.path.exists(chemin_csv) and len(conserve) == len(existant):
+        df.to_csv(chemin_csv, mode='a', header=False)
+    elif export_csv:
+        complet.to_csv(chemin_csv)
+    return len(complet) - len(existant)
+
+
+def convertir_csv(chemin_csv):
+    """Convertit un CSV existant du pipeline en bundle. Retourne le chemin du bundle."""
+    df = pd.read_csv(chemin_csv, index_col='time', parse_dates=True)
+    ecrire_bundle(df, chemin_bundle(chemin_csv))
+    return chemin_bundle(chemin_csv)
@@ -0,0 +1,213 @@
+"""
+Construction des features Lag, Temporelles et Glissantes en NumPy pur, partagée par
+02_feature_engineering.py (historique complet), le moteur de prévision,
+04_predict_next_day.py et app.py (ligne unique / lot de fenêtres).
+
+Les matrices produites sont en float32 (le type utilisé en interne par XGBoost)
+et leurs colonnes suivent l'ordre `feature_names` du booster : le constructeur ne calcule
+que les features présentes dans cet ordre (un modèle élagué coûte moins cher à l'inférence).
+
+Les statistiques glissantes (`Tmax_Moy_7`, `Prcp_Somme_30`, `Vent_Std_14`, ...) portent sur les
+n jours J-n..J-1, comme les lags. Elles sont lues dans des sommes cumulées (valeurs, carrés,
+effectifs) calculées en une passe : O(1) par ligne et par fenêtre, quelle que soit sa longueur.
+Les jours manquants (NaN) sont ignorés ; une somme est ramenée à n jours (moyenne x n).
+"""
+import numpy as np
+
+# --- CONFIGURATION ---
+COLONNES_OBSERVATIONS = ['temperature_max_jour', 'temperature_min_jour',
+                         'precipitation_somme_jour', 'vitesse_vent_moyenne_jour']
+VARIABLES = {'Tmax': 0, 'Tmin': 1, 'Prcp': 2, 'Vent': 3}  # préfixe de feature -> colonne d'observation
+VARIABLES_LAG = ['Tmax', 'Tmin', 'Prcp']
+LAGS = [1, 2, 3, 7]  # J-1, J-2, J-3, J-7
+FEATURES_CALENDRIER = ['Mois', 'Jour_de_Annee', 'Jour_de_Semaine']
+FEATURES_CYCLIQUES = ['Jour_Sin', 'Jour_Cos']  # jour de l'année sur le cercle (31/12 voisin du 01/01)
+DUREE_ANNEE = 365.25
+FENETRES_GLISSANTES = [3, 7, 14, 30]
+STATISTIQUES_GLISSANTES = ['Moy', 'Std', 'Somme']  # écart-type d'échantillon (ddof=1), comme pandas
+# Statistiques retenues par défaut : sur une fenêtre fixe, la somme vaut n x la moyenne (information identique
+# pour les arbres) ; cumul de pluie pour Prcp, moyenne pour les autres variables, écart-type pour toutes
+STATISTIQUES_PAR_VARIABLE = {'Tmax': ['Moy', 'Std'], 'Tmin': ['Moy', 'Std'], 'Prcp': ['Somme', 'Std'], 'Vent': ['Moy', 'Std']}
+TARGET_COLUMNS = ['Tmax_Demain', 'Tmin_Demain']
+HORIZON_MAX = 7  # cibles directes construites par le script 02 pour les horizons 2 à HORIZON_MAX
+COLONNES_QUALITE = ['Lags_Imputes']  # métadonnées de features_finales, exclues de X
+
+# Ordre des colonnes de features_finales.csv (et donc du booster entraîné par le script 03)
+FEATURE_ORDER = (FEATURES_CALENDRIER + [f'{variable}_Lag_{lag}' for lag in LAGS for variable in VARIABLES_LAG]
+                 + FEATURES_CYCLIQUES
+                 + [f'{variable}_{statistique}_{n}' for n in FENETRES_GLISSANTES
+                    for variable, statistiques in STATISTIQUES_PAR_VARIABLE.items() for statistique in statistiques])
+# --- FIN CONFIGURATION ---
+
+
+def cibles_horizon(horizon):
+    """Colonnes cibles Tmax/Tmin de l'horizon h (la ligne du jour J porte les observations de J+h)."""
+    return TARGET_COLUMNS if horizon == 1 else [f'Tmax_J{horizon}', f'Tmin_J{horizon}']
+
+
+CIBLES_DIRECTES = [colonne for h in range(2, HORIZON_MAX + 1) for colonne in cibles_horizon(h)]
+
+
+def separer_features_cibles(df):
+    """
+    Sépare un jeu features_finales en (X, Y) ; les cibles directes et les colonnes de qualité ne sont pas des features.
+    Lève ValueError si les features ne sont pas exactement FEATURE_ORDER (jeu produit par une version
+    antérieure du script 02) : un modèle entraîné dessus ne correspondrait pas à ConstructeurFeatures.
+    """
+    X = df.drop(columns=TARGET_COLUMNS + CIBLES_DIRECTES + COLONNES_QUALITE, errors='ignore')
+    manquantes = [c for c in FEATURE_ORDER + TARGET_COLUMNS if c not in df.columns]
+    inattendues = [c for c in X.columns if c not in FEATURE_ORDER]
+    if manquantes or inattendues or list(X.columns) != FEATURE_ORDER:
+        raise ValueError(f"Jeu de features obsolète ({len(manquantes)} colonne(s) manquante(s) : {manquantes[:5]}, "
+                         f"{len(inattendues)} inattendue(s) : {inattendues[:5]}). "
+                         "Régénérez-le avec le script 02 (python scripts/02_feature_engineering.py).")
+    return X, df[TARGET_COLUMNS]
+
+
+def composantes_calendrier(dates):
+    """Retourne (Mois, Jour_de_Annee, Jour_de_Semaine) pour un tableau de dates, sans pandas."""
+    jours = np.asarray(dates, dtype='datetime64[D]')
+    mois = jours.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    jour_annee = (jours - jours.astype('datetime64[Y]')).astype(np.int64) + 1
+    # Le 01/01/1970 est un jeudi (3 avec lundi = 0, comme datetime.weekday)
+    jour_semaine = (jours.astype(np.int64) + 3) % 7
+    return mois, jour_annee, jour_semaine
+
+
+def _cumuls(valeurs):
+    """
+    Sommes cumulées le long de l'axe du temps (avant-dernier axe), précédées d'un zéro :
+    tableau (3, ..., T + 1, 4) des écarts au centre de chaque colonne, de leurs carrés et des effectifs.
+    Le centrage garde la variance précise sur 30 ans de sommes. Il est calculé série par série
+    (centre (..., 4)) : les features d'une série ne dépendent pas des autres séries du lot.
+    """
+    presents = ~np.isnan(valeurs)
+    centre = np.where(presents, valeurs, 0).sum(axis=-2, dtype=np.float64) / np.maximum(presents.sum(axis=-2), 1)
+    ecarts = np.where(presents, valeurs - centre[..., None, :], 0.0)
+    pile = np.stack([ecarts, ecarts * ecarts, presents.astype(np.float64)])
+    forme = list(pile.shape)
+    forme[-2] = 1
+    return np.cumsum(np.concatenate([np.zeros(forme), pile], axis=-2), axis=-2), centre
+
+
+class ConstructeurFeatures:
+    """
+    Remplit une matrice float32 préallouée dans l'ordre `feature_order`.
+
+    Les lags sont positionnels : le lag k d'une ligne est l'observation située k lignes
+    plus haut, comme `DataFrame.shift(k)` dans la version pandas d'origine ; une statistique
+    glissante sur n jours porte sur les n lignes qui précèdent, comme `rolling(n).<stat>().shift(1)`.
+    """
+
+    def __init__(self, feature_order=FEATURE_ORDER):
+        self.feature_order = list(feature_order)
+        colonnes_cal, composantes, colonnes_cyc, colonnes_lag, variables, lags = [], [], [], [], [], []
+        colonnes_gl, variables_gl, fenetres_gl, statistiques_gl = [], [], [], []
+        for j, nom in enumerate(self.feature_order):
+            if nom in FEATURES_CALENDRIER:
+                colonnes_cal.append(j)
+                composantes.append(FEATURES_CALENDRIER.index(nom))
+                continue
+            if nom in FEATURES_CYCLIQUES:
+                colonnes_cyc.append(j)
+                continue
+            prefixe, _, reste = nom.partition('_')
+            type_, _, n = reste.partition('_')
+            if prefixe not in VARIABLES or not n.isdigit() or int(n) < 1 or type_ not in ['Lag'] + STATISTIQUES_GLISSANTES:
+                raise ValueError(f"Feature inconnue pour le constructeur de features : {nom}")
+            if type_ == 'Lag':
+                colonnes_lag.append(j)
+                variables.append(VARIABLES[prefixe])
+                lags.append(int(n))
+            else:
+                colonnes_gl.append(j)
+                variables_gl.append(VARIABLES[prefixe])
+                fenetres_gl.append(int(n))
+                statistiques_gl.append(STATISTIQUES_GLISSANTES.index(type_))
+
+        self._colonnes_cal = np.array(colonnes_cal, dtype=np.intp)
+        self._composantes = composantes
+        self._colonnes_cyc = [(j, FEATURES_CYCLIQUES.index(self.feature_order[j])) for j in colonnes_cyc]
+        self._colonnes_lag = np.array(colonnes_lag, dtype=np.intp)
+        self._variables = np.array(variables, dtype=np.intp)
+        self._lags = np.array(lags, dtype=np.intp)
+        self._colonnes_gl = np.array(colonnes_gl, dtype=np.intp)
+        self._variables_gl = np.array(variables_gl, dtype=np.intp)
+        self._fenetres_gl = np.array(fenetres_gl, dtype=np.intp)
+        self._statistiques_gl = np.array(statistiques_gl, dtype=np.intp)
+        # Plus long lag, et nombre d'observations passées nécessaires pour calculer une ligne
+        self.lag_max = int(self._lags.max()) if len(lags) else 0
+        self.taille_fenetre = max(self.lag_max, int(self._fenetres_gl.max()) if len(fenetres_gl) else 0)
+
+    def _remplir_calendrier(self, X, dates):
+        calendrier = composantes_calendrier(dates)
+        for j, composante in zip(self._colonnes_cal, self._composantes):
+            X[:, j] = calendrier[composante]
+        if self._colonnes_cyc:
+            angle = 2 * np.pi * calendrier[1] / DUREE_ANNEE
+            for j, k in self._colonnes_cyc:
+                X[:, j] = np.sin(angle) if k == 0 else np.cos(angle)
+
+    def _statistiques(self, cumuls, centre, fin, debut):
+        """
+        Statistiques glissantes entre les positions `debut` et `fin` (exclue) des sommes cumulées,
+        pour chaque feature glissante : Moy, Std (ddof=1) ou Somme (moyenne x n). NaN sans observation.
+        """
+        s, c, k = cumuls[..., fin, self._variables_gl] - cumuls[..., debut, self._variables_gl]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moyennes_centrees = s / k
+            moyennes = centre[..., self._variables_gl] + moyennes_centrees
+            ecarts_types = np.sqrt(np.maximum(c - s * moyennes_centrees, 0.0) / (k - 1))
+        return np.choose(self._statistiques_gl, [moyennes, ecarts_types, moyennes * self._fenetres_gl])
+
+    def construire_historique(self, valeurs, dates):
+        """
+        Mode entraînement : une ligne de features par jour de l'historique.
+
+        `valeurs` est un tableau (T, 4) dans l'ordre COLONNES_OBSERVATIONS et `dates` ses T dates.
+        Les lags qui remontent avant le début de la série valent NaN.
+        """
+        valeurs = np.asarray(valeurs, dtype=np.float32)
+        X = np.empty((len(valeurs), len(self.feature_order)), dtype=np.float32)
+        self._remplir_calendrier(X, dates)
+
+        positions = np.arange(len(valeurs))[:, None] - self._lags[None, :]
+        lags = valeurs[np.clip(positions, 0, None), self._variables[None, :]]
+        lags[positions < 0] = np.nan
+        X[:, self._colonnes_lag] = lags
+
+        if len(self._colonnes_gl):
+            cumuls, centre = _cumuls(valeurs)
+            fin = np.arange(len(valeurs))[:, None]
+            debut = fin - self._fenetres_gl[None, :]
+            glissantes = self._statistiques(cumuls, centre, fin, np.clip(debut, 0, None))
+            glissantes[debut < 0] = np.nan
+            X[:, self._colonnes_gl] = glissantes
+        return X
+
+    def construire_lot(self, series, position, dates):
+        """
+        Mode inférence par lot : une ligne par série, pour la ligne virtuelle `position`.
+
+        `series` est un tableau (N, L, 4) ; le lag k de la ligne est `series[:, position - k]` et
+        une statistique sur n jours porte sur `series[:, position - n:position]` (position >= n).
+        """
+        X = np.empty((series.shape[0], len(self.feature_order)), dtype=np.float32)
+        self._remplir_calendrier(X, dates)
+        X[:, self._colonnes_lag] = series[:, position - self._lags, self._variables]
+        if len(self._colonnes_gl):
+            # Sommes cumulées sur les seules `taille_fenetre` lignes qui précèdent la position
+            cumuls, centre = _cumuls(series[:, position - self.taille_fenetre:position])
+            X[:, self._colonnes_gl] = self._statistiques(cumuls, centre, self.taille_fenetre,
+                                                         self.taille_fenetre - self._fenetres_gl)
+        return X
+
+    def construire_ligne(self, fenetre, date_cible):
+        """
+        Mode inférence sur une ligne : features de `date_cible` à partir des dernières observations.
+
+        `fenetre` est un tableau (L, 4) dont la dernière ligne est la veille de `date_cible` ;
+        seules les `taille_fenetre` dernières lignes sont lues. Retourne une matrice (1, n_features).
+        """
+        fenetre = np.asarray(fenetre, dtype=np.float32)
+        return self.construire_lot(fenetre[None], len(fenetre), np.array([date_cible], dtype='datetime64[D]'))
@@ -0,0 +1,94 @@
+"""
+Hindcast : rejeu de la logique de prévision de l'application sur une période historique.
+
+Chaque jour de la période sert de date de référence J, avec le même moteur que l'application
+(J+1 direct, horizons suivants récursifs ou directs selon le mode, même backend) et les
+observations brutes J-7..J-1 telles que le stock local les fournirait : pas d'imputation des
+lacunes, une date sans 7 jours d'observations n'est pas prévue. Toutes les dates passent en un
+seul lot dans le moteur (un appel `predict` par horizon pour toute la période).
+
+Les erreurs sont évaluées contre les observations des jours prévus, puis agrégées par horizon,
+par mois et par saison (calendrier des saisons de Brazzaville).
+"""
+import base64
+import os
+
+import numpy as np
+import pandas as pd
+
+from meteo.features import COLONNES_OBSERVATIONS, TARGET_COLUMNS
+from meteo.intervalles import observations_prevues
+from meteo.lacunes import retirer_imputation_moyenne
+
+# --- CONFIGURATION ---
+SAISONS = {  # mois -> saison (climat équatorial du Congo : deux saisons des pluies, deux saisons sèches)
+    1: 'petite saison sèche', 2: 'petite saison sèche',
+    3: 'grande saison des pluies', 4: 'grande saison des pluies', 5: 'grande saison des pluies',
+    6: 'grande saison sèche', 7: 'grande saison sèche', 8: 'grande saison sèche', 9: 'grande saison sèche',
+    10: 'petite saison des pluies', 11: 'petite saison des pluies', 12: 'petite saison des pluies',
+}
+ORDRE_SAISONS = ['petite saison sèche', 'grande saison des pluies', 'grande saison sèche', 'petite saison des pluies']
+# --- FIN CONFIGURATION ---
+
+
+def observations_brutes(df_brut):
+    """Observations journalières telles que l'application les lit (valeurs de l'ancienne imputation remises à NaN)."""
+    return retirer_imputation_moyenne(df_brut)[COLONNES_OBSERVATIONS]
+
+
+def hindcast(moteur, df_observations, debut, fin):
+    """
+    Prévisions du moteur pour toutes les dates de référence de [debut, fin], en un lot,
+    et leurs erreurs. Retourne (prévision du moteur, erreurs au format long : une ligne par
+    date de référence, horizon et cible observée, avec mois et saison du jour prévu).
+    """
+    dates_ref = pd.date_range(debut, fin)
+    prevision = moteur.prevoir(df_observations, dates_ref)
+    return prevision, erreurs(prevision, df_observations)
+
+
+def erreurs(prevision, df_observations):
+    """Erreurs prévu - observé au format long ; les jours non prévus ou non observés sont écartés."""
+    verites = observations_prevues(prevision, df_observations)
+    points = prevision[['Tmax_Prevue', 'Tmin_Prevue']].to_numpy(dtype=np.float64)
+    dates_prevues = pd.DatetimeIndex(prevision['date_prevue'])
+    n = len(prevision)
+    df = pd.DataFrame({
+        'date_reference': np.tile(prevision['date_reference'].to_numpy(), len(TARGET_COLUMNS)),
+        'date_prevue': np.tile(dates_prevues.to_numpy(), len(TARGET_COLUMNS)),
+        'horizon': np.tile(prevision['horizon'].to_numpy(), len(TARGET_COLUMNS)),
+        'cible': np.repeat(TARGET_COLUMNS, n),
+        'prevue': points.T.ravel(),
+        'observee': verites.T.ravel(),
+    })
+    df['mois'] = np.tile(dates_prevues.month, len(TARGET_COLUMNS))
+    df['saison'] = df['mois'].map(SAISONS)
+    df['erreur'] = df['prevue'] - df['observee']
+    return df.dropna(subset=['erreur']).reset_index(drop=True)
+
+
+def metriques(erreurs, par=()):
+    """MAE, biais (prévu - observé), RMSE et nombre de jours par cible, horizon et regroupements `par`."""
+    cles = ['cible', 'horizon', *par]
+    groupes = erreurs.assign(absolue=erreurs['erreur'].abs(), carree=erreurs['erreur'] ** 2).groupby(cles, sort=True)
+    tableau = groupes.agg(mae=('absolue', 'mean'), biais=('erreur', 'mean'), rmse=('carree', 'mean'), n=('erreur', 'size'))
+    tableau['rmse'] = np.sqrt(tableau['rmse'])
+    if 'saison' in par:
+        tableau = tableau.reindex(sorted(tableau.index, key=lambda cle: (cle[0], cle[1], ORDRE_SAISONS.index(cle[2]))))
+    return tableau.round({'mae': 3, 'biais': 3, 'rmse': 3})
+
+
+def rapport_html(titre, tableaux, images, description=''):
+    """Rapport HTML autonome : tableaux {titre: DataFrame} et images PNG intégrées (base64)."""
+    sections = [f'<h1>{titre}</h1>', f'<p>{description}</p>' if description else '']
+    for nom, tableau in tableaux.items():
+        sections.append(f'<h2>{nom}</h2>' + tableau.to_html(border=0, classes='metriques'))
+    for chemin in images:
+        with open(chemin, 'rb') as f:
+            donnees = base64.b64encode(f.read()).decode('ascii')
+        sections.append(f'<h2>{os.path.splitext(os.path.basename(chemin))[0]}</h2>'
+                        f'<img src="data:image/png;base64,{donnees}" style="max-width:100%">')
+    style = ('body{font-family:sans-serif;margin:2em}table.metriques{border-collapse:collapse}'
+             'table.metriques td,table.metriques th{padding:2px 10px;text-align:right}')
+    return (f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{titre}</title>'
+            f'<style>{style}</style></head><body>{"".join(sections)}</body></html>')
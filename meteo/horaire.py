@@ -0,0 +1,203 @@
+"""
+Ingestion des observations horaires et agrégation journalière, année par année.
+
+Les agrégats journaliers Meteostat (`Daily`) de la station 64450 sont très lacunaires. Ce module
+les reconstruit à partir des relevés horaires (Meteostat `Hourly`, ou fichiers horaires locaux) :
+Tmax/Tmin, cumul de précipitations, vent, humidité et pression moyens, et nombre d'heures
+observées par jour (complétude).
+
+Chaque année est lue, agrégée (groupby vectorisé sur des jours en int32 et des valeurs en float32)
+puis libérée : la mémoire est celle de quelques années d'observations horaires, quelle que soit la
+période. Les années sont traitées en parallèle et leur agrégat mis en cache
+(`CACHE_DIR/<station>/<année>.v<version>.bundle`) : une nouvelle exécution ne relit que les années
+absentes du cache et l'année en cours. Une année révolue n'est mise en cache que si au moins
+COUVERTURE_MIN_CACHE de ses jours ont des relevés : une année tronquée par la source (délai dépassé,
+panne partielle) est relue à l'exécution suivante au lieu d'être figée avec ses jours manquants.
+
+Les jours sont des jours civils locaux (`FUSEAU`). Fichiers horaires locaux :
+`<dossier>/<année>.csv[.gz]`, colonne `time` en heure locale puis les colonnes Meteostat
+(`temp`, `rhum`, `prcp`, `wspd`, `pres`). `python -m meteo.horaire decouper 64450.csv.gz
+data/horaire/64450` découpe un fichier « bulk » Meteostat (heures UTC) en fichiers annuels.
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from meteo.donnees import MANIFESTE, ecrire_bundle, lire_bundle
+from meteo.features import COLONNES_OBSERVATIONS
+from meteo.instrumentation import chrono, compter
+
+# --- CONFIGURATION ---
+HORAIRE_DIR = 'data/horaire'  # fichiers horaires locaux : HORAIRE_DIR/<station>/<année>.csv[.gz]
+CACHE_DIR = 'data/cache_horaire'
+FUSEAU = 'Africa/Brazzaville'  # UTC+1, comme toutes les stations du registre
+WORKERS = 4  # années traitées simultanément
+VERSION_AGREGATION = 1  # à incrémenter quand l'agrégation change : le cache existant est ignoré
+COUVERTURE_MIN_CACHE = 0.8  # part des jours de l'année avec relevés en dessous de laquelle l'année n'est pas mise en cache
+MIN_HEURES_TEMPERATURE = 4  # en dessous, Tmax/Tmin du jour restent manquantes (relevés synoptiques : 8 par jour)
+COLONNES_HORAIRES = ['temp', 'rhum', 'prcp', 'wspd', 'pres']
+# Fichiers « bulk » Meteostat : sans en-tête, date et heure UTC séparées
+COLONNES_BULK = ['date', 'hour', 'temp', 'dwpt', 'rhum', 'prcp', 'snow', 'wdir', 'wspd', 'wpgt', 'pres', 'tsun', 'coco']
+COLONNES_SUPPLEMENTAIRES = ['humidite_moyenne_jour', 'pression_moyenne_jour', 'heures_observees', 'heures_temperature']
+TAILLE_BLOC_BULK = 200_000  # lignes lues à la fois par `decouper`
+# --- FIN CONFIGURATION ---
+
+
+# --- SOURCES HORAIRES ---
+
+class SourceHoraireMeteostat:
+    """Relevés horaires Meteostat (`Hourly`) d'une année, en heure locale."""
+
+    def __init__(self, fuseau=FUSEAU):
+        self.fuseau = fuseau
+
+    def annee(self, station, annee):
+        # Import différé : meteostat n'est chargé que lorsqu'une année doit réellement être récupérée
+        from meteostat import Hourly
+
+        data = Hourly(station, datetime(annee, 1, 1), datetime(annee, 12, 31, 23, 59), timezone=self.fuseau).fetch()
+        if data.empty:
+            return pd.DataFrame(columns=COLONNES_HORAIRES, dtype=np.float32)
+        data.index = data.index.tz_localize(None)
+        return data[COLONNES_HORAIRES].astype(np.float32)
+
+
+class SourceHoraireFichiers:
+    """Relevés horaires lus dans `<dossier>/<année>.csv` ou `.csv.gz` (colonne `time` en heure locale)."""
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+
+    def annee(self, station, annee):
+        for extension in ('.csv', '.csv.gz'):
+            chemin = os.path.join(self.dossier, f'{annee}{extension}')
+            if os.path.exists(chemin):
+                df = pd.read_csv(chemin, usecols=lambda c: c in ['time'] + COLONNES_HORAIRES,
+                                 dtype={c: np.float32 for c in COLONNES_HORAIRES})
+                return df.set_index(pd.DatetimeIndex(df.pop('time'))).reindex(columns=COLONNES_HORAIRES)
+        return pd.DataFrame(columns=COLONNES_HORAIRES, dtype=np.float32)
+
+
+# --- AGRÉGATION JOURNALIÈRE ---
+
+def agreger_journalier(df_horaire, min_heures=MIN_HEURES_TEMPERATURE):
+    """
+    Agrège des relevés horaires (index en heure locale, colonnes COLONNES_HORAIRES) par jour civil.
+    Retourne un DataFrame indexé par jour : COLONNES_OBSERVATIONS puis COLONNES_SUPPLEMENTAIRES.
+    """
+    valeurs = df_horaire.reindex(columns=COLONNES_HORAIRES).astype(np.float32)
+    # Clé de regroupement compacte : numéro de jour (int32) plutôt que des Timestamp
+    jours = df_horaire.index.values.astype('datetime64[D]').astype(np.int32)
+    groupes = valeurs.groupby(jours, sort=True)
+    comptes = groupes.count()
+    journalier = pd.DataFrame({
+        'temperature_max_jour': groupes['temp'].max(),
+        'temperature_min_jour': groupes['temp'].min(),
+        'precipitation_somme_jour': groupes['prcp'].sum(min_count=1),
+        'vitesse_vent_moyenne_jour': groupes['wspd'].mean(),
+        'humidite_moyenne_jour': groupes['rhum'].mean(),
+        'pression_moyenne_jour': groupes['pres'].mean(),
+        'heures_observees': groupes.size().astype(np.int16),
+        'heures_temperature': comptes['temp'].astype(np.int16),
+    })
+    # Un extremum sur quelques relevés sous-estime l'amplitude : jour laissé manquant (comblé par le script 02)
+    incomplets = journalier['heures_temperature'] < min_heures
+    journalier.loc[incomplets, ['temperature_max_jour', 'temperature_min_jour']] = np.nan
+    journalier.index = pd.DatetimeIndex(journalier.index.to_numpy().astype('datetime64[D]'), name='time')
+    return journalier
+
+
+def chemin_cache(station, annee, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, station, f'{annee}.v{VERSION_AGREGATION}.bundle')
+
+
+def couverture_annee(agregats, annee):
+    """Part des jours de l'année ayant au moins un relevé horaire."""
+    jours = (date(annee + 1, 1, 1) - date(annee, 1, 1)).days
+    return int((agregats['heures_observees'] > 0).sum()) / jours if len(agregats) else 0.0
+
+
+def journalier_annee(station, annee, source, cache_dir=CACHE_DIR):
+    """
+    Agrégat journalier d'une année : lu dans le cache, ou calculé puis mis en cache si l'année est
+    révolue et suffisamment couverte (COUVERTURE_MIN_CACHE).
+    """
+    chemin = chemin_cache(station, annee, cache_dir)
+    if os.path.exists(os.path.join(chemin, MANIFESTE)):
+        compter('horaire.annees_cache')
+        return lire_bundle(chemin)
+    with chrono('horaire.lecture'):
+        df_horaire = source.annee(station, annee)
+    with chrono('horaire.agregation'):
+        agregats = agreger_journalier(df_horaire)
+    compter('horaire.annees_calculees')
+    compter('horaire.heures_lues', len(df_horaire))
+    # Année en cours, ou année tronquée (délai dépassé, panne partielle de la source) : recalculée à la
+    # prochaine exécution plutôt que figée dans le cache avec ses jours manquants
+    if annee < date.today().year and couverture_annee(agregats, annee) >= COUVERTURE_MIN_CACHE:
+        ecrire_bundle(agregats, chemin)
+    elif annee < date.today().year:
+        compter('horaire.annees_incompletes')
+    return agregats
+
+
+def journalier(station, source, debut, fin, cache_dir=CACHE_DIR, workers=WORKERS):
+    """
+    Agrégats journaliers de `debut` à `fin` inclus, années traitées en parallèle.
+    Retourne (DataFrame, {'cache': années lues dans le cache, 'calculees': années agrégées,
+    'incompletes': années révolues agrégées mais trop peu couvertes pour le cache}).
+    """
+    debut, fin = pd.Timestamp(debut), pd.Timestamp(fin)
+    annees = list(range(debut.year, fin.year + 1))
+    en_cache = sum(os.path.exists(os.path.join(chemin_cache(station, annee, cache_dir), MANIFESTE)) for annee in annees)
+    compteurs = {'cache': en_cache, 'calculees': len(annees) - en_cache}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executeur:
+        parties = [partie for partie in executeur.map(lambda annee: journalier_annee(station, annee, source, cache_dir), annees)
+                   if not partie.empty]
+    compteurs['incompletes'] = sum(annee < date.today().year and not os.path.exists(os.path.join(chemin_cache(station, annee, cache_dir), MANIFESTE))
+                                   for annee in annees)
+    if not parties:
+        return pd.DataFrame(columns=COLONNES_OBSERVATIONS + COLONNES_SUPPLEMENTAIRES, index=pd.DatetimeIndex([], name='time')), compteurs
+    df = pd.concat(parties)
+    return df[(df.index >= debut) & (df.index <= fin)], compteurs
+
+
+# --- FICHIERS BULK METEOSTAT ---
+
+def decouper(chemin_bulk, dossier, fuseau=FUSEAU, taille_bloc=TAILLE_BLOC_BULK):
+    """
+    Découpe un fichier horaire « bulk » Meteostat (heures UTC) en fichiers annuels en heure locale,
+    lus par `SourceHoraireFichiers`. Lu par blocs : la mémoire ne dépend pas de la taille du fichier.
+    Retourne le nombre de lignes écrites par année.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    lignes = {}
+    for bloc in pd.read_csv(chemin_bulk, header=None, names=COLONNES_BULK, chunksize=taille_bloc,
+                            usecols=['date', 'hour'] + COLONNES_HORAIRES, dtype={c: np.float32 for c in COLONNES_HORAIRES}):
+        heures = (pd.to_datetime(bloc['date']) + pd.to_timedelta(bloc['hour'], unit='h')).dt.tz_localize('UTC')
+        bloc = bloc[COLONNES_HORAIRES].set_index(pd.DatetimeIndex(heures.dt.tz_convert(fuseau).dt.tz_localize(None), name='time'))
+        for annee, partie in bloc.groupby(bloc.index.year):
+            chemin = os.path.join(dossier, f'{annee}.csv')
+            partie.to_csv(chemin, mode='a' if annee in lignes else 'w', header=annee not in lignes, float_format='%.1f')
+            lignes[annee] = lignes.get(annee, 0) + len(partie)
+    return lignes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fichiers horaires locaux pour l'ingestion horaire du script 01.")
+    parser.add_argument('commande', choices=['decouper'])
+    parser.add_argument('bulk', help="Fichier horaire « bulk » Meteostat (<station>.csv.gz, heures UTC).")
+    parser.add_argument('dossier', help=f"Dossier des fichiers annuels (ex. {HORAIRE_DIR}/64450).")
+    parser.add_argument('--fuseau', default=FUSEAU)
+    args = parser.parse_args()
+    lignes = decouper(args.bulk, args.dossier, args.fuseau)
+    print(f"{sum(lignes.values()):,} relevés horaires écrits dans {args.dossier}/ ({min(lignes)}-{max(lignes)})" if lignes
+          else "Aucun relevé dans le fichier.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Instrumentation légère des étapes coûteuses : chronomètres (gestionnaires de contexte) et compteurs.
+
+Désactivée par défaut : `chrono()` renvoie alors un contexte vide partagé et `compter()` ne fait
+rien (moins d'une microseconde par appel). Activée par METEO_INSTRUMENTATION=1 (ou `activer()`),
+elle agrège par étape le nombre d'appels, la durée totale, la dernière et la maximale.
+Les mesures s'exportent au format texte Prometheus ou en lignes JSON : METEO_INSTRUMENTATION_EXPORT
+désigne un fichier .prom (réécrit, pour le collecteur textfile de node_exporter) ou un journal
+de lignes JSON (complété).
+
+Les scripts marquent leurs étapes successives avec `SuiviEtapes(script).etape(nom)` ; l'application
+collecte les durées d'une exécution (un rerun Streamlit) avec `nouvelle_execution()`.
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# --- CONFIGURATION ---
+ACTIVE = os.environ.get('METEO_INSTRUMENTATION', '') not in ('', '0')
+EXPORT_PATH = os.environ.get('METEO_INSTRUMENTATION_EXPORT')  # .prom : texte Prometheus ; sinon lignes JSON
+PREFIXE_PROMETHEUS = 'meteo'
+# --- FIN CONFIGURATION ---
+
+_CONTEXTE_VIDE = contextlib.nullcontext()
+
+
+class Mesures:
+    """Durées par étape et compteurs d'événements, partagés entre threads."""
+
+    def __init__(self, actif=ACTIVE):
+        self.actif = actif
+        self.durees = {}  # étape -> [appels, total, dernière, max] (secondes)
+        self.compteurs = {}
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+
+    def enregistrer(self, etape, duree):
+        with self._verrou:
+            stats = self.durees.setdefault(etape, [0, 0.0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duree
+            stats[2] = duree
+            stats[3] = max(stats[3], duree)
+        execution = getattr(self._local, 'execution', None)
+        if execution is not None:
+            execution[etape] = execution.get(etape, 0.0) + duree
+
+    def compter(self, nom, n=1):
+        with self._verrou:
+            self.compteurs[nom] = self.compteurs.get(nom, 0) + n
+
+    def reinitialiser(self):
+        with self._verrou:
+            self.durees.clear()
+            self.compteurs.clear()
+
+    def instantane(self):
+        """{'durees': {étape: {appels, total_s, derniere_s, max_s}}, 'compteurs': {nom: n}}."""
+        with self._verrou:
+            durees = {etape: {'appels': appels, 'total_s': round(total, 6), 'derniere_s': round(derniere, 6),
+                              'max_s': round(maximum, 6)}
+                      for etape, (appels, total, derniere, maximum) in sorted(self.durees.items())}
+            return {'durees': durees, 'compteurs': dict(sorted(self.compteurs.items()))}
+
+    def prometheus(self):
+        """Mesures au format d'exposition texte de Prometheus."""
+        p = PREFIXE_PROMETHEUS
+        instantane = self.instantane()
+        lignes = [f'# HELP {p}_etape_duree_secondes Durée des étapes instrumentées.',
+                  f'# TYPE {p}_etape_duree_secondes summary']
+        for etape, stats in instantane['durees'].items():
+            lignes.append(f'{p}_etape_duree_secondes_sum{{etape="{etape}"}} {stats["total_s"]}')
+            lignes.append(f'{p}_etape_duree_secondes_count{{etape="{etape}"}} {stats["appels"]}')
+        for champ, description in (('derniere', 'Durée du dernier passage'), ('max', 'Durée maximale')):
+            lignes += [f'# HELP {p}_etape_{champ}_duree_secondes {description} par étape.',
+                       f'# TYPE {p}_etape_{champ}_duree_secondes gauge']
+            lignes += [f'{p}_etape_{champ}_duree_secondes{{etape="{etape}"}} {stats[f"{champ}_s"]}'
+                       for etape, stats in instantane['durees'].items()]
+        lignes += [f'# HELP {p}_evenements_total Compteurs d\'événements.', f'# TYPE {p}_evenements_total counter']
+        lignes += [f'{p}_evenements_total{{nom="{nom}"}} {n}' for nom, n in instantane['compteurs'].items()]
+        return '\n'.join(lignes) + '\n'
+
+    def json(self, **contexte):
+        """Une ligne JSON horodatée (contexte libre : script, station, ...)."""
+        return json.dumps({'horodatage': datetime.now(timezone.utc).isoformat(timespec='seconds'), **contexte,
+                           **self.instantane()}, ensure_ascii=False)
+
+    def exporter(self, chemin=EXPORT_PATH, **contexte):
+        """Écrit les mesures dans `chemin` (.prom : texte Prometheus réécrit ; sinon ligne JSON ajoutée)."""
+        if not chemin:
+            return
+        if chemin.endswith('.prom'):
+            with open(chemin, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+        else:
+            with open(chemin, 'a', encoding='utf-8') as f:
+                f.write(self.json(**contexte) + '\n')
+
+
+class _Chrono:
+    __slots__ = ('mesures', 'etape', 'debut')
+
+    def __init__(self, mesures, etape):
+        self.mesures = mesures
+        self.etape = etape
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.mesures.enregistrer(self.etape, time.perf_counter() - self.debut)
+        return False
+
+
+MESURES = Mesures()
+
+
+def activer(actif=True):
+    MESURES.actif = actif
+
+
+def chrono(etape):
+    """Chronomètre une étape : `with chrono('moteur.predict'): ...` (contexte vide si désactivé)."""
+    return _Chrono(MESURES, etape) if MESURES.actif else _CONTEXTE_VIDE
+
+
+def compter(nom, n=1):
+    if MESURES.actif:
+        MESURES.compter(nom, n)
+
+
+def nouvelle_execution():
+    """
+    Démarre la collecte des étapes exécutées par le thread courant (un rerun Streamlit, une requête) :
+    le dictionnaire retourné {étape: durée (s)} se remplit jusqu'au prochain appel.
+    """
+    MESURES._local.execution = {}
+    return MESURES._local.execution
+
+
+class SuiviEtapes:
+    """
+    Étapes successives d'un script : chaque appel à `etape` termine la précédente. À la sortie du
+    processus (y compris par sys.exit), la dernière étape est close, un résumé est affiché sur
+    stderr et les mesures sont exportées. Sans effet si l'instrumentation est désactivée.
+    """
+
+    def __init__(self, script, mesures=MESURES):
+        self.script = script
+        self.mesures = mesures
+        self._en_cours = None
+        self._debut = 0.0
+        self._etapes = []
+        if mesures.actif:
+            atexit.register(self.terminer)
+
+    def etape(self, nom):
+        if not self.mesures.actif:
+            return
+        maintenant = time.perf_counter()
+        self._clore(maintenant)
+        self._en_cours, self._debut = f'{self.script}.{nom}', maintenant
+
+    def _clore(self, maintenant):
+        if self._en_cours is not None:
+            self.mesures.enregistrer(self._en_cours, maintenant - self._debut)
+            self._etapes.append((self._en_cours, maintenant - self._debut))
+            self._en_cours = None
+
+    def terminer(self):
+        if not self.mesures.actif:
+            return
+        self._clore(time.perf_counter())
+        if self._etapes:
+            print(f"[instrumentation] {self.script} : "
+                  + ' | '.join(f"{etape.split('.', 1)[1]} {duree:.3f} s" for etape, duree in self._etapes), file=sys.stderr)
+            self._etapes = []
+        self.mesures.exporter(script=self.script)
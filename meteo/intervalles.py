@@ -0,0 +1,126 @@
+"""
+Intervalles de prévision : modèles quantiles XGBoost (q0.1 / q0.9) entraînés à côté des
+modèles ponctuels, puis calibrés par horizon sur la période de validation (régression
+quantile conformalisée : la marge ajoutée de part et d'autre garantit la couverture
+nominale observée en validation, y compris pour J+2 où les lags sont des prévisions).
+
+Les boosters quantiles sont exportés dans le même ensemble que les boosters ponctuels :
+un seul appel `predict` par horizon renvoie le point et les bornes.
+
+Les prévisions du moteur sont évaluées par horizon contre les observations (couverture des
+intervalles, MAE par horizon pour comparer les modes récursif et direct).
+"""
+import numpy as np
+
+from meteo.features import TARGET_COLUMNS
+
+# --- CONFIGURATION ---
+QUANTILES = [0.1, 0.9]  # intervalle nominal à 80 %
+NOMS_COURTS = {'Tmax_Demain': 'Tmax', 'Tmin_Demain': 'Tmin'}  # préfixes des colonnes de prévision
+# --- FIN CONFIGURATION ---
+
+
+def colonne_quantile(cible, quantile):
+    """Nom de sortie du modèle quantile d'une cible (ex. Tmax_Demain_Q10)."""
+    return f'{cible}_Q{round(quantile * 100)}'
+
+
+def colonne_intervalle(cible, quantile):
+    """Nom de la borne dans le DataFrame du moteur de prévision (ex. Tmax_Q10)."""
+    return f'{NOMS_COURTS[cible]}_Q{round(quantile * 100)}'
+
+
+def sorties_quantiles(cibles=TARGET_COLUMNS, quantiles=QUANTILES):
+    """Sorties quantiles entraînées par le script 03, dans l'ordre de l'ensemble exporté."""
+    return [colonne_quantile(cible, q) for q in quantiles for cible in cibles]
+
+
+def decomposer_sortie(sortie):
+    """Retourne (cible observée, quantile ou None pour une sortie ponctuelle)."""
+    for cible in TARGET_COLUMNS:
+        for q in QUANTILES:
+            if sortie == colonne_quantile(cible, q):
+                return cible, q
+    return sortie, None
+
+
+def parametres_sortie(sortie):
+    """Paramètres XGBoost propres à une sortie : objectif quantile pour les bornes, rien pour le point."""
+    _, quantile = decomposer_sortie(sortie)
+    if quantile is None:
+        return {}
+    return {'objective': 'reg:quantileerror', 'quantile_alpha': quantile, 'eval_metric': 'quantile'}
+
+
+def observations_prevues(prevision, df_observations, masque_imputation=None):
+    """Tmax/Tmin observées aux dates prévues (N*H, 2), NaN si absentes ou imputées."""
+    observations = df_observations[['temperature_max_jour', 'temperature_min_jour']]
+    if masque_imputation is not None:
+        observations = observations.mask(masque_imputation[['temperature_max_jour', 'temperature_min_jour']])
+    return observations.reindex(prevision['date_prevue']).to_numpy(dtype=np.float64)
+
+
+def calibrer(moteur, df_observations, dates_ref, masque_imputation=None):
+    """
+    Marge conformale par horizon et par cible : quantile des scores max(bas - y, y - haut)
+    au niveau nominal, sur les prévisions des dates de référence (période de validation).
+    Retourne {horizon (str): {cible: marge}} ; une marge négative resserre l'intervalle.
+    Sans prévision validable pour un horizon et une cible (période de validation vide ou lacunaire),
+    la marge est nulle (bornes quantiles brutes) et un avertissement est affiché.
+    """
+    prevision = moteur.prevoir(df_observations, dates_ref)
+    verites = observations_prevues(prevision, df_observations, masque_imputation)
+    niveau = QUANTILES[-1] - QUANTILES[0]
+    corrections = {}
+    for h in range(1, moteur.horizon + 1):
+        lignes = (prevision['horizon'] == h).to_numpy()
+        corrections[str(h)] = {}
+        for j, cible in enumerate(TARGET_COLUMNS):
+            y = verites[lignes, j]
+            bas = prevision.loc[lignes, colonne_intervalle(cible, QUANTILES[0])].to_numpy()
+            haut = prevision.loc[lignes, colonne_intervalle(cible, QUANTILES[-1])].to_numpy()
+            valides = ~(np.isnan(y) | np.isnan(bas))
+            y, bas, haut = y[valides], bas[valides], haut[valides]
+            scores = np.maximum(bas - y, y - haut)
+            if len(scores) == 0:
+                print(f"Attention : aucune observation de validation pour {cible} J+{h}, intervalle non calibré (marge 0).")
+                corrections[str(h)][cible] = 0.0
+                continue
+            rang = min(1.0, np.ceil((len(scores) + 1) * niveau) / max(len(scores), 1))
+            corrections[str(h)][cible] = round(float(np.quantile(scores, rang)), 4)
+    return corrections
+
+
+def couverture(prevision, df_observations, masque_imputation=None):
+    """
+    Couverture empirique et largeur moyenne des intervalles, par horizon et par cible.
+    Retourne {horizon (str): {cible: {'couverture': ..., 'largeur': ..., 'n': ...}}}.
+    """
+    verites = observations_prevues(prevision, df_observations, masque_imputation)
+    resultats = {}
+    for h in sorted(prevision['horizon'].unique()):
+        lignes = (prevision['horizon'] == h).to_numpy()
+        resultats[str(h)] = {}
+        for j, cible in enumerate(TARGET_COLUMNS):
+            y = verites[lignes, j]
+            bas = prevision.loc[lignes, colonne_intervalle(cible, QUANTILES[0])].to_numpy()
+            haut = prevision.loc[lignes, colonne_intervalle(cible, QUANTILES[-1])].to_numpy()
+            valides = ~(np.isnan(y) | np.isnan(bas))
+            resultats[str(h)][cible] = {
+                'couverture': round(float(np.mean((y[valides] >= bas[valides]) & (y[valides] <= haut[valides]))), 4),
+                'largeur': round(float(np.mean(haut[valides] - bas[valides])), 3),
+                'n': int(valides.sum()),
+            }
+    return resultats
+
+
+def mae_par_horizon(prevision, df_observations, masque_imputation=None):
+    """MAE Tmax/Tmin par horizon sur les jours observés : {horizon (str): {cible: MAE}}."""
+    verites = observations_prevues(prevision, df_observations, masque_imputation)
+    points = prevision[['Tmax_Prevue', 'Tmin_Prevue']].to_numpy(dtype=np.float64)
+    resultats = {}
+    for h in sorted(prevision['horizon'].unique()):
+        lignes = (prevision['horizon'] == h).to_numpy()
+        erreurs = np.abs(points[lignes] - verites[lignes])
+        resultats[str(h)] = {cible: round(float(np.nanmean(erreurs[:, j])), 4) for j, cible in enumerate(TARGET_COLUMNS)}
+    return resultats
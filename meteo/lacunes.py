@@ -0,0 +1,127 @@
+"""
+Traitement des lacunes de la série journalière avant la construction des features.
+
+  1. les valeurs laissées par l'ancienne imputation `fillna(df.mean())` du script 01
+     sont remises à NaN ;
+  2. la série est réindexée sur un calendrier journalier complet : un lag de k lignes
+     est alors un lag de k jours ;
+  3. les trous courts sont interpolés linéairement (températures, vent), les autres
+     sont remplacés par la climatologie du jour de l'année (moyenne lissée sur ±7 jours) ;
+  4. un masque indique chaque valeur imputée.
+
+Tout est vectorisé en NumPy (pas de boucle sur les jours).
+"""
+import numpy as np
+import pandas as pd
+
+from meteo.features import COLONNES_OBSERVATIONS, composantes_calendrier
+
+# --- CONFIGURATION ---
+# Moyennes 1991-2020 écrites par l'ancienne imputation `fillna(df.mean())` du script 01 (data/meteo_brazzaville_daily.csv)
+VALEURS_IMPUTEES_ANCIEN_01 = {
+    'temperature_max_jour': 30.810053339517623,
+    'temperature_min_jour': 21.820179312190547,
+    'precipitation_somme_jour': 7.8620325203252,
+    'vitesse_vent_moyenne_jour': 7.206568500072182,
+}
+TOLERANCE_IMPUTATION = 1e-4  # écart toléré à ces moyennes (stockage float32)
+MAX_JOURS_INTERPOLATION = 3  # trous plus longs : climatologie du jour de l'année
+DEMI_FENETRE_CLIMATOLOGIE = 7
+# La pluie ne s'interpole pas : ses trous sont toujours comblés par la climatologie
+COLONNES_INTERPOLABLES = ['temperature_max_jour', 'temperature_min_jour', 'vitesse_vent_moyenne_jour']
+# --- FIN CONFIGURATION ---
+
+
+def retirer_imputation_moyenne(df, valeurs_imputees=VALEURS_IMPUTEES_ANCIEN_01):
+    """
+    Remet à NaN les valeurs laissées par l'ancienne imputation `fillna(df.mean())`.
+
+    Seules les moyennes connues du CSV de l'ancien script 01 sont retirées, et non toute valeur
+    hors de la grille du dixième qui se répète : les moyennes journalières de relevés horaires
+    (`01 --horaire`) sont le plus souvent hors grille et se répètent légitimement. Contrairement
+    à une comparaison avec la moyenne courante, ce critère reste valable quand de nouveaux jours
+    sont ajoutés à la série.
+    """
+    df = df.copy()
+    for colonne, imputee in valeurs_imputees.items():
+        if colonne in df:
+            valeurs = df[colonne].to_numpy(dtype=np.float64)
+            df.loc[np.abs(valeurs - imputee) <= TOLERANCE_IMPUTATION, colonne] = np.nan
+    return df
+
+
+def completer_calendrier(df):
+    """Réindexe sur tous les jours entre la première et la dernière date (NaN pour les jours absents)."""
+    calendrier = pd.date_range(df.index.min(), df.index.max(), freq='D', name=df.index.name or 'time')
+    return df.reindex(calendrier)
+
+
+def _longueur_des_trous(manquants):
+    """Pour chaque position manquante, la longueur du trou auquel elle appartient (0 ailleurs)."""
+    debut_trou = manquants & ~np.r_[False, manquants[:-1]]
+    identifiants = np.cumsum(debut_trou) * manquants
+    longueurs = np.bincount(identifiants)
+    longueurs[0] = 0
+    return longueurs[identifiants]
+
+
+def _somme_circulaire(tableau, demi_fenetre):
+    """Somme glissante centrée (±demi_fenetre lignes) sur un tableau circulaire, par sommes cumulées."""
+    n = len(tableau)
+    cumul = np.cumsum(np.concatenate([tableau, tableau, tableau]), axis=0)
+    cumul = np.vstack([np.zeros((1, tableau.shape[1])), cumul])
+    debut = n - demi_fenetre
+    largeur = 2 * demi_fenetre + 1
+    return cumul[debut + largeur:debut + largeur + n] - cumul[debut:debut + n]
+
+
+def climatologie(dates, valeurs, demi_fenetre=DEMI_FENETRE_CLIMATOLOGIE):
+    """Moyenne par jour de l'année (366, n_colonnes) lissée sur une fenêtre circulaire, en ignorant les NaN."""
+    _, jours, _ = composantes_calendrier(dates)
+    presents = ~np.isnan(valeurs)
+    sommes = np.zeros((366, valeurs.shape[1]))
+    effectifs = np.zeros((366, valeurs.shape[1]))
+    for j in range(valeurs.shape[1]):
+        sommes[:, j] = np.bincount(jours - 1, weights=np.where(presents[:, j], valeurs[:, j], 0), minlength=366)
+        effectifs[:, j] = np.bincount(jours - 1, weights=presents[:, j], minlength=366)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _somme_circulaire(sommes, demi_fenetre) / _somme_circulaire(effectifs, demi_fenetre)
+
+
+def imputer(df, max_jours_interpolation=MAX_JOURS_INTERPOLATION, table_climatologie=None):
+    """
+    Comble les NaN d'une série au calendrier complet.
+    `table_climatologie` (366, 4) remplace la climatologie calculée sur la série elle-même,
+    trop courte lors d'une mise à jour incrémentale.
+    Retourne (valeurs float32 (T, 4), masque booléen (T, 4) des valeurs imputées).
+    """
+    valeurs = np.array(df[COLONNES_OBSERVATIONS], dtype=np.float64)
+    masque = np.isnan(valeurs)
+    positions = np.arange(len(valeurs))
+    dates = df.index.values
+
+    for j, colonne in enumerate(COLONNES_OBSERVATIONS):
+        manquants = masque[:, j]
+        if colonne not in COLONNES_INTERPOLABLES or not manquants.any() or manquants.all():
+            continue
+        courts = manquants & (_longueur_des_trous(manquants) <= max_jours_interpolation)
+        valeurs[courts, j] = np.interp(positions[courts], positions[~manquants], valeurs[~manquants, j])
+
+    restants = np.isnan(valeurs)
+    if restants.any():
+        _, jours, _ = composantes_calendrier(dates)
+        normales = table_climatologie
+        if normales is None:
+            normales = climatologie(dates, np.where(masque, np.nan, valeurs))
+        valeurs[restants] = normales[jours - 1][restants]
+    return valeurs.astype(np.float32), masque
+
+
+def preparer_serie(df):
+    """
+    Enchaîne les trois étapes sur une série brute indexée par date.
+    Retourne (dates datetime64[D] du calendrier complet, valeurs float32 (T, 4), masque des imputations (T, 4)).
+    """
+    df = completer_calendrier(retirer_imputation_moyenne(df.sort_index()))
+    valeurs, masque = imputer(df)
+    return df.index.values.astype('datetime64[D]'), valeurs, masque
@@ -0,0 +1,224 @@
+"""
+Prévision par lots en flux (script 04 `--lot`), à mémoire bornée sur des entrées de plusieurs
+millions de lignes : ensembles de scénarios, nombreuses stations, rejeux.
+
+L'entrée (CSV, Parquet ou CSV sur l'entrée standard) est lue par tranches de `taille` lignes.
+Deux formats sont reconnus d'après les colonnes :
+
+  - observations : `time` et les 4 colonnes de COLONNES_OBSERVATIONS, avec en option `station`
+    (modèle à utiliser) et `serie` (série indépendante : membre d'un ensemble, scénario...).
+    Les lignes sont triées par série puis par date. Chaque jour observé J-1 donne une prévision
+    de référence J (`references='toutes'`), ou seulement le dernier jour de chaque série ('fin').
+    Les derniers jours de la série en cours sont reportés sur la tranche suivante ;
+  - dates de référence : `date_reference` et, en option, `station`. Les fenêtres sont lues dans
+    les observations de la station (`observations(station)`, chargées une fois).
+
+Pour chaque tranche, les fenêtres de toutes les séries d'une station sont extraites en une passe
+NumPy puis prévues par un seul appel `MoteurPrevision.prevoir_fenetres` (un `predict` par horizon
+en mode récursif, un seul en mode direct). Les prévisions sont écrites au fil des tranches.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from meteo.features import COLONNES_OBSERVATIONS
+from meteo.instrumentation import chrono, compter
+
+# --- CONFIGURATION ---
+TAILLE_LOT = 20_000  # lignes d'entrée lues, transformées et prévues à la fois (~350 Mo de mémoire maximale)
+COLONNE_DATE = 'time'
+COLONNE_REFERENCE = 'date_reference'
+COLONNE_STATION = 'station'
+COLONNE_SERIE = 'serie'
+REFERENCES = ('toutes', 'fin')
+ECART_SERIES = 10 ** 6  # jours séparant deux séries sur l'axe des dates (aucune fenêtre ne les chevauche)
+# --- FIN CONFIGURATION ---
+
+
+def lire_par_lots(chemin, taille=TAILLE_LOT):
+    """Tranches successives de `taille` lignes d'un CSV, d'un Parquet ou de l'entrée standard ('-')."""
+    identifiants = {COLONNE_STATION: str, COLONNE_SERIE: str}
+    if chemin == '-':
+        yield from pd.read_csv(sys.stdin, chunksize=taille, dtype=identifiants)
+    elif chemin.endswith('.parquet'):
+        # Import différé : pyarrow n'est nécessaire que pour les entrées Parquet
+        import pyarrow.parquet as pq
+
+        for tranche in pq.ParquetFile(chemin).iter_batches(batch_size=taille):
+            lot = tranche.to_pandas()
+            for colonne in identifiants:
+                if colonne in lot:
+                    lot[colonne] = lot[colonne].astype(str)
+            yield lot
+    else:
+        yield from pd.read_csv(chemin, chunksize=taille, dtype=identifiants)
+
+
+class EcrivainLots:
+    """Écrit les prévisions tranche par tranche dans un CSV, un Parquet ou sur la sortie standard ('-')."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.colonnes = None
+        self._fichier = None
+        self._parquet = None
+
+    def ecrire(self, df):
+        if self.colonnes is None:
+            # Colonnes fixées par la première tranche (une station sans bornes quantiles laisse ces colonnes vides)
+            self.colonnes = list(df.columns)
+        df = df.reindex(columns=self.colonnes)
+        if self.chemin.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.chemin, table.schema)
+            self._parquet.write_table(table)
+            return
+        entete = self._fichier is None
+        if entete:
+            self._fichier = sys.stdout if self.chemin == '-' else open(self.chemin, 'w', encoding='utf-8', newline='')
+        df.to_csv(self._fichier, header=entete, index=False, float_format='%.3f', date_format='%Y-%m-%d')
+
+    def fermer(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        elif self._fichier is not None and self._fichier is not sys.stdout:
+            self._fichier.close()
+        else:
+            sys.stdout.flush()
+
+
+class PrevisionLots:
+    """
+    Enchaîne lecture par tranches, fenêtres, prévision et écriture.
+
+    `moteurs(station)` retourne le moteur de la station ; `observations(station)` son historique
+    journalier (format dates de référence seulement). `compteurs` cumule lignes lues, dates de
+    référence prévues (`valides` : avec les 7 jours J-7..J-1 observés), tranches et durée.
+    """
+
+    def __init__(self, moteurs, station, references='toutes', observations=None):
+        if references not in REFERENCES:
+            raise ValueError(f"Références inconnues : {references} (attendu : {', '.join(REFERENCES)})")
+        self.moteurs = moteurs
+        self.station = station
+        self.references = references
+        self.observations = observations
+        self._historiques = {}  # station -> (dates, valeurs) des observations (format dates de référence)
+        self._report = None  # dernières lignes de la série en cours (format observations)
+        self._terminees = set()  # séries (station, série) terminées dans une tranche précédente
+        self.compteurs = {'lignes': 0, 'references': 0, 'valides': 0, 'lots': 0, 'duree_s': 0.0}
+
+    def traiter(self, lots, ecrire):
+        """Prévoit chaque tranche de `lots` et la passe à `ecrire` ; retourne les compteurs."""
+        debut = time.perf_counter()
+        for lot in lots:
+            self.compteurs['lignes'] += len(lot)
+            self.compteurs['lots'] += 1
+            if COLONNE_REFERENCE in lot.columns:
+                resultat = self._prevoir_references(lot)
+            elif COLONNE_DATE in lot.columns and set(COLONNES_OBSERVATIONS) <= set(lot.columns):
+                resultat = self._prevoir_observations(lot, fin_du_flux=False)
+            else:
+                raise ValueError(f"Colonnes d'entrée non reconnues : {list(lot.columns)} (attendu : "
+                                 f"'{COLONNE_REFERENCE}', ou '{COLONNE_DATE}' et {', '.join(COLONNES_OBSERVATIONS)})")
+            self.compteurs['duree_s'] = time.perf_counter() - debut
+            if resultat is not None:
+                ecrire(resultat)
+        if self._report is not None and self.references == 'fin':
+            resultat = self._prevoir_observations(self._report.iloc[:0], fin_du_flux=True)
+            if resultat is not None:
+                ecrire(resultat)
+        self.compteurs['duree_s'] = time.perf_counter() - debut
+        compter('lots.lignes', self.compteurs['lignes'])
+        return self.compteurs
+
+    def _prevoir(self, station, dates_obs, valeurs, cles_ref, dates_ref):
+        """Tableau long des prévisions des dates `dates_ref`, dont les fenêtres sont cherchées aux positions `cles_ref`."""
+        moteur = self.moteurs(station)
+        with chrono('lots.fenetres'):
+            fenetres, valides = moteur.fenetres_depuis_tableaux(dates_obs, valeurs, cles_ref)
+        predictions = np.full((len(dates_ref), moteur.horizon, moteur.n_sorties), np.nan, dtype=np.float32)
+        predictions[valides] = moteur.prevoir_fenetres(fenetres[valides], dates_ref[valides])
+        self.compteurs['references'] += len(dates_ref)
+        self.compteurs['valides'] += int(valides.sum())
+        return moteur.tableau(dates_ref, predictions)
+
+    @staticmethod
+    def _avec_identifiants(tableau, horizon, **identifiants):
+        """Ajoute en tête les colonnes d'identifiants (une valeur par date de référence, répétée par horizon)."""
+        for k, (colonne, valeurs) in enumerate(identifiants.items()):
+            tableau.insert(k, colonne, np.repeat(np.asarray(valeurs), horizon))
+        return tableau
+
+    def _prevoir_references(self, lot):
+        stations = lot[COLONNE_STATION].to_numpy() if COLONNE_STATION in lot else np.full(len(lot), self.station)
+        dates_ref = pd.to_datetime(lot[COLONNE_REFERENCE]).values.astype('datetime64[D]')
+        resultats = []
+        for station in pd.unique(stations):
+            selection = stations == station
+            if station not in self._historiques:
+                df = self.observations(station).sort_index()
+                self._historiques[station] = (df.index.values.astype('datetime64[D]'),
+                                              df[COLONNES_OBSERVATIONS].to_numpy(dtype=np.float32))
+            dates_obs, valeurs = self._historiques[station]
+            tableau = self._prevoir(station, dates_obs, valeurs, dates_ref[selection], dates_ref[selection])
+            resultats.append(self._avec_identifiants(tableau, self.moteurs(station).horizon,
+                                                     **{COLONNE_STATION: stations[selection]}))
+        return pd.concat(resultats, ignore_index=True) if resultats else None
+
+    def _prevoir_observations(self, lot, fin_du_flux):
+        lot = lot.assign(_nouvelle=True)
+        bloc = lot if self._report is None else pd.concat([self._report, lot], ignore_index=True)
+        if bloc.empty:
+            return None
+        stations = (bloc[COLONNE_STATION].to_numpy(dtype=object) if COLONNE_STATION in bloc
+                    else np.full(len(bloc), self.station, dtype=object))
+        series = bloc[COLONNE_SERIE].to_numpy(dtype=object) if COLONNE_SERIE in bloc else stations
+        dates = pd.to_datetime(bloc[COLONNE_DATE]).values.astype('datetime64[D]')
+
+        # Séries contiguës et dates croissantes dans chaque série : chaque série occupe son propre
+        # intervalle de l'axe des dates, décalé de ECART_SERIES jours, et une seule passe suffit
+        # (les codes sont propres à la tranche : une série terminée plus tôt qui reparaît est rejetée à part,
+        # ses jours reportés ayant déjà été abandonnés)
+        codes, noms_series = pd.factorize(pd.Series(stations).astype(str) + '\x1f' + pd.Series(series).astype(str))
+        cles = dates + (codes.astype(np.int64) * ECART_SERIES).astype('timedelta64[D]')
+        if ((np.diff(codes) < 0).any() or (np.diff(cles.astype(np.int64)) <= 0).any()
+                or not self._terminees.isdisjoint(noms_series)):
+            raise ValueError("Entrée non triée : les lignes doivent être groupées par série puis par date croissante.")
+        self._terminees.update(noms_series[:-1])
+
+        # La dernière série peut se poursuivre dans la tranche suivante : ses derniers jours sont reportés
+        derniere = codes == codes[-1]
+        if fin_du_flux:
+            self._report = None
+        else:
+            taille = self.moteurs(stations[-1]).taille_historique
+            self._report = bloc[derniere].iloc[-taille:].assign(_nouvelle=False)
+
+        if self.references == 'toutes':
+            # Référence J = lendemain de chaque jour observé de la tranche
+            references = np.flatnonzero(bloc['_nouvelle'].to_numpy())
+        else:
+            # Référence J = lendemain du dernier jour de chaque série terminée
+            fins = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True])
+            references = fins if fin_du_flux else fins[~derniere[fins]]
+        if len(references) == 0:
+            return None
+
+        valeurs = bloc[COLONNES_OBSERVATIONS].to_numpy(dtype=np.float32)
+        un_jour = np.timedelta64(1, 'D')
+        resultats = []
+        for station in pd.unique(stations[references]):
+            selection = references[stations[references] == station]
+            tableau = self._prevoir(station, cles, valeurs, cles[selection] + un_jour, dates[selection] + un_jour)
+            identifiants = {COLONNE_STATION: stations[selection]}
+            if COLONNE_SERIE in bloc:
+                identifiants[COLONNE_SERIE] = series[selection]
+            resultats.append(self._avec_identifiants(tableau, self.moteurs(station).horizon, **identifiants))
+        return pd.concat(resultats, ignore_index=True)
@@ -0,0 +1,124 @@
+"""
+Construction du jeu features_finales et mise à jour incrémentale quand de nouveaux jours arrivent.
+
+La reconstruction complète (script 02) écrit, à côté du bundle de features, une queue :
+les derniers jours bruts de la série (calendrier complet, NaN conservés) et la climatologie
+du jour de l'année utilisée pour l'imputation. Une mise à jour ne traite que cette queue et
+les nouveaux jours : seules les lignes de features postérieures à la dernière ligne existante
+sont calculées puis ajoutées au bundle.
+
+Côté entraînement (script 03, `--mode incremental`), le modèle est d'abord évalué sur les
+nouveaux jours : si sa MAE dérive par rapport à la MAE de test de référence, un réentraînement
+complet est déclenché ; sinon le boosting reprend depuis les boosters sauvegardés sur la
+fenêtre récente.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from meteo.features import (CIBLES_DIRECTES, COLONNES_OBSERVATIONS, COLONNES_QUALITE, FEATURE_ORDER,
+                            FEATURES_CALENDRIER, HORIZON_MAX, TARGET_COLUMNS, ConstructeurFeatures)
+from meteo.lacunes import climatologie, completer_calendrier, imputer, retirer_imputation_moyenne
+
+# --- CONFIGURATION ---
+TAILLE_QUEUE = 60  # jours bruts conservés : plus longue fenêtre des features (30) + HORIZON_MAX + marge pour les trous
+EXTENSION_QUEUE = '.queue.npz'
+SEUIL_DERIVE = 0.25  # hausse relative de la MAE sur les nouveaux jours déclenchant un réentraînement complet
+MIN_JOURS_DERIVE = 14  # en dessous, la MAE des nouveaux jours est trop bruitée pour conclure
+# --- FIN CONFIGURATION ---
+
+
+def construire_jeu(dates, valeurs, masque, constructeur=None):
+    """
+    Lignes du jeu features_finales (features, cibles J+1, cibles directes J+2..J+7, colonne
+    de qualité) d'une série au calendrier complet. Les jours sans lags ni fenêtres glissantes complets ou dont la
+    cible est imputée sont écartés.
+    """
+    constructeur = constructeur or ConstructeurFeatures(FEATURE_ORDER)
+
+    # Cibles : T° Max/Min du lendemain sur la ligne du jour J (équivalent de shift(-1))
+    Y = np.full((len(valeurs), len(TARGET_COLUMNS)), np.nan, dtype=np.float32)
+    Y[:-1] = valeurs[1:, :2]
+    # Une cible imputée n'est pas une observation : le jour est retiré de l'apprentissage
+    cibles_imputees = np.ones(len(valeurs), dtype=bool)
+    cibles_imputees[:-1] = masque[1:, :2].any(axis=1)
+
+    X = constructeur.construire_historique(valeurs, dates)
+    # Colonne de qualité : nombre d'entrées de lag imputées sur la ligne
+    lags = ConstructeurFeatures([nom for nom in constructeur.feature_order if '_Lag_' in nom])
+    lags_imputes = np.nansum(lags.construire_historique(masque.astype(np.float32), dates), axis=1)
+
+    # Cibles directes J+2..J+7 (modèle multi-horizon) : NaN si le jour visé est imputé ou pas encore observé
+    Y_directes = np.full((len(valeurs), len(CIBLES_DIRECTES)), np.nan, dtype=np.float32)
+    for k, h in enumerate(range(2, HORIZON_MAX + 1)):
+        observees = np.where(masque[h:, :2], np.nan, valeurs[h:, :2])
+        Y_directes[:-h, 2 * k:2 * k + 2] = observees
+
+    lignes = ~(np.isnan(X).any(axis=1) | np.isnan(Y).any(axis=1) | cibles_imputees)
+    df = pd.DataFrame(np.hstack([X, Y, Y_directes, lags_imputes[:, None]])[lignes],
+                      index=pd.DatetimeIndex(dates[lignes], name='time'),
+                      columns=constructeur.feature_order + TARGET_COLUMNS + CIBLES_DIRECTES + COLONNES_QUALITE)
+    df[FEATURES_CALENDRIER + COLONNES_QUALITE] = df[FEATURES_CALENDRIER + COLONNES_QUALITE].astype(np.int16)
+    return df
+
+
+def chemin_queue(chemin_csv):
+    """Fichier de queue associé à un jeu de features (data/x.csv -> data/x.queue.npz)."""
+    return os.path.splitext(chemin_csv)[0] + EXTENSION_QUEUE
+
+
+def ecrire_queue(chemin, dates, valeurs, masque, table_climatologie=None):
+    """
+    Sauvegarde la fin de la série brute (valeurs imputées remises à NaN) et la climatologie,
+    calculée sur la série entière si elle n'est pas fournie.
+    """
+    brutes = np.where(masque, np.nan, valeurs).astype(np.float32)
+    if table_climatologie is None:
+        table_climatologie = climatologie(dates, brutes)
+    np.savez(chemin, dates=np.asarray(dates, dtype='datetime64[D]')[-TAILLE_QUEUE:], valeurs=brutes[-TAILLE_QUEUE:],
+             climatologie=table_climatologie)
+
+
+def lire_queue(chemin):
+    """Retourne (série brute de la queue en DataFrame, table de climatologie (366, 4))."""
+    with np.load(chemin) as queue:
+        df = pd.DataFrame(queue['valeurs'], index=pd.DatetimeIndex(queue['dates'], name='time'),
+                          columns=COLONNES_OBSERVATIONS)
+        return df, queue['climatologie']
+
+
+def nouvelles_lignes(df_brut, chemin, derniere_ligne):
+    """
+    Lignes de features postérieures à `derniere_ligne`, calculées sur la queue et les
+    jours de `df_brut` qui la suivent. Les HORIZON_MAX - 1 dernières lignes existantes sont
+    recalculées aussi : leurs cibles directes visaient des jours qui n'étaient pas encore observés.
+    Retourne (DataFrame des nouvelles lignes, état de la queue avancée à passer à `ecrire_queue`
+    une fois les lignes enregistrées), ou (None, None) si la série brute n'a pas avancé.
+    """
+    queue, table = lire_queue(chemin)
+    nouveaux = df_brut.loc[df_brut.index > queue.index[-1], COLONNES_OBSERVATIONS]
+    if nouveaux.empty:
+        return None, None
+
+    nouveaux = retirer_imputation_moyenne(nouveaux.astype(np.float32))
+    serie = completer_calendrier(pd.concat([queue, nouveaux]))
+    valeurs, masque = imputer(serie, table_climatologie=table)
+    dates = serie.index.values.astype('datetime64[D]')
+    jeu = construire_jeu(dates, valeurs, masque)
+    # La climatologie de référence reste celle de la reconstruction complète
+    debut = derniere_ligne - pd.Timedelta(days=HORIZON_MAX - 1)
+    return jeu[jeu.index > debut], (dates, valeurs, masque, table)
+
+
+def controle_derive(predicteur, X, Y, mae_reference, seuil=SEUIL_DERIVE, min_jours=MIN_JOURS_DERIVE):
+    """
+    MAE du modèle actuel sur des jours qu'il n'a jamais vus, comparée à sa MAE de test.
+    Retourne (dérive détectée, {cible: MAE}).
+    """
+    predictions = predicteur.predict(np.asarray(X, dtype=np.float32))
+    mae = {cible: float(np.mean(np.abs(predictions[:, predicteur.cibles.index(cible)] - Y[cible].to_numpy())))
+           for cible in TARGET_COLUMNS}
+    if len(X) < min_jours:
+        return False, mae
+    return any(mae[cible] > (1 + seuil) * mae_reference[cible] for cible in mae if cible in mae_reference), mae
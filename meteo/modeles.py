@@ -0,0 +1,126 @@
+"""
+Artefacts du modèle : un booster XGBoost natif (UBJSON) par cible, l'ensemble
+d'arbres compilé en tableaux NumPy et un manifeste JSON.
+
+Le chargement direct des boosters évite d'importer scikit-learn et de dépickler
+le `MultiOutputRegressor` complet au démarrage de l'application ; le backend
+compilé évite même d'importer xgboost, et ses tableaux sont mappés en mémoire en lecture
+seule (meteo/partage.py) : plusieurs processus de service partagent une seule copie.
+Le pickle `final_model.pkl` reste écrit par le script 03 et sert de repli.
+
+Les fonctions de lecture acceptent la racine des modèles d'une station : avec un registre de
+versions (meteo/registre_modeles.py), c'est la version active qui est lue.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from meteo.features import TARGET_COLUMNS
+from meteo.partage import charger_tableaux, preparer_partage
+from meteo.predicteurs import BACKENDS, PredicteurBooster, PredicteurCompile, PredicteurSklearn, compiler_boosters
+from meteo.registre_modeles import dossier_courant
+
+# --- CONFIGURATION ---
+MODEL_DIR = 'models'
+MANIFESTE = 'manifeste.json'
+PICKLE = 'final_model.pkl'
+ENSEMBLE_COMPILE = 'ensemble_compile.npz'
+SOUS_DOSSIER_DIRECT = 'direct'  # modèle multi-horizon direct (script 03 --horizon-direct), à côté du modèle récursif
+# --- FIN CONFIGURATION ---
+
+
+def dossier_modele(mode='recursif', dossier=MODEL_DIR):
+    """Dossier des artefacts du mode de prévision : models/ (récursif) ou models/direct/, dans la version active."""
+    dossier = dossier_courant(dossier)
+    return os.path.join(dossier, SOUS_DOSSIER_DIRECT) if mode == 'direct' else dossier
+
+
+def exporter_boosters(estimateurs, cibles, dossier=MODEL_DIR, metriques=None, entrainement=None):
+    """
+    Sauvegarde chaque booster au format UBJSON natif, l'ensemble compilé (.npz) et le manifeste
+    (ordre des features, cibles, MAE, informations d'entraînement).
+    """
+    fichiers = {}
+    boosters = [estimateur.get_booster() for estimateur in estimateurs]
+    for booster, cible in zip(boosters, cibles):
+        fichiers[cible] = f'booster_{cible}.ubj'
+        booster.save_model(os.path.join(dossier, fichiers[cible]))
+    np.savez(os.path.join(dossier, ENSEMBLE_COMPILE), **compiler_boosters(boosters))
+    preparer_partage(os.path.join(dossier, ENSEMBLE_COMPILE))  # copie .npy mappée par les processus de service
+
+    manifeste = {
+        'format': 'xgboost-ubj',
+        'feature_order': boosters[0].feature_names,
+        'cibles': list(cibles),
+        'fichiers': fichiers,
+        'fichier_compile': ENSEMBLE_COMPILE,
+        'mae': metriques or {},
+        'entrainement': entrainement or {},
+    }
+    with open(os.path.join(dossier, MANIFESTE), 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+    return manifeste
+
+
+def lire_manifeste(dossier=MODEL_DIR):
+    with open(os.path.join(dossier, MANIFESTE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def version_modele(dossier=MODEL_DIR):
+    """Identifiant court du modèle (empreinte du manifeste, ou du pickle à défaut)."""
+    chemin = os.path.join(dossier, MANIFESTE)
+    if not os.path.exists(chemin):
+        chemin = os.path.join(dossier, PICKLE)
+    with open(chemin, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def completer_manifeste(dossier=MODEL_DIR, **champs):
+    """Ajoute ou remplace des entrées de premier niveau du manifeste existant."""
+    manifeste = lire_manifeste(dossier)
+    manifeste.update(champs)
+    with open(os.path.join(dossier, MANIFESTE), 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+    return manifeste
+
+
+def charger_modele(dossier=MODEL_DIR, backend='booster'):
+    """
+    Charge le prédicteur du backend demandé ('sklearn', 'booster' ou 'compile').
+    Retourne (predicteur, feature_order, manifeste).
+
+    Sans manifeste (modèle antérieur aux exports natifs), seul le pickle scikit-learn
+    est disponible : il est chargé quel que soit le backend demandé (manifeste vide).
+    Les imports lourds sont différés au backend effectivement utilisé.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(BACKENDS)})")
+    dossier = dossier_courant(dossier)
+    manifeste = lire_manifeste(dossier) if os.path.exists(os.path.join(dossier, MANIFESTE)) else {}
+
+    if backend == 'compile' and 'fichier_compile' in manifeste:
+        # Tableaux mappés en lecture seule : une seule copie en mémoire pour tous les processus (meteo/partage.py)
+        tableaux = charger_tableaux(os.path.join(dossier, manifeste['fichier_compile']))
+        predicteur = PredicteurCompile(tableaux, manifeste['feature_order'], manifeste['cibles'])
+    elif backend == 'booster' and manifeste:
+        import xgboost as xgb
+
+        boosters = []
+        for cible in manifeste['cibles']:
+            booster = xgb.Booster()
+            booster.load_model(os.path.join(dossier, manifeste['fichiers'][cible]))
+            boosters.append(booster)
+        predicteur = PredicteurBooster(boosters, manifeste['feature_order'], manifeste['cibles'])
+    else:
+        import joblib
+
+        multi_output_model = joblib.load(os.path.join(dossier, PICKLE))
+        if not multi_output_model.estimators_ or not multi_output_model.estimators_[0].get_booster().feature_names:
+            raise ValueError("Le modèle chargé n'a pas les attributs d'estimateur ou de noms de features attendus.")
+        # Le pickle ne contient que les sorties ponctuelles, placées en tête des cibles du manifeste
+        cibles = manifeste.get('cibles', TARGET_COLUMNS)[:len(multi_output_model.estimators_)]
+        predicteur = PredicteurSklearn(multi_output_model, cibles)
+    return predicteur, predicteur.feature_order, manifeste
@@ -0,0 +1,101 @@
+"""
+Normales climatiques journalières (1991-2020) sous forme de table NumPy indexée
+par le jour de l'année : la normale d'une date est une simple lecture `table[jour]`,
+et les écarts de n'importe quel nombre de prévisions se calculent en une opération.
+
+La table est calculée une fois (script 03) et sauvegardée à côté du modèle ; les processus
+de service la lisent mappée en mémoire (meteo/partage.py).
+"""
+import warnings
+
+import numpy as np
+
+from meteo.features import composantes_calendrier
+from meteo.lacunes import retirer_imputation_moyenne
+from meteo.partage import charger_tableaux, preparer_partage
+
+# --- CONFIGURATION ---
+NORMALES_PATH = 'models/normales.npz'
+CHAMPS = ['Tmax_Normale', 'Tmin_Normale', 'Tmax_P10', 'Tmax_P90', 'Tmin_P10', 'Tmin_P90']
+PERIODE = (1991, 2020)
+# --- FIN CONFIGURATION ---
+
+
+class NormalesClimatiques:
+    """Table (367, 6) float32 : ligne = jour de l'année (1 à 366, ligne 0 inutilisée), colonnes = CHAMPS."""
+
+    def __init__(self, table, periode=PERIODE, lissage=0):
+        self.table = np.asarray(table, dtype=np.float32)
+        self.periode = tuple(periode)
+        self.lissage = int(lissage)
+        self._colonnes = {champ: j for j, champ in enumerate(CHAMPS)}
+
+    @classmethod
+    def calculer(cls, df_brut, periode=PERIODE, lissage=0):
+        """
+        Calcule la table à partir des observations journalières brutes.
+
+        `lissage` = demi-largeur (en jours) d'une fenêtre circulaire : les moyennes et
+        percentiles d'un jour regroupent les observations des jours voisins. Un jour sans
+        observation (ex. le 366 selon les années disponibles) est complété par ses voisins.
+        Les valeurs issues de l'ancienne imputation par la moyenne ne sont pas des observations
+        et sont ignorées.
+        """
+        debut, fin = periode
+        df_brut = retirer_imputation_moyenne(df_brut)
+        df = df_brut[(df_brut.index.year >= debut) & (df_brut.index.year <= fin)]
+        _, jours, _ = composantes_calendrier(df.index.values)
+        annees = df.index.year.to_numpy() - debut
+
+        # Grille (variable, année, jour - 1) : NaN pour les jours non observés
+        grille = np.full((2, fin - debut + 1, 366), np.nan, dtype=np.float64)
+        grille[0, annees, jours - 1] = df['temperature_max_jour'].to_numpy()
+        grille[1, annees, jours - 1] = df['temperature_min_jour'].to_numpy()
+
+        # Fenêtre circulaire : les échantillons des jours voisins sont empilés sur l'axe des années
+        decalages = range(-lissage, lissage + 1)
+        echantillons = np.concatenate([np.roll(grille, -k, axis=2) for k in decalages], axis=1)
+
+        with warnings.catch_warnings():
+            # Jours sans aucune observation : NaN attendu, complété ensuite
+            warnings.simplefilter('ignore', RuntimeWarning)
+            moyennes = np.nanmean(echantillons, axis=1)
+            p10, p90 = np.nanpercentile(echantillons, [10, 90], axis=1)
+
+        colonnes = np.stack([moyennes[0], moyennes[1], p10[0], p90[0], p10[1], p90[1]], axis=1)
+        table = np.full((367, len(CHAMPS)), np.nan, dtype=np.float32)
+        table[1:] = _completer_circulaire(colonnes)
+        return cls(table, periode, lissage)
+
+    def sauvegarder(self, chemin=NORMALES_PATH):
+        np.savez(chemin, table=self.table, periode=np.array(self.periode), lissage=np.array(self.lissage),
+                 champs=np.array(CHAMPS))
+        preparer_partage(chemin)
+
+    @classmethod
+    def charger(cls, chemin=NORMALES_PATH):
+        contenu = charger_tableaux(chemin)  # table mappée en lecture seule, partagée entre processus
+        if list(contenu['champs']) != CHAMPS:
+            raise ValueError(f"Table de normales incompatible : {chemin}")
+        return cls(contenu['table'], tuple(contenu['periode']), int(contenu['lissage']))
+
+    def pour_dates(self, dates):
+        """Normales des dates demandées : dictionnaire {champ: tableau (N,)}."""
+        _, jours, _ = composantes_calendrier(np.atleast_1d(np.asarray(dates, dtype='datetime64[D]')))
+        lignes = self.table[jours]
+        return {champ: lignes[:, j] for champ, j in self._colonnes.items()}
+
+    def anomalies(self, dates, tmax, tmin):
+        """Écarts (prévision - normale) de Tmax et Tmin pour N dates, en une seule opération vectorisée."""
+        normales = self.pour_dates(dates)
+        return np.asarray(tmax) - normales['Tmax_Normale'], np.asarray(tmin) - normales['Tmin_Normale']
+
+
+def _completer_circulaire(colonnes):
+    """Interpole (circulairement sur l'année) les jours sans valeur de chaque colonne (366, k)."""
+    jours = np.arange(366)
+    for j in range(colonnes.shape[1]):
+        manquants = np.isnan(colonnes[:, j])
+        if manquants.any() and not manquants.all():
+            colonnes[manquants, j] = np.interp(jours[manquants], jours[~manquants], colonnes[~manquants, j], period=366)
+    return colonnes
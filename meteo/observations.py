@@ -0,0 +1,155 @@
+"""
+Stock local des observations journalières (SQLite, clé station + date) et
+synchronisation incrémentale depuis une source interchangeable.
+
+L'application et les scripts lisent leurs fenêtres J-7 à J-1 dans ce stock :
+seule l'étape de synchronisation touche au réseau, et elle ne récupère que les
+jours postérieurs au dernier jour déjà stocké, plus les JOURS_RELUS derniers jours
+stockés (valeurs provisoires ou manquantes le jour de leur publication).
+"""
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from meteo.features import COLONNES_OBSERVATIONS
+
+# --- CONFIGURATION ---
+STOCK_PATH = 'data/observations.sqlite'
+JOURS_RELUS = 10  # derniers jours stockés récupérés de nouveau à chaque synchronisation
+RENOMMAGE_METEOSTAT = {
+    'tmax': 'temperature_max_jour',
+    'tmin': 'temperature_min_jour',
+    'prcp': 'precipitation_somme_jour',
+    'wspd': 'vitesse_vent_moyenne_jour'
+}
+# --- FIN CONFIGURATION ---
+
+
+def _en_date(valeur):
+    """Convertit date, datetime, Timestamp ou chaîne ISO en `datetime.date`."""
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    if isinstance(valeur, date):
+        return valeur
+    return pd.Timestamp(valeur).date()
+
+
+# --- SOURCES D'OBSERVATIONS ---
+
+class SourceMeteostat:
+    """Source réseau : agrégats journaliers Meteostat (`Daily`) d'une station."""
+
+    def recuperer(self, station, debut, fin):
+        """Retourne les observations de `debut` à `fin` inclus, indexées par date."""
+        # Import différé : meteostat n'est chargé que lorsqu'une synchronisation a réellement lieu
+        from meteostat import Daily
+
+        data = Daily(station, datetime.combine(debut, datetime.min.time()),
+                     datetime.combine(fin, datetime.min.time())).fetch()
+        if data.empty:
+            return pd.DataFrame(columns=COLONNES_OBSERVATIONS, dtype=np.float64)
+        return data.rename(columns=RENOMMAGE_METEOSTAT)[COLONNES_OBSERVATIONS]
+
+
+class SourceDataFrame:
+    """Source locale à partir d'un DataFrame en mémoire (remplace Meteostat hors ligne ou en test)."""
+
+    def __init__(self, df):
+        self.df = df.sort_index()
+
+    def recuperer(self, station, debut, fin):
+        masque = (self.df.index >= pd.Timestamp(debut)) & (self.df.index <= pd.Timestamp(fin))
+        return self.df.loc[masque, COLONNES_OBSERVATIONS]
+
+
+class SourceCSV(SourceDataFrame):
+    """Source locale lue dans un CSV au format de data/meteo_brazzaville_daily.csv."""
+
+    def __init__(self, chemin):
+        super().__init__(pd.read_csv(chemin, index_col='time', parse_dates=True))
+
+
+# --- STOCK LOCAL ---
+
+class StockObservations:
+    """Observations journalières par station, persistées dans une base SQLite."""
+
+    def __init__(self, chemin=STOCK_PATH):
+        self.chemin = chemin
+        self._verrou = threading.Lock()
+        # Une seule connexion partagée (Streamlit sert les sessions depuis plusieurs threads)
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        colonnes = ', '.join(f'{colonne} REAL' for colonne in COLONNES_OBSERVATIONS)
+        with self._verrou, self._connexion:
+            self._connexion.execute(
+                f'CREATE TABLE IF NOT EXISTS observations ('
+                f'station TEXT NOT NULL, jour TEXT NOT NULL, {colonnes}, '
+                f'PRIMARY KEY (station, jour)) WITHOUT ROWID'
+            )
+
+    def fermer(self):
+        self._connexion.close()
+
+    def derniere_date(self, station):
+        """Dernier jour stocké pour la station, ou None si le stock est vide."""
+        with self._verrou:
+            ligne = self._connexion.execute(
+                'SELECT MAX(jour) FROM observations WHERE station = ?', (station,)).fetchone()
+        return date.fromisoformat(ligne[0]) if ligne[0] else None
+
+    def enregistrer(self, station, df):
+        """Insère (ou remplace) les observations d'un DataFrame indexé par date. Retourne le nombre de lignes."""
+        if df.empty:
+            return 0
+        valeurs = df[COLONNES_OBSERVATIONS].astype(object).where(df[COLONNES_OBSERVATIONS].notna(), None)
+        lignes = [(station, jour.strftime('%Y-%m-%d'), *ligne)
+                  for jour, ligne in zip(pd.to_datetime(df.index), valeurs.itertuples(index=False, name=None))]
+        marques = ', '.join('?' * (len(COLONNES_OBSERVATIONS) + 2))
+        with self._verrou, self._connexion:
+            self._connexion.executemany(f'INSERT OR REPLACE INTO observations VALUES ({marques})', lignes)
+        return len(lignes)
+
+    def synchroniser(self, station, source, debut, fin=None, jours_relus=JOURS_RELUS):
+        """
+        Récupère auprès de `source` les jours manquants après le dernier jour stocké, ainsi que les
+        `jours_relus` derniers jours stockés : leurs valeurs remplacent les valeurs provisoires, une
+        valeur absente de la nouvelle réponse gardant la valeur déjà stockée.
+
+        `debut` est la première date voulue quand le stock est vide ; `fin` vaut hier par défaut.
+        Retourne le nombre de jours ajoutés (postérieurs au dernier jour stocké).
+        """
+        fin = _en_date(fin) if fin is not None else date.today() - timedelta(days=1)
+        derniere = self.derniere_date(station)
+        debut = _en_date(debut) if derniere is None else max(_en_date(debut), derniere - timedelta(days=jours_relus - 1))
+        if debut > fin:
+            return 0
+        frais = source.recuperer(station, debut, fin)
+        if derniere is not None and not frais.empty:
+            frais = frais.fillna(self.lire(station, debut, fin).reindex(frais.index))
+        self.enregistrer(station, frais)
+        if derniere is None:
+            return len(frais)
+        return int((pd.to_datetime(frais.index) > pd.Timestamp(derniere)).sum())
+
+    def _requete(self, requete, parametres):
+        with self._verrou:
+            lignes = self._connexion.execute(requete, parametres).fetchall()
+        index = pd.DatetimeIndex([ligne[0] for ligne in lignes], name='time')
+        valeurs = np.array([ligne[1:] for ligne in lignes], dtype=np.float64).reshape(len(lignes), len(COLONNES_OBSERVATIONS))
+        return pd.DataFrame(valeurs, index=index, columns=COLONNES_OBSERVATIONS)
+
+    def lire(self, station, debut=None, fin=None):
+        """Observations de la station entre `debut` et `fin` inclus (toutes par défaut), triées par date."""
+        debut = _en_date(debut).isoformat() if debut is not None else '0000-01-01'
+        fin = _en_date(fin).isoformat() if fin is not None else '9999-12-31'
+        return self._requete(
+            f'SELECT jour, {", ".join(COLONNES_OBSERVATIONS)} FROM observations '
+            'WHERE station = ? AND jour BETWEEN ? AND ? ORDER BY jour', (station, debut, fin))
+
+    def fenetre(self, station, date_ref, taille=7):
+        """Observations J-`taille` à J-1 précédant la date de référence (moins de lignes si le stock a des trous)."""
+        date_ref = _en_date(date_ref)
+        return self.lire(station, date_ref - timedelta(days=taille), date_ref - timedelta(days=1))
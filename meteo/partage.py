@@ -0,0 +1,95 @@
+"""
+Artefacts NumPy partagés entre processus (application, service, workers).
+
+Les archives .npz (ensemble compilé, normales) ne peuvent pas être mappées en mémoire :
+chaque processus qui les charge en garde sa propre copie. À côté de chaque archive, un
+dossier `<nom>.<empreinte>.partage/` contient les mêmes tableaux en .npy, relus avec
+`np.load(mmap_mode='r')` : les pages sont celles du cache du système, partagées en lecture
+seule par tous les processus qui chargent le même modèle.
+
+Le dossier est créé une seule fois (par le script 03 à l'export, ou par le premier processus
+qui charge une archive plus ancienne), de façon atomique : renommage d'un dossier temporaire.
+Son nom dépend du contenu de l'archive (SHA-256) : il reste valable après une copie ou un clone,
+un réentraînement produit un nouveau dossier et les anciens sont supprimés. Ces dossiers sont
+régénérables et ne sont pas versionnés (.gitignore). Si le dossier ne peut pas être écrit (déploiement
+en lecture seule), l'archive est chargée en mémoire comme avant.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+# --- CONFIGURATION ---
+ACTIF = os.environ.get('METEO_MEMOIRE_PARTAGEE', '1') != '0'  # 0 : archives chargées en mémoire privée
+SUFFIXE = '.partage'
+LONGUEUR_EMPREINTE = 16  # caractères hexadécimaux du SHA-256 gardés dans le nom du dossier
+TAILLE_BLOC = 1 << 20
+# --- FIN CONFIGURATION ---
+
+_empreintes = {}  # (chemin, taille, mtime_ns) -> empreinte : une archive inchangée n'est hachée qu'une fois par processus
+_verrou = threading.Lock()
+
+
+def empreinte_archive(chemin_npz):
+    """Empreinte (SHA-256 tronqué) du contenu de l'archive, mémorisée tant que sa taille et sa date ne changent pas."""
+    etat = os.stat(chemin_npz)
+    cle = (os.path.abspath(chemin_npz), etat.st_size, etat.st_mtime_ns)
+    with _verrou:
+        empreinte = _empreintes.get(cle)
+    if empreinte is None:
+        h = hashlib.sha256()
+        with open(chemin_npz, 'rb') as f:
+            for bloc in iter(lambda: f.read(TAILLE_BLOC), b''):
+                h.update(bloc)
+        empreinte = h.hexdigest()[:LONGUEUR_EMPREINTE]
+        with _verrou:
+            _empreintes[cle] = empreinte
+    return empreinte
+
+
+def dossier_partage(chemin_npz):
+    """Dossier .npy associé au contenu actuel de l'archive."""
+    return f'{os.path.splitext(chemin_npz)[0]}.{empreinte_archive(chemin_npz)}{SUFFIXE}'
+
+
+def preparer_partage(chemin_npz):
+    """Crée (une fois) le dossier .npy de l'archive et supprime ceux des versions précédentes ; retourne son chemin."""
+    dossier = dossier_partage(chemin_npz)
+    if os.path.isdir(dossier):
+        return dossier
+    parent, base = os.path.split(os.path.splitext(chemin_npz)[0])
+    temporaire = tempfile.mkdtemp(prefix=f'.{base}.', dir=parent or '.')
+    try:
+        with np.load(chemin_npz) as contenu:
+            for nom in contenu.files:
+                np.save(os.path.join(temporaire, f'{nom}.npy'), contenu[nom])
+        os.rename(temporaire, dossier)
+    except OSError:
+        # Un autre processus l'a créé entre-temps (dossier cible non vide) : le sien est utilisé
+        shutil.rmtree(temporaire, ignore_errors=True)
+        if not os.path.isdir(dossier):
+            raise
+    for nom in os.listdir(parent or '.'):
+        ancien = os.path.join(parent, nom)
+        if nom.startswith(f'{base}.') and nom.endswith(SUFFIXE) and ancien != dossier:
+            shutil.rmtree(ancien, ignore_errors=True)
+    return dossier
+
+
+def charger_tableaux(chemin_npz, partage=None):
+    """
+    Tableaux d'une archive .npz : {nom: tableau}. Mappés en mémoire en lecture seule depuis le
+    dossier partagé (créé au besoin), ou copiés en mémoire privée si le partage est désactivé ou impossible.
+    """
+    if ACTIF if partage is None else partage:
+        try:
+            dossier = preparer_partage(chemin_npz)
+            return {os.path.splitext(nom)[0]: np.load(os.path.join(dossier, nom), mmap_mode='r')
+                    for nom in os.listdir(dossier) if nom.endswith('.npy')}
+        except OSError:
+            pass
+    with np.load(chemin_npz) as contenu:
+        return {nom: contenu[nom] for nom in contenu.files}
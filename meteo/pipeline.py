@@ -0,0 +1,319 @@
+"""
+Pipeline des scripts 01 à 05 avec reprise sur empreintes de contenu (scripts/08_pipeline.py).
+
+Chaque étape déclare son script, ses paramètres (arguments et variables d'environnement lues),
+ses entrées et ses sorties. Son empreinte combine le code exécuté (le script et les modules
+meteo/ qu'il importe, transitivement), les paramètres et le contenu des entrées. Une étape dont
+l'empreinte n'a pas changé depuis sa dernière réussite, et dont les sorties existent, est sautée.
+Les empreintes de fichiers sont mémorisées avec leur taille et leur date de modification : seuls
+les fichiers modifiés sont relus, et une exécution sans changement ne lit aucune donnée.
+
+Une étape attend celles qui produisent ses entrées ; les étapes indépendantes (prévision et
+analyse, après l'entraînement) tournent en parallèle. Chaque script s'exécute dans un
+sous-processus lancé depuis la racine du dépôt, quel que soit le dossier courant, sa sortie étant
+écrite dans `JOURNAUX_DIR/<étape>.log`. Durée et mémoire maximale (RSS) de chaque étape sont
+gardées dans l'état et ajoutées à l'historique.
+
+Ce module n'importe ni pandas ni NumPy : une exécution sans changement prend quelques dizaines
+de millisecondes.
+"""
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from meteo.registre_modeles import dossier_courant
+
+# --- CONFIGURATION ---
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_SCRIPTS = os.path.join(RACINE, 'scripts')
+PAQUET = 'meteo'
+JOURNAUX_DIR = 'resultats/pipeline'
+ETAT_PATH = os.path.join(JOURNAUX_DIR, 'etat.json')
+HISTORIQUE_PATH = os.path.join(JOURNAUX_DIR, 'historique.jsonl')
+WORKERS = 2
+TAILLE_BLOC = 1 << 20  # lecture des fichiers à hacher
+IGNORES = ('.partage', '.tmp')  # fichiers créés à l'exécution (mémoire partagée, écritures en cours) : hors empreinte
+# --- FIN CONFIGURATION ---
+
+
+class Etape:
+    """
+    Une étape du pipeline. `entrees` et `sorties` sont des chemins relatifs à la racine, ou des
+    fonctions sans argument qui les résolvent au moment de la vérification (modèle actif du registre).
+    Une étape `externe` lit une source distante : sans entrée locale, elle n'est relancée que si son
+    code, ses paramètres ou ses sorties changent, ou sur demande.
+    """
+
+    def __init__(self, nom, script, arguments=(), entrees=(), sorties=(), environnement=(), externe=False):
+        self.nom = nom
+        self.script = script
+        self.arguments = list(arguments)
+        self.entrees = list(entrees)
+        self.sorties = list(sorties)
+        self.environnement = list(environnement)  # variables d'environnement lues par le script
+        self.externe = externe
+
+    def chemins(self, chemins):
+        return [chemin() if callable(chemin) else chemin for chemin in chemins]
+
+    def parametres(self):
+        return {'arguments': self.arguments, 'environnement': {nom: os.environ.get(nom) for nom in self.environnement}}
+
+
+def imports_paquet(chemin, paquet=PAQUET):
+    """Fichiers des modules de `paquet` importés par le fichier source `chemin` (chemins relatifs à la racine)."""
+    with open(chemin, encoding='utf-8') as f:
+        arbre = ast.parse(f.read(), chemin)
+    fichiers = set()
+    for noeud in ast.walk(arbre):
+        if isinstance(noeud, ast.Import):
+            modules = [alias.name for alias in noeud.names]
+        elif isinstance(noeud, ast.ImportFrom) and noeud.level == 0 and noeud.module:
+            # `from meteo import x` peut désigner le module meteo/x.py
+            modules = [noeud.module] + [f'{noeud.module}.{alias.name}' for alias in noeud.names]
+        else:
+            continue
+        for module in modules:
+            if module == paquet:
+                fichiers.add(os.path.join(paquet, '__init__.py'))
+            elif module.startswith(paquet + '.'):
+                fichiers.add(os.path.join(*module.split('.')) + '.py')
+    return sorted(fichiers)
+
+
+def dependances_code(script, racine=RACINE, paquet=PAQUET, connus=None):
+    """
+    Chemins (relatifs à la racine) du script et des modules de `paquet` qu'il importe, transitivement.
+    `connus` ({chemin: [taille, mtime_ns, imports]}) évite de réanalyser les fichiers inchangés ; il est complété.
+    """
+    connus = {} if connus is None else connus
+    vus, a_lire = set(), [os.path.relpath(script, racine)]
+    while a_lire:
+        chemin = a_lire.pop()
+        complet = os.path.join(racine, chemin)
+        if chemin in vus or not os.path.exists(complet):
+            continue
+        vus.add(chemin)
+        etat = os.stat(complet)
+        connu = connus.get(chemin)
+        if not connu or connu[:2] != [etat.st_size, etat.st_mtime_ns]:
+            connu = connus[chemin] = [etat.st_size, etat.st_mtime_ns, imports_paquet(complet, paquet)]
+        a_lire.extend(connu[2])
+    return sorted(vus)
+
+
+class EmpreintesFichiers:
+    """
+    Empreintes SHA-256 de fichiers et de dossiers (bundles), mémorisées avec la taille et la date de
+    modification de chaque fichier : un fichier inchangé n'est pas relu. Partagée entre threads.
+    """
+
+    def __init__(self, connues=None, racine=RACINE):
+        self.connues = dict(connues or {})  # chemin -> [taille, mtime_ns, empreinte]
+        self.racine = racine
+        self._verrou = threading.Lock()
+
+    def fichier(self, chemin):
+        etat = os.stat(os.path.join(self.racine, chemin))
+        with self._verrou:
+            connue = self.connues.get(chemin)
+        if connue and connue[:2] == [etat.st_size, etat.st_mtime_ns]:
+            return connue[2]
+        h = hashlib.sha256()
+        with open(os.path.join(self.racine, chemin), 'rb') as f:
+            for bloc in iter(lambda: f.read(TAILLE_BLOC), b''):
+                h.update(bloc)
+        empreinte = h.hexdigest()
+        with self._verrou:
+            self.connues[chemin] = [etat.st_size, etat.st_mtime_ns, empreinte]
+        return empreinte
+
+    def instantane(self):
+        """Empreintes connues des fichiers qui existent encore (versions purgées, sorties remplacées : oubliées)."""
+        with self._verrou:
+            connues = sorted(self.connues.items())
+        return {chemin: valeur for chemin, valeur in connues if os.path.exists(os.path.join(self.racine, chemin))}
+
+    def chemin(self, chemin):
+        """Empreinte d'un fichier, ou d'un dossier (noms et empreintes de ses fichiers, récursivement)."""
+        complet = os.path.join(self.racine, chemin)
+        if not os.path.isdir(complet):
+            return self.fichier(chemin)
+        contenu = {}
+        for dossier, _, fichiers in os.walk(complet):
+            for nom in fichiers:
+                if not nom.endswith(IGNORES):
+                    relatif = os.path.relpath(os.path.join(dossier, nom), self.racine)
+                    contenu[os.path.relpath(relatif, chemin)] = self.fichier(relatif)
+        return hashlib.sha256(json.dumps(contenu, sort_keys=True).encode()).hexdigest()
+
+
+class Pipeline:
+    """
+    Ordonnance les étapes (données dans un ordre compatible avec leurs dépendances), saute celles
+    dont l'empreinte est inchangée et exécute les autres, jusqu'à `workers` à la fois.
+    """
+
+    def __init__(self, etapes, workers=WORKERS, racine=RACINE, etat_path=ETAT_PATH):
+        self.etapes = etapes
+        self.workers = max(1, workers)
+        self.racine = racine
+        self.etat_path = os.path.join(racine, etat_path)
+        self.etat = self._lire_etat()
+        self.empreintes = EmpreintesFichiers(self.etat.get('fichiers'), racine)
+        self._verrou = threading.Lock()
+        self._codes = {}
+        self._imports = self.etat.setdefault('imports', {})  # fichier source -> [taille, mtime_ns, modules importés]
+
+    def _lire_etat(self):
+        try:
+            with open(self.etat_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _ecrire_etat(self):
+        # Écriture atomique, après chaque étape : une exécution interrompue garde les étapes terminées
+        with self._verrou:
+            self.etat['fichiers'] = self.empreintes.instantane()
+            os.makedirs(os.path.dirname(self.etat_path), exist_ok=True)
+            temporaire = self.etat_path + f'.{os.getpid()}.tmp'
+            with open(temporaire, 'w', encoding='utf-8') as f:
+                json.dump(self.etat, f, ensure_ascii=False, indent=1)
+            os.replace(temporaire, self.etat_path)
+
+    def producteurs(self, etape):
+        """Étapes (parmi celles du pipeline) qui produisent une entrée de `etape`."""
+        produits = {}
+        for autre in self.etapes:
+            if autre is etape:
+                break
+            for sortie in autre.sorties:
+                produits[sortie] = autre.nom
+        return sorted({produits[entree] for entree in etape.entrees if entree in produits})
+
+    def empreinte(self, etape):
+        """{'code', 'parametres', 'entrees': {chemin: empreinte}} de l'étape ; les entrées doivent exister."""
+        with self._verrou:  # analyse des imports partagée avec l'écriture de l'état
+            if etape.script not in self._codes:
+                code = {chemin: self.empreintes.fichier(chemin)
+                        for chemin in dependances_code(os.path.join(DOSSIER_SCRIPTS, etape.script), self.racine,
+                                                       connus=self._imports)}
+                self._codes[etape.script] = hashlib.sha256(json.dumps(code, sort_keys=True).encode()).hexdigest()[:20]
+        parametres = hashlib.sha256(json.dumps(etape.parametres(), sort_keys=True).encode()).hexdigest()[:20]
+        entrees = {chemin: self.empreintes.chemin(chemin)[:20] for chemin in etape.chemins(etape.entrees)}
+        return {'code': self._codes[etape.script], 'parametres': parametres, 'entrees': entrees}
+
+    def raison(self, etape, empreinte, forcer):
+        """Motif d'exécution de l'étape, ou None si elle peut être sautée."""
+        precedente = self.etat.get('etapes', {}).get(etape.nom)
+        if etape.nom in forcer:
+            return 'forcée'
+        if precedente is None:
+            return 'jamais exécutée'
+        if precedente['empreinte']['code'] != empreinte['code']:
+            return 'code modifié'
+        if precedente['empreinte']['parametres'] != empreinte['parametres']:
+            return 'paramètres modifiés'
+        modifiees = [chemin for chemin, valeur in empreinte['entrees'].items()
+                     if precedente['empreinte']['entrees'].get(chemin) != valeur]
+        if modifiees:
+            return f"entrée modifiée : {', '.join(modifiees)}"
+        manquantes = [chemin for chemin in etape.chemins(etape.sorties) if not os.path.exists(os.path.join(self.racine, chemin))]
+        if manquantes:
+            return f"sortie absente : {', '.join(manquantes)}"
+        return None
+
+    def _lancer(self, etape):
+        """Exécute le script de l'étape ; retourne (code de retour, durée en s, mémoire maximale en Mo ou None)."""
+        journal = os.path.join(self.racine, JOURNAUX_DIR, f'{etape.nom}.log')
+        os.makedirs(os.path.dirname(journal), exist_ok=True)
+        commande = [sys.executable, os.path.join(DOSSIER_SCRIPTS, etape.script)] + etape.arguments
+        debut = time.perf_counter()
+        with open(journal, 'w', encoding='utf-8') as sortie:
+            processus = subprocess.Popen(commande, cwd=self.racine, stdout=sortie, stderr=subprocess.STDOUT)
+            if hasattr(os, 'wait4'):
+                # Mémoire maximale du seul sous-processus de l'étape (ru_maxrss en Ko sous Linux)
+                _, statut, ressources = os.wait4(processus.pid, 0)
+                processus.returncode = os.waitstatus_to_exitcode(statut)
+                memoire = ressources.ru_maxrss / 1024
+            else:
+                processus.wait()
+                memoire = None
+        return processus.returncode, time.perf_counter() - debut, memoire
+
+    def traiter(self, etape, forcer=()):
+        """Saute ou exécute une étape ; retourne son résultat {'statut', 'raison', 'duree_s', 'memoire_mo'}."""
+        manquantes = [chemin for chemin in etape.chemins(etape.entrees) if not os.path.exists(os.path.join(self.racine, chemin))]
+        if manquantes:
+            return {'statut': 'echec', 'raison': f"entrée absente : {', '.join(manquantes)}", 'duree_s': 0.0, 'memoire_mo': None}
+        empreinte = self.empreinte(etape)
+        raison = self.raison(etape, empreinte, forcer)
+        if raison is None:
+            return {'statut': 'sautee', 'raison': 'inchangée', 'duree_s': 0.0, 'memoire_mo': None}
+        code_retour, duree, memoire = self._lancer(etape)
+        resultat = {'statut': 'ok' if code_retour == 0 else 'echec', 'raison': raison, 'duree_s': round(duree, 3),
+                    'memoire_mo': round(memoire, 1) if memoire is not None else None}
+        if code_retour != 0:
+            resultat['raison'] += f" ; code de retour {code_retour}, voir {os.path.join(JOURNAUX_DIR, etape.nom + '.log')}"
+            return resultat
+        with self._verrou:
+            self.etat.setdefault('etapes', {})[etape.nom] = {
+                'empreinte': empreinte, 'duree_s': resultat['duree_s'], 'memoire_mo': resultat['memoire_mo'],
+                'terminee_le': datetime.now().isoformat(timespec='seconds')}
+        self._ecrire_etat()
+        return resultat
+
+    def executer(self, forcer=(), rapport=None):
+        """
+        Exécute le pipeline. `rapport(nom, résultat)` est appelé à la fin de chaque étape.
+        Une étape dont un producteur a échoué n'est pas lancée (statut 'bloquee'). Les entrées qui sont
+    des fonctions (modèle actif) sont reliées à leur producteur par identité : la même fonction doit
+    figurer dans les sorties de l'un et les entrées de l'autre.
+        Retourne {nom: résultat} dans l'ordre des étapes.
+        """
+        debut = time.perf_counter()
+        resultats, en_cours, restantes = {}, {}, list(self.etapes)
+        with ThreadPoolExecutor(max_workers=self.workers) as executeur:
+            while restantes or en_cours:
+                for etape in list(restantes):
+                    producteurs = self.producteurs(etape)
+                    if any(resultats.get(nom, {}).get('statut') in ('echec', 'bloquee') for nom in producteurs):
+                        restantes.remove(etape)
+                        resultats[etape.nom] = {'statut': 'bloquee', 'raison': f"dépend de : {', '.join(producteurs)}",
+                                                'duree_s': 0.0, 'memoire_mo': None}
+                        if rapport:
+                            rapport(etape.nom, resultats[etape.nom])
+                    elif all(nom in resultats for nom in producteurs):
+                        restantes.remove(etape)
+                        en_cours[executeur.submit(self.traiter, etape, forcer)] = etape.nom
+                if not en_cours:
+                    continue
+                terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                for futur in terminees:
+                    nom = en_cours.pop(futur)
+                    resultats[nom] = futur.result()
+                    if rapport:
+                        rapport(nom, resultats[nom])
+        self._ecrire_etat()  # empreintes de fichiers recalculées, même si toutes les étapes sont sautées
+        self._historiser(resultats, time.perf_counter() - debut)
+        return {etape.nom: resultats[etape.nom] for etape in self.etapes}
+
+    def _historiser(self, resultats, duree):
+        chemin = os.path.join(self.racine, HISTORIQUE_PATH)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'horodatage': datetime.now().isoformat(timespec='seconds'), 'duree_s': round(duree, 3),
+                                'etapes': resultats}, ensure_ascii=False) + '\n')
+
+
+def modele_actif(model_dir):
+    """Manifeste de la version active du registre (ou du modèle à plat) : change à chaque publication ou retour arrière."""
+    return lambda: os.path.relpath(os.path.join(dossier_courant(os.path.join(RACINE, model_dir)), 'manifeste.json'), RACINE)
@@ -0,0 +1,310 @@
+"""
+Préchargement en arrière-plan des observations et des prévisions.
+
+Un fil d'exécution par processus rafraîchit, à l'heure configurée (et au premier suivi d'une
+station), chaque station suivie :
+  1. synchronisation du stock d'observations auprès de la source, avec délai maximal par appel
+     et nouvelles tentatives espacées exponentiellement ; en cas d'échec, le stock existant
+     (données obsolètes) est utilisé tel quel et l'erreur est conservée dans l'état de la station ;
+  2. prévision de toute la plage de dates sélectionnables en un lot, enregistrée dans la table
+     `previsions` du stock SQLite (clé station, configuration, date de référence). La configuration
+     (`cle_previsions`) combine la version du modèle, l'horizon et le mode de prévision ; les lignes
+     des versions du modèle qui ne sont plus actives sont supprimées à chaque rafraîchissement.
+
+L'application ne fait plus que lire ces prévisions ; une date absente (modèle ou horizon changé,
+plage dépassée) est calculée à la demande comme avant.
+
+Essai hors ligne avec une source locale (CSV) à la place de Meteostat :
+    python -m meteo.prechargement --source data/meteo_brazzaville_daily.csv --aujourdhui 2020-12-31
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from meteo.instrumentation import chrono
+from meteo.observations import STOCK_PATH, StockObservations, _en_date
+
+# --- CONFIGURATION ---
+HEURE_RAFRAICHISSEMENT = os.environ.get('METEO_HEURE_RAFRAICHISSEMENT', '06:00')  # heure locale, HH:MM
+JOURS_PRECALCULES = 100  # plage sélectionnable dans l'application : J-99 .. J+1
+TENTATIVES = 3
+DELAI_INITIAL_S = 2.0  # attente avant la 2e tentative, doublée ensuite
+FACTEUR_BACKOFF = 2.0
+DELAI_MAX_S = 60.0
+ALEA_BACKOFF = 0.1  # fraction aléatoire ajoutée à chaque attente (évite les reprises synchronisées)
+TIMEOUT_S = 30.0  # durée maximale d'un appel à la source
+ERREURS_DEFINITIVES = (ImportError,)  # ex. meteostat non installé : inutile de réessayer
+# --- FIN CONFIGURATION ---
+
+
+class ErreurSource(Exception):
+    """La source n'a pas répondu après toutes les tentatives."""
+
+
+class SourceResiliente:
+    """
+    Enveloppe une source d'observations (`recuperer(station, debut, fin)`) : délai maximal par appel
+    (l'appel bloqué est abandonné dans un fil démon) et nouvelles tentatives avec attente exponentielle.
+    """
+
+    def __init__(self, source, tentatives=TENTATIVES, delai_initial=DELAI_INITIAL_S, facteur=FACTEUR_BACKOFF,
+                 delai_max=DELAI_MAX_S, timeout=TIMEOUT_S, attendre=time.sleep):
+        self.source = source
+        self.tentatives = tentatives
+        self.delai_initial = delai_initial
+        self.facteur = facteur
+        self.delai_max = delai_max
+        self.timeout = timeout
+        self.attendre = attendre
+        self.compteurs = {'appels': 0, 'echecs': 0, 'timeouts': 0}
+
+    def _appel(self, station, debut, fin):
+        resultat = {}
+
+        def appeler():
+            try:
+                resultat['valeur'] = self.source.recuperer(station, debut, fin)
+            except BaseException as e:
+                resultat['erreur'] = e
+
+        fil = threading.Thread(target=appeler, daemon=True)
+        fil.start()
+        fil.join(self.timeout)
+        if fil.is_alive():
+            self.compteurs['timeouts'] += 1
+            raise TimeoutError(f"la source n'a pas répondu en {self.timeout:.0f} s")
+        if 'erreur' in resultat:
+            raise resultat['erreur']
+        return resultat['valeur']
+
+    def recuperer(self, station, debut, fin):
+        derniere_erreur = None
+        for tentative in range(self.tentatives):
+            if tentative:
+                delai = min(self.delai_max, self.delai_initial * self.facteur ** (tentative - 1))
+                self.attendre(delai * (1 + random.uniform(0, ALEA_BACKOFF)))
+            self.compteurs['appels'] += 1
+            try:
+                return self._appel(station, debut, fin)
+            except ERREURS_DEFINITIVES as e:
+                self.compteurs['echecs'] += 1
+                raise ErreurSource(f"{type(e).__name__} : {e}") from e
+            except Exception as e:
+                self.compteurs['echecs'] += 1
+                derniere_erreur = e
+        raise ErreurSource(f"{self.tentatives} tentative(s) échouée(s) ; dernière erreur : "
+                           f"{type(derniere_erreur).__name__} : {derniere_erreur}") from derniere_erreur
+
+
+def cle_previsions(version, moteur):
+    """Configuration des prévisions stockées : version du modèle, horizon et mode du moteur."""
+    return f'{version}:h{moteur.horizon}:{moteur.mode}'
+
+
+class StockPrevisions:
+    """
+    Prévisions précalculées (une ligne JSON par station, configuration et date de référence), en SQLite.
+    La colonne `version` contient la configuration (`cle_previsions`) : une prévision J+2 n'est pas servie
+    pour un moteur J+7, ni une prévision récursive pour un moteur direct.
+    """
+
+    def __init__(self, chemin=STOCK_PATH):
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        with self._verrou, self._connexion:
+            self._connexion.execute(
+                'CREATE TABLE IF NOT EXISTS previsions ('
+                'station TEXT NOT NULL, version TEXT NOT NULL, date_reference TEXT NOT NULL, '
+                'calcule_le TEXT NOT NULL, contenu TEXT NOT NULL, '
+                'PRIMARY KEY (station, version, date_reference)) WITHOUT ROWID'
+            )
+
+    def fermer(self):
+        self._connexion.close()
+
+    def enregistrer(self, station, version, prevision):
+        """Enregistre les prévisions d'un DataFrame du moteur (dates sans prévision ignorées). Retourne le nombre de dates."""
+        prevision = prevision.dropna(subset=['Tmax_Prevue'])
+        calcule_le = datetime.now().isoformat(timespec='seconds')
+        lignes = []
+        for date_ref, groupe in prevision.groupby('date_reference', sort=True):
+            contenu = groupe.assign(date_reference=groupe['date_reference'].dt.strftime('%Y-%m-%d'),
+                                    date_prevue=groupe['date_prevue'].dt.strftime('%Y-%m-%d'))
+            lignes.append((station, version, date_ref.strftime('%Y-%m-%d'), calcule_le,
+                           contenu.to_json(orient='split', index=False)))
+        with self._verrou, self._connexion:
+            self._connexion.executemany('INSERT OR REPLACE INTO previsions VALUES (?, ?, ?, ?, ?)', lignes)
+        return len(lignes)
+
+    def purger(self, station, version):
+        """Supprime les prévisions de la station calculées avec une autre version du modèle. Retourne le nombre de lignes."""
+        prefixe = f'{version}:'
+        with self._verrou, self._connexion:
+            return self._connexion.execute(
+                'DELETE FROM previsions WHERE station = ? AND substr(version, 1, ?) != ?',
+                (station, len(prefixe), prefixe)).rowcount
+
+    def lire(self, station, version, date_ref):
+        """Prévision précalculée (même format que `MoteurPrevision.prevoir`) ou None."""
+        with self._verrou:
+            ligne = self._connexion.execute(
+                'SELECT contenu FROM previsions WHERE station = ? AND version = ? AND date_reference = ?',
+                (station, version, _en_date(date_ref).isoformat())).fetchone()
+        if ligne is None:
+            return None
+        contenu = json.loads(ligne[0])
+        prevision = pd.DataFrame(contenu['data'], columns=contenu['columns'])
+        for colonne in ('date_reference', 'date_prevue'):
+            prevision[colonne] = pd.to_datetime(prevision[colonne])
+        return prevision
+
+
+def plage_dates(aujourd_hui=None, jours=JOURS_PRECALCULES):
+    """Dates de référence sélectionnables : (aujourd'hui + 1) - `jours` .. aujourd'hui + 1."""
+    fin = (_en_date(aujourd_hui) if aujourd_hui is not None else date.today()) + timedelta(days=1)
+    return fin - timedelta(days=jours), fin
+
+
+def prochaine_execution(maintenant, heure=HEURE_RAFRAICHISSEMENT):
+    """Prochain passage à `heure` (HH:MM) strictement après `maintenant`."""
+    heures, minutes = (int(partie) for partie in heure.split(':'))
+    prochaine = maintenant.replace(hour=heures, minute=minutes, second=0, microsecond=0)
+    return prochaine if prochaine > maintenant else prochaine + timedelta(days=1)
+
+
+def rafraichir_station(station, moteur, version, stock, previsions, source, aujourd_hui=None, jours=JOURS_PRECALCULES):
+    """
+    Synchronise les observations de la station (repli sur le stock existant si la source échoue)
+    puis précalcule toute la plage de dates sélectionnables en un lot, enregistrée sous la configuration
+    du moteur (`cle_previsions`) ; les prévisions des autres versions du modèle sont supprimées.
+    Retourne l'état de la station.
+    """
+    debut, fin = plage_dates(aujourd_hui, jours)
+    hier = fin - timedelta(days=2)  # dernier jour complet côté source (même borne que `synchroniser`)
+    etat = {'rafraichi_le': datetime.now().isoformat(timespec='seconds'), 'erreur': None, 'jours_ajoutes': 0}
+    try:
+        with chrono('prechargement.synchronisation'):
+            etat['jours_ajoutes'] = stock.synchroniser(station, source, debut - timedelta(days=moteur.taille_historique), hier)
+    except Exception as e:
+        etat['erreur'] = str(e)
+    derniere = stock.derniere_date(station)
+    etat['observations_jusqu_au'] = derniere.isoformat() if derniere else None
+    # Données obsolètes : la source a échoué ou n'a pas encore publié la veille
+    etat['obsolete'] = derniere is None or derniere < hier
+
+    with chrono('prechargement.previsions'):
+        observations = stock.lire(station, debut - timedelta(days=moteur.taille_historique), hier)
+        prevision = moteur.prevoir(observations, pd.date_range(debut, fin))
+        etat['dates_precalculees'] = previsions.enregistrer(station, cle_previsions(version, moteur), prevision)
+        etat['previsions_purgees'] = previsions.purger(station, version)
+    return etat
+
+
+class Prechargement:
+    """
+    Rafraîchissement planifié des stations suivies dans un fil démon : une fois par jour à `heure`,
+    et immédiatement quand une station (ou une nouvelle version de son modèle) est suivie.
+    """
+
+    def __init__(self, stock, previsions, source, heure=HEURE_RAFRAICHISSEMENT, jours=JOURS_PRECALCULES,
+                 horloge=datetime.now):
+        self.stock = stock
+        self.previsions = previsions
+        self.source = source
+        self.heure = heure
+        self.jours = jours
+        self.horloge = horloge
+        self.etats = {}  # station -> état du dernier rafraîchissement
+        self._stations = {}  # station -> (moteur, version)
+        self._a_rafraichir = set()
+        self._verrou = threading.Lock()
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self._rafraichies = {}  # station -> Event levé après le premier rafraîchissement
+        self._fil = None
+
+    def demarrer(self):
+        if self._fil is None:
+            self._fil = threading.Thread(target=self._boucle, name='prechargement', daemon=True)
+            self._fil.start()
+        return self
+
+    def arreter(self):
+        self._arret.set()
+        self._reveil.set()
+
+    def suivre(self, station, moteur, version):
+        """Ajoute une station (ou met à jour son modèle) ; un rafraîchissement est lancé si elle est nouvelle."""
+        with self._verrou:
+            nouvelle = self._stations.get(station, (None, None))[1] != version
+            self._stations[station] = (moteur, version)
+            self._rafraichies.setdefault(station, threading.Event())
+            if nouvelle:
+                self._a_rafraichir.add(station)
+        if nouvelle:
+            self._reveil.set()
+
+    def attendre(self, station, delai):
+        """Attend (au plus `delai` s) le premier rafraîchissement d'une station suivie ; retourne True s'il a eu lieu."""
+        with self._verrou:
+            evenement = self._rafraichies.get(station)
+        return evenement is not None and evenement.wait(delai)
+
+    def rafraichir(self, stations=None):
+        """Rafraîchit les stations demandées (toutes les stations suivies par défaut), dans le fil appelant."""
+        with self._verrou:
+            cibles = {station: self._stations[station] for station in (stations or list(self._stations))}
+        for station, (moteur, version) in cibles.items():
+            try:
+                etat = rafraichir_station(station, moteur, version, self.stock, self.previsions, self.source,
+                                          self.horloge().date(), self.jours)
+            except Exception as e:
+                etat = {'rafraichi_le': self.horloge().isoformat(timespec='seconds'), 'erreur': str(e), 'obsolete': True}
+            self.etats[station] = etat
+            self._rafraichies[station].set()
+
+    def _boucle(self):
+        prochaine = prochaine_execution(self.horloge(), self.heure)
+        while not self._arret.is_set():
+            with self._verrou:
+                stations, self._a_rafraichir = self._a_rafraichir, set()
+            if stations:
+                self.rafraichir(stations)
+            if self.horloge() >= prochaine:
+                self.rafraichir()
+                prochaine = prochaine_execution(self.horloge(), self.heure)
+            self._reveil.wait(max(0.0, (prochaine - self.horloge()).total_seconds()))
+            self._reveil.clear()
+
+
+def main():
+    from meteo.observations import SourceCSV, SourceMeteostat
+    from meteo.stations import STATION_DEFAUT, charger_station
+
+    parser = argparse.ArgumentParser(description="Rafraîchit une fois le stock d'observations et les prévisions précalculées.")
+    parser.add_argument('--station', default=STATION_DEFAUT)
+    parser.add_argument('--source', default='meteostat', help="'meteostat' ou chemin d'un CSV local (essai hors ligne).")
+    parser.add_argument('--stock', default=STOCK_PATH)
+    parser.add_argument('--aujourdhui', default=None, help="Date du jour simulée (YYYY-MM-DD), pour rejouer une date passée.")
+    parser.add_argument('--backend', default='compile')
+    parser.add_argument('--horizon', type=int, default=int(os.environ.get('METEO_HORIZON', 2)))
+    args = parser.parse_args()
+
+    source = SourceMeteostat() if args.source == 'meteostat' else SourceCSV(args.source)
+    moteur, _, version, _ = charger_station(args.station, args.backend, args.horizon)
+    debut = time.perf_counter()
+    etat = rafraichir_station(args.station, moteur, version, StockObservations(args.stock), StockPrevisions(args.stock),
+                              SourceResiliente(source), args.aujourdhui)
+    print(json.dumps({'station': args.station, 'version': version, **etat,
+                      'duree_s': round(time.perf_counter() - debut, 3)}, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
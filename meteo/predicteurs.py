@@ -0,0 +1,182 @@
+"""
+Interface commune des prédicteurs et backends interchangeables :
+
+  - 'sklearn' : le `MultiOutputRegressor` pické (final_model.pkl) ;
+  - 'booster' : un `xgboost.Booster` natif par cible, via `inplace_predict` ;
+  - 'compile' : l'ensemble d'arbres exporté en tableaux NumPy (arbres binaires
+    complets) et parcouru niveau par niveau pour toutes les lignes et tous les
+    arbres à la fois (aucune dépendance à xgboost ni à scikit-learn à l'exécution).
+
+Le backend compilé a la plus faible latence sur une ligne (application, API) ;
+`inplace_predict` reste plus rapide sur les grands lots (voir benchmarks/bench_predicteurs.py).
+
+Tous exposent `predict(X) -> (n_lignes, n_cibles)`, `feature_order` et `cibles`.
+"""
+import json
+
+import numpy as np
+
+# --- CONFIGURATION ---
+BACKENDS = ('sklearn', 'booster', 'compile')
+OBJECTIFS_IDENTITE = ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror')
+ELEMENTS_PAR_BLOC = 2_000_000  # lignes x arbres parcourus simultanément par le backend compilé
+# --- FIN CONFIGURATION ---
+
+
+class Predicteur:
+    """Interface : prédiction multi-sortie sur une matrice float32 dans l'ordre `feature_order`."""
+
+    backend = None
+
+    def __init__(self, feature_order, cibles):
+        self.feature_order = list(feature_order)
+        self.cibles = list(cibles)
+
+    def predict(self, X):
+        raise NotImplementedError
+
+
+class PredicteurSklearn(Predicteur):
+    """Backend 'sklearn' : le MultiOutputRegressor d'origine."""
+
+    backend = 'sklearn'
+
+    def __init__(self, multi_output_model, cibles):
+        super().__init__(multi_output_model.estimators_[0].get_booster().feature_names, cibles)
+        self.modele = multi_output_model
+
+    def predict(self, X):
+        return self.modele.predict(np.asarray(X, dtype=np.float32))
+
+
+class PredicteurBooster(Predicteur):
+    """Backend 'booster' : un booster XGBoost natif par cible (même sortie que le MultiOutputRegressor)."""
+
+    backend = 'booster'
+
+    def __init__(self, boosters, feature_order, cibles):
+        super().__init__(feature_order, cibles)
+        self.boosters = boosters
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        return np.column_stack([booster.inplace_predict(X) for booster in self.boosters])
+
+
+# --- BACKEND COMPILÉ ---
+
+def _lire_base_score(valeur):
+    """base_score est sérialisé '3.07E1' (XGBoost 2.0) ou '[3.07E1]' (versions récentes)."""
+    return float(str(valeur).strip('[]'))
+
+
+def _profondeurs(enfants_g, enfants_d):
+    """Profondeur de chaque nœud (les parents précèdent toujours leurs enfants dans le JSON XGBoost)."""
+    profondeurs = np.zeros(len(enfants_g), dtype=np.int32)
+    for noeud in np.flatnonzero(enfants_g >= 0):
+        profondeurs[enfants_g[noeud]] = profondeurs[enfants_d[noeud]] = profondeurs[noeud] + 1
+    return profondeurs
+
+
+def compiler_boosters(boosters):
+    """
+    Convertit des boosters XGBoost (un par cible) en tableaux NumPy pour PredicteurCompile.
+
+    Chaque arbre est complété en arbre binaire complet de profondeur D : au niveau d,
+    le nœud p a pour enfants 2p (gauche) et 2p + 1 (droite). Une feuille située plus
+    haut est prolongée par des nœuds qui envoient toujours à gauche, et sa valeur est
+    recopiée au niveau D. Le parcours n'a donc besoin ni des index d'enfants ni de
+    test de feuille.
+    """
+    arbres, groupes, base_scores = [], [], []
+    for groupe, booster in enumerate(boosters):
+        learner = json.loads(booster.save_raw('json'))['learner']
+        if learner['objective']['name'] not in OBJECTIFS_IDENTITE:
+            raise ValueError(f"Objectif non pris en charge par le backend compilé : {learner['objective']['name']}")
+        base_scores.append(_lire_base_score(learner['learner_model_param']['base_score']))
+        for arbre in learner['gradient_booster']['model']['trees']:
+            arbres.append(arbre)
+            groupes.append(groupe)
+
+    structures = []
+    for arbre in arbres:
+        enfants_g = np.array(arbre['left_children'], dtype=np.int32)
+        enfants_d = np.array(arbre['right_children'], dtype=np.int32)
+        structures.append((enfants_g, enfants_d, _profondeurs(enfants_g, enfants_d)))
+    profondeur = max(int(p.max()) for _, _, p in structures)
+
+    n_arbres = len(arbres)
+    tableaux = {'profondeur': np.array(profondeur),
+                'groupes': np.array(groupes, dtype=np.int16),
+                'base_scores': np.array(base_scores, dtype=np.float64)}
+    # Valeurs par défaut : nœud « toujours à gauche » (seuil +inf, valeurs manquantes à gauche)
+    caracteristiques = [np.zeros((n_arbres, 2 ** d), dtype=np.int32) for d in range(profondeur)]
+    seuils = [np.full((n_arbres, 2 ** d), np.inf, dtype=np.float32) for d in range(profondeur)]
+    defauts = [np.ones((n_arbres, 2 ** d), dtype=bool) for d in range(profondeur)]
+    feuilles = np.zeros((n_arbres, 2 ** profondeur), dtype=np.float32)
+
+    for t, (arbre, (enfants_g, enfants_d, _)) in enumerate(zip(arbres, structures)):
+        # Parcours en largeur : (nœud XGBoost, niveau, position dans le niveau)
+        pile = [(0, 0, 0)]
+        while pile:
+            noeud, d, p = pile.pop()
+            if enfants_g[noeud] < 0:
+                # Dans le JSON XGBoost, la valeur d'une feuille est stockée dans split_conditions
+                etendue = 2 ** (profondeur - d)
+                feuilles[t, p * etendue:(p + 1) * etendue] = arbre['split_conditions'][noeud]
+                continue
+            caracteristiques[d][t, p] = arbre['split_indices'][noeud]
+            seuils[d][t, p] = arbre['split_conditions'][noeud]
+            defauts[d][t, p] = bool(arbre['default_left'][noeud])
+            pile.append((enfants_g[noeud], d + 1, 2 * p))
+            pile.append((enfants_d[noeud], d + 1, 2 * p + 1))
+
+    for d in range(profondeur):
+        tableaux[f'caracteristique_{d}'] = caracteristiques[d].ravel()
+        tableaux[f'seuil_{d}'] = seuils[d].ravel()
+        tableaux[f'defaut_gauche_{d}'] = defauts[d].ravel()
+    tableaux['feuilles'] = feuilles.ravel()
+    return tableaux
+
+
+class PredicteurCompile(Predicteur):
+    """Backend 'compile' : parcours vectorisé NumPy de l'ensemble d'arbres exporté."""
+
+    backend = 'compile'
+
+    def __init__(self, tableaux, feature_order, cibles):
+        super().__init__(feature_order, cibles)
+        self.t = {nom: np.asarray(tableau) for nom, tableau in tableaux.items()}
+        self.profondeur = int(self.t['profondeur'])
+        n_arbres = len(self.t['groupes'])
+        self._arbres = np.arange(n_arbres, dtype=np.int32)
+        # Matrice (arbres x cibles) : somme des feuilles de chaque cible en un seul produit
+        self._affectation = np.zeros((n_arbres, len(self.cibles)), dtype=np.float64)
+        self._affectation[self._arbres, self.t['groupes']] = 1.0
+        self._lignes_par_bloc = max(1, ELEMENTS_PAR_BLOC // max(n_arbres, 1))
+
+    def _predire_bloc(self, X):
+        t = self.t
+        lignes = np.arange(X.shape[0])[:, None]
+        manquants = np.isnan(X).any()
+        # Position courante de chaque (ligne, arbre) dans le niveau d
+        positions = np.zeros((X.shape[0], len(self._arbres)), dtype=np.int32)
+        for d in range(self.profondeur):
+            index = self._arbres * (2 ** d) + positions
+            x = X[lignes, t[f'caracteristique_{d}'][index]]
+            a_droite = x >= t[f'seuil_{d}'][index]
+            if manquants:
+                a_droite = np.where(np.isnan(x), ~t[f'defaut_gauche_{d}'][index], a_droite)
+            positions = 2 * positions + a_droite
+        feuilles = t['feuilles'][self._arbres * (2 ** self.profondeur) + positions]
+        return feuilles.astype(np.float64) @ self._affectation + t['base_scores']
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        sortie = np.empty((X.shape[0], len(self.cibles)), dtype=np.float32)
+        for debut in range(0, X.shape[0], self._lignes_par_bloc):
+            fin = debut + self._lignes_par_bloc
+            sortie[debut:fin] = self._predire_bloc(X[debut:fin])
+        return sortie
@@ -0,0 +1,207 @@
+"""
+Moteur de prévision par lots pour N dates de référence à la fois, horizon H de 1 à 7 jours,
+selon deux modes :
+
+  - 'recursif' : J+1 direct puis chaque horizon suivant à partir des prévisions précédentes,
+    un appel `predict` par horizon sur le lot complet (H + 1 appels, quel que soit N). Le modèle
+    prévoit le jour D+1 à partir des observations jusqu'à D-1 et du calendrier de D : le jour J,
+    pas encore observé, est d'abord prévu depuis J-1 ; chaque horizon h part ensuite du calendrier
+    de J+h-1 et des jours J..J+h-2 prévus, comme à l'entraînement. Quand le
+    modèle exporte aussi les sorties quantiles (meteo/intervalles.py), ces mêmes appels
+    renvoient les bornes des intervalles de prévision ;
+  - 'direct' : un modèle par horizon (cibles J+h du script 02, entraînées par le script 03
+    avec `--horizon-direct`), tous évalués en un seul appel `predict` sur les features de J.
+
+La matrice de features de toutes les dates est construite en une seule passe NumPy.
+Les 7 jours J-7..J-1 (lags) doivent être observés (Tmax et Tmin renseignées) ; les statistiques glissantes du modèle
+remontent jusqu'à `taille_historique` jours avant J et ignorent les jours manquants.
+"""
+import numpy as np
+import pandas as pd
+
+from meteo.features import COLONNES_OBSERVATIONS, HORIZON_MAX, TARGET_COLUMNS, ConstructeurFeatures, cibles_horizon
+from meteo.instrumentation import chrono, compter
+from meteo.intervalles import QUANTILES, colonne_intervalle, colonne_quantile
+
+# --- CONFIGURATION ---
+TAILLE_FENETRE = 7  # J-7 à J-1 : jours qui doivent tous être observés (lags)
+COLONNES_REQUISES = ['temperature_max_jour', 'temperature_min_jour']  # un jour sans ces valeurs n'est pas observé
+HORIZON = 2
+MODES = ('recursif', 'direct')
+# --- FIN CONFIGURATION ---
+
+
+def _decalage_calendrier(h):
+    """
+    Décalage (en jours) entre la date de référence J et la date calendaire des features de l'étape h
+    (prévision du jour J+h) : celui de la ligne D = J+h-1 dont la cible est D+1, comme à l'entraînement.
+    L'étape 0 (jour J, qui alimente les lags des horizons suivants) part de J-1.
+    """
+    return h - 1
+
+
+class MoteurPrevision:
+    """Prévisions Tmax/Tmin pour plusieurs dates de référence en appels `predict` groupés."""
+
+    def __init__(self, modele, feature_order, horizon=HORIZON, corrections=None, mode='recursif'):
+        """
+        `corrections` : marges conformales {horizon: {cible: marge}} du manifeste, appliquées
+        de part et d'autre des bornes quantiles (le dernier horizon calibré vaut pour les suivants).
+        `mode` : 'recursif' ou 'direct' (le modèle doit alors fournir les cibles J+1..J+H).
+        """
+        if mode not in MODES:
+            raise ValueError(f"Mode de prévision inconnu : {mode} (attendu : {', '.join(MODES)})")
+        if not 1 <= horizon <= HORIZON_MAX:
+            raise ValueError(f"L'horizon doit être compris entre 1 et {HORIZON_MAX} jours.")
+        self.modele = modele
+        self.feature_order = list(feature_order)
+        self.horizon = horizon
+        self.mode = mode
+        self.constructeur = ConstructeurFeatures(self.feature_order)
+        if self.constructeur.lag_max > TAILLE_FENETRE:
+            raise ValueError(f"Les lags du modèle dépassent la fenêtre d'observation de {TAILLE_FENETRE} jours.")
+        # Jours d'observations lus avant J (statistiques glissantes comprises) : taille des fenêtres à fournir ;
+        # un jour de plus en récursif au-delà de J+1, pour prévoir le jour J depuis J-1
+        self.taille_historique = max(TAILLE_FENETRE, self.constructeur.taille_fenetre)
+        if mode == 'recursif' and horizon > 1:
+            self.taille_historique += 1
+
+        sorties = list(getattr(modele, 'cibles', TARGET_COLUMNS))
+        if mode == 'direct':
+            # Colonnes de sortie : Tmax/Tmin de chaque horizon, sans bornes
+            attendues = [c for h in range(1, horizon + 1) for c in cibles_horizon(h)]
+            manquantes = [c for c in attendues if c not in sorties]
+            if manquantes:
+                raise ValueError(f"Le modèle ne fournit pas les cibles directes : {', '.join(manquantes)}")
+            self.quantiles = []
+            self._sorties = [sorties.index(c) for c in attendues]
+        else:
+            # Colonnes de sortie : Tmax/Tmin ponctuelles, puis les bornes si le modèle les fournit
+            self.quantiles = [q for q in QUANTILES if all(colonne_quantile(c, q) in sorties for c in TARGET_COLUMNS)]
+            self._sorties = [sorties.index(c) for c in TARGET_COLUMNS]
+            self._sorties += [sorties.index(colonne_quantile(c, q)) for q in self.quantiles for c in TARGET_COLUMNS]
+        self.n_sorties = len(TARGET_COLUMNS) * (1 + len(self.quantiles))  # par horizon
+
+        self._marges = np.zeros((horizon, len(TARGET_COLUMNS)), dtype=np.float32)
+        if corrections:
+            calibres = sorted(int(h) for h in corrections)
+            for h in range(1, horizon + 1):
+                reference = corrections[str(min(h, calibres[-1]))]
+                self._marges[h - 1] = [reference.get(c, 0.0) for c in TARGET_COLUMNS]
+
+    def fenetres_depuis_observations(self, df_observations, dates_ref):
+        """
+        Extrait, pour chaque date de référence J, les observations des `taille_historique` jours précédents.
+
+        Retourne (fenetres, valides) : un tableau float32 (N, taille_historique, 4), alignée sur le
+        calendrier (NaN pour un jour absent), et un masque booléen (N,) qui vaut False quand les
+        7 jours J-7 à J-1 ne sont pas tous disponibles.
+        """
+        df = df_observations.sort_index()
+        return self.fenetres_depuis_tableaux(df.index.values.astype('datetime64[D]'),
+                                             df[COLONNES_OBSERVATIONS].to_numpy(dtype=np.float32), dates_ref)
+
+    def fenetres_depuis_tableaux(self, dates_obs, valeurs, dates_ref):
+        """
+        Comme `fenetres_depuis_observations`, à partir de tableaux : dates des observations
+        (datetime64[D], triées, sans doublon) et valeurs (n, 4) dans l'ordre COLONNES_OBSERVATIONS.
+        """
+        dates_ref = np.asarray(dates_ref, dtype='datetime64[D]')
+
+        # Position de chaque jour J-W..J-1 parmi les observations, s'il y est
+        jours = dates_ref[:, None] - np.arange(self.taille_historique, 0, -1).astype('timedelta64[D]')
+        positions = np.clip(np.searchsorted(dates_obs, jours), 0, max(len(dates_obs) - 1, 0))
+        presents = dates_obs[positions] == jours if len(dates_obs) else np.zeros(jours.shape, dtype=bool)
+
+        fenetres = np.full((len(dates_ref), self.taille_historique, len(COLONNES_OBSERVATIONS)), np.nan, np.float32)
+        if len(dates_obs):
+            fenetres[presents] = valeurs[positions[presents]]
+        # Un jour stocké avec Tmax ou Tmin manquante (valeur pas encore publiée) compte comme absent
+        requises = [COLONNES_OBSERVATIONS.index(colonne) for colonne in COLONNES_REQUISES]
+        observes = presents & ~np.isnan(fenetres[:, :, requises]).any(axis=2)
+        valides = observes[:, -TAILLE_FENETRE:].all(axis=1)
+        return fenetres, valides
+
+    def prevoir_fenetres(self, fenetres, dates_ref):
+        """
+        Prévoit les horizons 1..H pour N fenêtres (N, W, 4) d'observations J-W à J-1 (W = `taille_historique`).
+
+        Retourne un tableau (N, H, 2 + 2Q) : Tmax/Tmin prévues, puis pour chaque quantile
+        les bornes Tmax/Tmin (élargies des marges conformales, et jamais du mauvais côté du point).
+        Pour h >= 2, les prévisions ponctuelles des jours J..J+h-2 (le jour J étant prévu d'abord,
+        depuis J-1) sont réinjectées comme observations, avec la précipitation et le vent du dernier
+        jour observé (J-1) supposés persistants.
+        En mode 'direct', (N, H, 2) en un seul appel `predict`, sans réinjection.
+        """
+        dates_ref = np.asarray(dates_ref, dtype='datetime64[D]')
+        n = fenetres.shape[0]
+        resultats = np.empty((n, self.horizon, self.n_sorties), dtype=np.float32)
+        if n == 0:
+            return resultats
+
+        compter('moteur.dates_prevues', n)
+        if self.mode == 'direct':
+            # Un seul appel : les features de J (calendrier de J, lags J-1..J-7) alimentent tous les horizons
+            with chrono('moteur.features'):
+                X = self.constructeur.construire_lot(fenetres, self.taille_historique, dates_ref)
+            with chrono('moteur.predict'):
+                predictions = np.asarray(self.modele.predict(X), dtype=np.float32)[:, self._sorties]
+            return predictions.reshape(n, self.horizon, self.n_sorties)
+
+        # Ligne `position` = jour D (features des jours précédents, calendrier de D), cible D+1 ;
+        # la prévision de D+1 remplit la ligne suivante pour l'étape d'après
+        serie = np.empty((n, self.taille_historique + self.horizon, fenetres.shape[2]), dtype=np.float32)
+        serie[:, :self.taille_historique] = fenetres
+        for h in range(0 if self.horizon > 1 else 1, self.horizon + 1):
+            position = self.taille_historique + h - 1
+            dates_calendrier = dates_ref + np.timedelta64(_decalage_calendrier(h), 'D')
+            with chrono('moteur.features'):
+                X = self.constructeur.construire_lot(serie, position, dates_calendrier)
+            with chrono('moteur.predict'):
+                predictions = np.asarray(self.modele.predict(X), dtype=np.float32)[:, self._sorties]
+            if h >= 1:
+                resultats[:, h - 1] = predictions
+            if h < self.horizon:
+                serie[:, position + 1, :2] = predictions[:, :2]
+                serie[:, position + 1, 2:] = fenetres[:, -1, 2:]
+
+        # Bornes : marge conformale de l'horizon, puis ordre bas <= point <= haut
+        points = resultats[:, :, None, :2]
+        bornes = resultats[:, :, 2:].reshape(n, self.horizon, len(self.quantiles), 2)
+        signes = np.where(np.asarray(self.quantiles) < 0.5, -1.0, 1.0)[:, None]
+        bornes = bornes + signes * self._marges[:, None, :]
+        bornes = np.where(signes < 0, np.minimum(bornes, points), np.maximum(bornes, points))
+        resultats[:, :, 2:] = bornes.reshape(n, self.horizon, -1)
+        return resultats
+
+    def prevoir(self, df_observations, dates_ref):
+        """
+        Prévisions J+1..J+H pour chaque date de référence à partir d'un historique journalier.
+
+        Retourne un DataFrame long (une ligne par date de référence et par horizon) avec les
+        colonnes date_reference, horizon, date_prevue, Tmax_Prevue et Tmin_Prevue, suivies des
+        bornes (Tmax_Q10, Tmin_Q10, Tmax_Q90, Tmin_Q90) si le modèle les fournit. Les dates
+        sans les 7 jours J-7..J-1 observés ont des prévisions NaN.
+        """
+        dates_ref = np.asarray(pd.to_datetime(dates_ref).values, dtype='datetime64[D]')
+        with chrono('moteur.fenetres'):
+            fenetres, valides = self.fenetres_depuis_observations(df_observations, dates_ref)
+
+        predictions = np.full((len(dates_ref), self.horizon, self.n_sorties), np.nan, dtype=np.float32)
+        predictions[valides] = self.prevoir_fenetres(fenetres[valides], dates_ref[valides])
+        return self.tableau(dates_ref, predictions)
+
+    def tableau(self, dates_ref, predictions):
+        """DataFrame long de `prevoir` à partir des prévisions (N, H, 2 + 2Q) de `prevoir_fenetres`."""
+        dates_ref = np.asarray(dates_ref, dtype='datetime64[D]')
+        horizons = np.arange(1, self.horizon + 1)
+        colonnes = {
+            'date_reference': pd.to_datetime(np.repeat(dates_ref, self.horizon)),
+            'horizon': np.tile(horizons, len(dates_ref)),
+            'date_prevue': pd.to_datetime((dates_ref[:, None] + horizons.astype('timedelta64[D]')).ravel()),
+            'Tmax_Prevue': predictions[:, :, 0].ravel(),
+            'Tmin_Prevue': predictions[:, :, 1].ravel(),
+        }
+        for k, (q, cible) in enumerate((q, c) for q in self.quantiles for c in TARGET_COLUMNS):
+            colonnes[colonne_intervalle(cible, q)] = predictions[:, :, 2 + k].ravel()
+        return pd.DataFrame(colonnes)
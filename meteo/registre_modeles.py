@@ -0,0 +1,245 @@
+"""
+Registre versionné des modèles d'une station.
+
+Chaque entraînement (script 03) écrit une nouvelle version dans un dossier temporaire
+`<racine>/versions/.<version>.tmp/` (boosters, ensemble compilé, manifeste, normales, modèle
+direct) sans toucher aux versions existantes. À la publication, ce dossier est renommé en
+`<racine>/versions/<version>/` : un entraînement interrompu ne laisse aucune version incomplète
+parmi les versions listées, conservées ou activables (seules celles qui ont un manifeste le sont).
+La version ne devient active qu'une fois complet, par le remplacement atomique (`os.replace`)
+du pointeur `<racine>/courant.json`, qui garde aussi l'historique des versions activées :
+un processus qui lit le modèle voit l'ancienne version ou la nouvelle, jamais un mélange.
+
+Les processus en cours (application, service) surveillent le pointeur (`CacheModeles` de
+meteo/stations.py), chargent la nouvelle version en arrière-plan puis la substituent ; les
+prévisions en cours gardent l'ancienne. Sans pointeur, la racine elle-même est le modèle
+(disposition historique à plat) ; elle est importée comme première version à la première publication.
+
+Usage :
+    python -m meteo.registre_modeles lister [--station 64450]
+    python -m meteo.registre_modeles revenir [--station 64450]      # version précédente
+    python -m meteo.registre_modeles activer 20261017-063000 [--station 64450]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+# --- CONFIGURATION ---
+POINTEUR = 'courant.json'
+SOUS_DOSSIER_VERSIONS = 'versions'
+VERSIONS_CONSERVEES = 5  # versions gardées sur disque (la version active et les dernières activées)
+SUFFIXE_IMPORT = 'initiale'  # version créée à partir de la disposition à plat
+NON_IMPORTES = {SOUS_DOSSIER_VERSIONS, POINTEUR, 'stations', 'pipeline.log'}
+SUFFIXE_TEMPORAIRE = '.tmp'  # version en cours d'écriture : versions/.<version>.tmp/
+DELAI_ABANDON_S = 24 * 3600  # dossier temporaire plus ancien : entraînement interrompu, supprimé par `purger`
+# --- FIN CONFIGURATION ---
+
+
+def lire_pointeur(racine):
+    """Contenu du pointeur ({'version', 'active_le', 'historique'}), ou None sans registre."""
+    try:
+        with open(os.path.join(racine, POINTEUR), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def version_courante(racine):
+    """Version active de la racine, ou None (disposition à plat)."""
+    pointeur = lire_pointeur(racine)
+    return pointeur['version'] if pointeur else None
+
+
+def dossier_version(racine, version):
+    return os.path.join(racine, SOUS_DOSSIER_VERSIONS, version)
+
+
+def dossier_courant(racine):
+    """Dossier des artefacts actifs : la version pointée, ou la racine elle-même sans registre."""
+    version = version_courante(racine)
+    return dossier_version(racine, version) if version else racine
+
+
+def dossier_temporaire(racine, version):
+    return os.path.join(racine, SOUS_DOSSIER_VERSIONS, f'.{version}{SUFFIXE_TEMPORAIRE}')
+
+
+def est_complete(racine, version):
+    """Vrai si la version est publiée sur disque avec son manifeste."""
+    from meteo.modeles import MANIFESTE
+
+    return os.path.exists(os.path.join(dossier_version(racine, version), MANIFESTE))
+
+
+def versions(racine):
+    """
+    Versions complètes présentes sur disque, de la plus ancienne à la plus récente (l'identifiant
+    commence par la date) ; les dossiers temporaires et les versions sans manifeste sont ignorés.
+    """
+    dossier = os.path.join(racine, SOUS_DOSSIER_VERSIONS)
+    if not os.path.isdir(dossier):
+        return []
+    return sorted(nom for nom in os.listdir(dossier) if not nom.startswith('.') and est_complete(racine, nom))
+
+
+def nouvelle_version(racine, suffixe=None, date=None):
+    """
+    Réserve une nouvelle version, datée de `date` ou de maintenant, et crée son dossier temporaire.
+    Retourne (version, dossier temporaire) ; `finaliser` (appelé par `publier`) le met en place.
+    """
+    base = (date or datetime.now()).strftime('%Y%m%d-%H%M%S') + (f'-{suffixe}' if suffixe else '')
+    version, n = base, 1
+    while os.path.exists(dossier_version(racine, version)) or os.path.exists(dossier_temporaire(racine, version)):
+        n += 1
+        version = f'{base}-{n}'
+    os.makedirs(dossier_temporaire(racine, version))
+    return version, dossier_temporaire(racine, version)
+
+
+def finaliser(racine, version):
+    """Renomme le dossier temporaire d'une version (manifeste écrit) en dossier définitif ; retourne ce dossier."""
+    from meteo.modeles import MANIFESTE
+
+    temporaire = dossier_temporaire(racine, version)
+    if os.path.isdir(temporaire):
+        if not os.path.exists(os.path.join(temporaire, MANIFESTE)):
+            raise ValueError(f"Version {version} incomplète (pas de {MANIFESTE} dans {temporaire}).")
+        os.replace(temporaire, dossier_version(racine, version))
+    return dossier_version(racine, version)
+
+
+def _ecrire_pointeur(racine, contenu):
+    """Remplace le pointeur de façon atomique (fichier temporaire dans le même dossier puis `os.replace`)."""
+    descripteur, temporaire = tempfile.mkstemp(prefix='.courant.', suffix='.json', dir=racine)
+    with os.fdopen(descripteur, 'w', encoding='utf-8') as f:
+        json.dump(contenu, f, ensure_ascii=False, indent=2)
+    os.replace(temporaire, os.path.join(racine, POINTEUR))
+
+
+def _importer_plat(racine):
+    """Copie le modèle à plat de la racine dans une version (pour pouvoir y revenir) ; retourne la version ou None."""
+    from meteo.modeles import MANIFESTE
+
+    chemin = os.path.join(racine, MANIFESTE)
+    if not os.path.exists(chemin):
+        return None
+    # Datée de l'écriture du modèle à plat : elle reste plus ancienne que les versions publiées depuis
+    version, dossier = nouvelle_version(racine, SUFFIXE_IMPORT, datetime.fromtimestamp(os.path.getmtime(chemin)))
+    for nom in os.listdir(racine):
+        source = os.path.join(racine, nom)
+        if nom in NON_IMPORTES or nom.startswith('.') or nom.endswith('.partage'):
+            continue
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(dossier, nom), ignore=shutil.ignore_patterns('*.partage'))
+        else:
+            shutil.copy2(source, dossier)
+    finaliser(racine, version)
+    return version
+
+
+def activer(racine, version, historique=None):
+    """Fait pointer la racine sur `version` (complète, avec manifeste) ; la version remplacée rejoint l'historique."""
+    if not est_complete(racine, version):
+        raise ValueError(f"Version inconnue ou incomplète : {version} (versions : {', '.join(versions(racine)) or 'aucune'})")
+    pointeur = lire_pointeur(racine)
+    if historique is None:
+        historique = list(pointeur['historique']) if pointeur else []
+        if pointeur and pointeur['version'] != version:
+            historique.append(pointeur['version'])
+    _ecrire_pointeur(racine, {'version': version, 'active_le': datetime.now().isoformat(timespec='seconds'),
+                              'historique': historique})
+    return version
+
+
+def publier(racine, version, conservees=VERSIONS_CONSERVEES):
+    """
+    Met en place (`finaliser`) puis active une version fraîchement écrite. À la première publication,
+    le modèle à plat de la racine devient la version précédente. Les versions les plus anciennes
+    sont ensuite supprimées.
+    """
+    finaliser(racine, version)
+    if lire_pointeur(racine) is None:
+        ancienne = _importer_plat(racine)
+        if ancienne:
+            activer(racine, ancienne)
+    activer(racine, version)
+    purger(racine, conservees)
+    return version
+
+
+def revenir(racine, version=None):
+    """Revient à la version précédemment active (ou à `version`) ; retourne la version réactivée."""
+    pointeur = lire_pointeur(racine)
+    if pointeur is None:
+        raise ValueError(f"Aucun registre de versions dans {racine}.")
+    historique = list(pointeur['historique'])
+    if version is None:
+        # Les versions précédentes supprimées depuis (purge) sont ignorées
+        while historique and not est_complete(racine, historique[-1]):
+            historique.pop()
+        if not historique:
+            raise ValueError(f"Aucune version précédente à réactiver (active : {pointeur['version']}).")
+        version = historique.pop()
+    else:
+        historique.append(pointeur['version'])
+    return activer(racine, version, historique)
+
+
+def purger(racine, conservees=VERSIONS_CONSERVEES):
+    """
+    Supprime les versions hors de la version active et des `conservees` - 1 dernières versions écrites,
+    ainsi que les dossiers temporaires abandonnés (entraînements interrompus depuis DELAI_ABANDON_S).
+    """
+    active = version_courante(racine)
+    gardees = set(versions(racine)[-conservees:]) | {active}
+    for version in versions(racine):
+        if version not in gardees:
+            # Un processus qui mappe encore cette version garde ses pages (Linux) ; ailleurs, la suppression est reportée
+            shutil.rmtree(dossier_version(racine, version), ignore_errors=True)
+    dossier = os.path.join(racine, SOUS_DOSSIER_VERSIONS)
+    for nom in os.listdir(dossier) if os.path.isdir(dossier) else []:
+        chemin = os.path.join(dossier, nom)
+        if nom.startswith('.') and nom.endswith(SUFFIXE_TEMPORAIRE) and time.time() - os.path.getmtime(chemin) > DELAI_ABANDON_S:
+            shutil.rmtree(chemin, ignore_errors=True)
+
+
+def main():
+    from meteo.modeles import MANIFESTE
+    from meteo.stations import STATION_DEFAUT, chemins_station
+
+    parser = argparse.ArgumentParser(description="Versions des modèles d'une station : liste, retour arrière, activation.")
+    parser.add_argument('commande', choices=['lister', 'revenir', 'activer'])
+    parser.add_argument('version', nargs='?', help="Version à activer (commande 'activer').")
+    parser.add_argument('--station', default=os.environ.get('METEO_STATION', STATION_DEFAUT))
+    args = parser.parse_args()
+    racine = chemins_station(args.station)['modeles']
+
+    if args.commande == 'revenir':
+        print(f"Version active : {revenir(racine)}")
+    elif args.commande == 'activer':
+        if not args.version:
+            parser.error("la commande 'activer' attend une version")
+        print(f"Version active : {activer(racine, args.version)}")
+    active = version_courante(racine)
+    if active is None:
+        print(f"{racine} : modèle à plat, sans registre de versions (créé par la prochaine exécution du script 03).")
+        return
+    for version in versions(racine):
+        chemin = os.path.join(dossier_version(racine, version), MANIFESTE)
+        manifeste = {}
+        if os.path.exists(chemin):
+            with open(chemin, encoding='utf-8') as f:
+                manifeste = json.load(f)
+        mae = manifeste.get('mae', {}).get('global')
+        print(f"{'*' if version == active else ' '} {version:24s} MAE {mae if mae is None else round(mae, 3)}  "
+              f"données {manifeste.get('donnees', {}).get('empreinte', 'n/d')} jusqu'au "
+              f"{manifeste.get('entrainement', {}).get('donnees_jusqu_au', 'n/d')}  "
+              f"{len(manifeste.get('feature_order', []))} features")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Service HTTP asynchrone de prévision (asyncio, bibliothèque standard uniquement).
+
+    GET /forecast?date=YYYY-MM-DD&horizon=2&station=64450  ->  Tmax/Tmin prévues (et intervalles 80 %) et écarts
+                                                              aux normales 1991-2020 (station par défaut si omise)
+    GET /sante                                             ->  état du service, stations et modèles chargés
+
+Le stock d'observations est ouvert une fois par processus ; le modèle et les normales
+de chaque station du registre (meteo/stations.py) sont chargés à la première requête
+et gardés dans un cache LRU borné. Les requêtes simultanées pour une même station et
+une même date de référence partagent un seul calcul, et les résultats restent dans un
+cache TTL indexé par (station, date, version du modèle).
+
+Usage (depuis la racine du dépôt) : python -m meteo.service --port 8000
+                                    python -m meteo.service --horizon 7 --mode direct
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+from meteo.instrumentation import MESURES
+
+
+# --- CONFIGURATION ---
+HOTE = '127.0.0.1'
+PORT = 8000
+TTL_SECONDES = 600
+TAILLE_CACHE = 4096
+STATION_ID = '64450' # Brazzaville
+HORIZON = 2  # horizon maximal servi par défaut (jusqu'à 7 avec --horizon)
+# --- FIN CONFIGURATION ---
+
+
+class ErreurRequete(Exception):
+    """Erreur renvoyée au client avec un code HTTP."""
+
+    def __init__(self, statut, message):
+        super().__init__(message)
+        self.statut = statut
+
+
+class CacheTTL:
+    """Cache LRU borné dont les entrées expirent après `ttl` secondes."""
+
+    def __init__(self, ttl=TTL_SECONDES, taille=TAILLE_CACHE, horloge=time.monotonic):
+        self.ttl = ttl
+        self.taille = taille
+        self.horloge = horloge
+        self._entrees = OrderedDict()
+
+    def lire(self, cle):
+        entree = self._entrees.get(cle)
+        if entree is None:
+            return None
+        expiration, valeur = entree
+        if expiration < self.horloge():
+            del self._entrees[cle]
+            return None
+        self._entrees.move_to_end(cle)
+        return valeur
+
+    def ecrire(self, cle, valeur):
+        self._entrees[cle] = (self.horloge() + self.ttl, valeur)
+        self._entrees.move_to_end(cle)
+        while len(self._entrees) > self.taille:
+            self._entrees.popitem(last=False)
+
+
+class ServicePrevision:
+    """
+    Cœur du service : fenêtre d'observations, moteur de prévision et normales de chaque station,
+    avec coalescence et cache. `modeles` fournit (moteur, normales, version, manifeste) par station
+    (`CacheModeles` de meteo/stations.py) ; tous les moteurs ont le même horizon.
+    """
+
+    def __init__(self, modeles, stock, stations, station=STATION_ID, horizon=HORIZON, ttl=TTL_SECONDES):
+        self.modeles = modeles
+        self.stock = stock
+        self.stations = stations
+        self.station = station
+        self.horizon = horizon
+        self.cache = CacheTTL(ttl)
+        self._en_cours = {}
+        self.compteurs = {'requetes': 0, 'calculs': 0, 'cache': 0, 'coalescees': 0}
+
+    def _ressources(self, station):
+        """(moteur, normales, version, manifeste) de la station, chargés au besoin. Synchrone."""
+        try:
+            return self.modeles.lire(station)
+        except FileNotFoundError:
+            raise ErreurRequete(404, f"Aucun modèle entraîné pour la station {station}.")
+
+    def _calculer(self, station, date_ref, ressources):
+        """Prévision complète (tous les horizons du moteur) pour une station et une date de référence. Synchrone."""
+        moteur, normales_station, _, _ = ressources
+        fenetre = self.stock.fenetre(station, date_ref, taille=moteur.taille_historique)
+        prevision = moteur.prevoir(fenetre, [date_ref])
+        if prevision['Tmax_Prevue'].isna().any():
+            raise ErreurRequete(422, f"Données insuffisantes : les 7 jours d'observations précédant le {date_ref} "
+                                     "ne sont pas tous disponibles.")
+        dates = prevision['date_prevue'].values
+        normales = normales_station.pour_dates(dates)
+        ecarts_tmax, ecarts_tmin = normales_station.anomalies(dates, prevision['Tmax_Prevue'], prevision['Tmin_Prevue'])
+        # Bornes des intervalles de prévision (Tmax_Q10, ...) si le modèle les fournit
+        bornes = [colonne for colonne in prevision.columns if '_Q' in colonne]
+        return [{
+            'horizon': int(prevision['horizon'].iloc[i]),
+            'date': str(dates[i].astype('datetime64[D]')),
+            'Tmax_Prevue': round(float(prevision['Tmax_Prevue'].iloc[i]), 2),
+            'Tmin_Prevue': round(float(prevision['Tmin_Prevue'].iloc[i]), 2),
+            **{colonne: round(float(prevision[colonne].iloc[i]), 2) for colonne in bornes},
+            'Tmax_Normale': round(float(normales['Tmax_Normale'][i]), 2),
+            'Tmin_Normale': round(float(normales['Tmin_Normale'][i]), 2),
+            'Ecart_Tmax': round(float(ecarts_tmax[i]), 2),
+            'Ecart_Tmin': round(float(ecarts_tmin[i]), 2),
+        } for i in range(len(prevision))]
+
+    async def prevision(self, date_ref, horizon, station=None):
+        """Prévisions J+1..J+horizon pour `date_ref` et `station`, servies depuis le cache ou un calcul partagé."""
+        station = station or self.station
+        if station not in self.stations:
+            raise ErreurRequete(404, f"Station inconnue : {station}")
+        if not 1 <= horizon <= self.horizon:
+            raise ErreurRequete(400, f"horizon doit être compris entre 1 et {self.horizon}.")
+        self.compteurs['requetes'] += 1
+        # Un modèle absent du LRU est chargé hors de la boucle d'événements
+        ressources = self.modeles.lire(station) if station in self.modeles else await asyncio.to_thread(self._ressources, station)
+        version_modele = ressources[2]
+        cle = (station, date_ref, version_modele)
+
+        previsions = self.cache.lire(cle)
+        if previsions is not None:
+            self.compteurs['cache'] += 1
+        elif cle in self._en_cours:
+            # Un calcul est déjà en cours pour cette date : on attend son résultat
+            self.compteurs['coalescees'] += 1
+            previsions = await asyncio.shield(self._en_cours[cle])
+        else:
+            self.compteurs['calculs'] += 1
+            tache = asyncio.ensure_future(asyncio.to_thread(self._calculer, station, date_ref, ressources))
+            self._en_cours[cle] = tache
+            try:
+                previsions = await asyncio.shield(tache)
+                self.cache.ecrire(cle, previsions)
+            finally:
+                del self._en_cours[cle]
+
+        return {'station': station, 'date_reference': date_ref.isoformat(),
+                'version_modele': version_modele, 'previsions': previsions[:horizon]}
+
+
+# --- SERVEUR HTTP MINIMAL ---
+
+STATUTS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+
+async def _repondre(service, methode, cible):
+    if methode != 'GET':
+        raise ErreurRequete(405, "Seule la méthode GET est acceptée.")
+    url = urlsplit(cible)
+    if url.path == '/sante':
+        sante = {'statut': 'ok', 'station_defaut': service.station, 'stations': len(service.stations),
+                 'modeles_charges': service.modeles.stations(), 'compteurs': {**service.compteurs, **service.modeles.compteurs}}
+        if MESURES.actif:
+            # Durées par étape du moteur (METEO_INSTRUMENTATION=1)
+            sante['instrumentation'] = MESURES.instantane()
+        return sante
+    if url.path != '/forecast':
+        raise ErreurRequete(404, f"Route inconnue : {url.path}")
+
+    parametres = parse_qs(url.query)
+    try:
+        date_ref = date.fromisoformat(parametres['date'][0])
+        horizon = int(parametres.get('horizon', [service.horizon])[0])
+    except (KeyError, ValueError):
+        raise ErreurRequete(400, "Paramètres attendus : date=YYYY-MM-DD, horizon entier et station optionnels.")
+    return await service.prevision(date_ref, horizon, parametres.get('station', [None])[0])
+
+
+async def traiter_connexion(service, reader, writer):
+    """Boucle HTTP/1.1 d'une connexion (connexions persistantes prises en charge)."""
+    try:
+        while True:
+            ligne = await reader.readline()
+            if not ligne:
+                break
+            try:
+                methode, cible, version = ligne.decode('latin-1').split()
+            except ValueError:
+                break
+            entetes = {}
+            while (entete := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                nom, _, valeur = entete.decode('latin-1').partition(':')
+                entetes[nom.strip().lower()] = valeur.strip()
+            if int(entetes.get('content-length', 0) or 0):
+                await reader.readexactly(int(entetes['content-length']))
+
+            try:
+                statut, corps = 200, await _repondre(service, methode, cible)
+            except ErreurRequete as e:
+                statut, corps = e.statut, {'erreur': str(e)}
+            except Exception as e:
+                statut, corps = 500, {'erreur': f"Erreur interne : {e}"}
+
+            fermer = entetes.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+            contenu = json.dumps(corps, ensure_ascii=False).encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {statut} {STATUTS.get(statut, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(contenu)}\r\n"
+                f"Connection: {'close' if fermer else 'keep-alive'}\r\n\r\n".encode('latin-1') + contenu)
+            await writer.drain()
+            if fermer:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def demarrer_serveur(service, hote=HOTE, port=PORT):
+    """Démarre le serveur HTTP ; retourne l'objet `asyncio.Server` (port 0 = port libre choisi par l'OS)."""
+    return await asyncio.start_server(lambda r, w: traiter_connexion(service, r, w), hote, port)
+
+
+def creer_service(model_dir='models', backend='compile', stock_path='data/observations.sqlite', data_dir='data',
+                  station=STATION_ID, ttl=TTL_SECONDES, horizon=HORIZON, mode='recursif', taille_lru=None):
+    """
+    Ouvre le stock local et le cache LRU des modèles par station, et assemble le service.
+    Le modèle de la station par défaut est chargé d'emblée (erreur immédiate s'il manque).
+    En mode 'direct', les modèles sont lus dans le sous-dossier direct du dossier de chaque station.
+    """
+    from meteo.observations import StockObservations
+    from meteo.stations import REGISTRE_PATH, TAILLE_LRU_MODELES, CacheModeles, charger_station, registre, version_active
+
+    # Sonde de version : un modèle republié par le script 03 est substitué sans redémarrer le service
+    modeles = CacheModeles(lambda s: charger_station(s, backend, horizon, mode, data_dir, model_dir),
+                           taille_lru or TAILLE_LRU_MODELES, sonde=lambda s: version_active(s, model_dir))
+    modeles.lire(station)
+    return ServicePrevision(modeles, StockObservations(stock_path), registre(os.path.join(data_dir, os.path.basename(REGISTRE_PATH))),
+                            station, horizon, ttl)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP de prévision Tmax/Tmin (J+1 à J+7).")
+    parser.add_argument('--hote', default=HOTE)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--backend', default=os.environ.get('METEO_PREDICTEUR', 'compile'))
+    parser.add_argument('--ttl', type=float, default=TTL_SECONDES)
+    parser.add_argument('--horizon', type=int, default=int(os.environ.get('METEO_HORIZON', HORIZON)),
+                        help="Horizon maximal servi (1 à 7 jours).")
+    parser.add_argument('--mode', choices=['recursif', 'direct'], default=os.environ.get('METEO_MODE_PREVISION', 'recursif'))
+    parser.add_argument('--station', default=os.environ.get('METEO_STATION', STATION_ID), help="Station servie par défaut.")
+    parser.add_argument('--modeles-en-memoire', type=int, default=None,
+                        help="Nombre maximal de modèles de stations gardés en mémoire (LRU).")
+    args = parser.parse_args()
+
+    service = creer_service(backend=args.backend, ttl=args.ttl, horizon=args.horizon, mode=args.mode,
+                            station=args.station, taille_lru=args.modeles_en_memoire)
+
+    async def servir():
+        serveur = await demarrer_serveur(service, args.hote, args.port)
+        print(f"Service de prévision en écoute sur http://{args.hote}:{args.port} "
+              f"({len(service.stations)} stations, modèle {service.modeles.lire(service.station)[2]} pour {service.station})")
+        async with serveur:
+            await serveur.serve_forever()
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
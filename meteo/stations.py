@@ -0,0 +1,184 @@
+"""
+Registre des stations Meteostat : identifiant -> nom, coordonnées et dossiers des artefacts.
+
+La station par défaut (Brazzaville) garde la disposition historique (data/, models/).
+Chaque autre station a ses propres dossiers data/stations/<id>/ (jeu brut, features, queue)
+et models/stations/<id>/ (boosters, manifeste, normales, modèle direct). Le stock SQLite
+d'observations est partagé : sa clé est déjà (station, jour).
+
+Côté service et application, les modèles chargés sont gardés dans un cache LRU borné :
+la mémoire ne croît pas avec le nombre de stations du registre. Le cache surveille la version
+active de chaque station (meteo/registre_modeles.py) : un modèle réentraîné est chargé en
+arrière-plan puis substitué, sans redémarrage.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from meteo.donnees import lire_donnees
+from meteo.modeles import charger_modele, dossier_modele, version_modele
+from meteo.normales import NORMALES_PATH, NormalesClimatiques
+from meteo.prevision import MoteurPrevision
+from meteo.registre_modeles import dossier_courant, version_courante
+
+# --- CONFIGURATION ---
+STATION_DEFAUT = '64450'
+STATIONS = {  # stations d'Afrique centrale (identifiants OMM, coordonnées approximatives)
+    '64450': {'nom': 'Brazzaville', 'lat': -4.25, 'lon': 15.25},
+    '64400': {'nom': 'Pointe-Noire', 'lat': -4.82, 'lon': 11.90},
+    '64210': {'nom': "Kinshasa (N'Djili)", 'lat': -4.39, 'lon': 15.44},
+    '64500': {'nom': 'Libreville', 'lat': 0.46, 'lon': 9.41},
+    '64650': {'nom': 'Bangui', 'lat': 4.40, 'lon': 18.52},
+    '64910': {'nom': 'Douala', 'lat': 4.01, 'lon': 9.72},
+    '64950': {'nom': 'Yaoundé', 'lat': 3.83, 'lon': 11.52},
+}
+REGISTRE_PATH = 'data/stations.json'  # stations ajoutées ou corrigées, même format que STATIONS
+DATA_DIR = 'data'
+MODEL_DIR = 'models'
+SOUS_DOSSIER_STATIONS = 'stations'
+FICHIER_BRUT_DEFAUT = 'meteo_brazzaville_daily.csv'
+FICHIER_BRUT = 'observations_daily.csv'
+FICHIER_FEATURES = 'features_finales.csv'
+TAILLE_LRU_MODELES = 8  # modèles gardés en mémoire par processus (application, service)
+INTERVALLE_VERIFICATION_S = 2.0  # lecture du pointeur de version d'une station au plus toutes les N secondes
+# --- FIN CONFIGURATION ---
+
+
+def registre(chemin=REGISTRE_PATH):
+    """Stations connues : STATIONS complété par le fichier JSON du registre s'il existe."""
+    stations = {station: dict(infos) for station, infos in STATIONS.items()}
+    if os.path.exists(chemin):
+        with open(chemin, encoding='utf-8') as f:
+            for station, infos in json.load(f).items():
+                stations.setdefault(str(station), {}).update(infos)
+    return stations
+
+
+def chemins_station(station, data_dir=DATA_DIR, model_dir=MODEL_DIR):
+    """Fichiers d'une station : {'brut': CSV brut, 'features': CSV de features, 'modeles': dossier du modèle}."""
+    if station == STATION_DEFAUT:
+        return {'brut': os.path.join(data_dir, FICHIER_BRUT_DEFAUT),
+                'features': os.path.join(data_dir, FICHIER_FEATURES),
+                'modeles': model_dir}
+    dossier_donnees = os.path.join(data_dir, SOUS_DOSSIER_STATIONS, station)
+    return {'brut': os.path.join(dossier_donnees, FICHIER_BRUT),
+            'features': os.path.join(dossier_donnees, FICHIER_FEATURES),
+            'modeles': os.path.join(model_dir, SOUS_DOSSIER_STATIONS, station)}
+
+
+def charger_station(station, backend='compile', horizon=2, mode='recursif', data_dir=DATA_DIR, model_dir=MODEL_DIR):
+    """
+    Charge le modèle et les normales d'une station et assemble son moteur de prévision.
+    Retourne (moteur, normales, version du modèle, manifeste).
+    """
+    chemins = chemins_station(station, data_dir, model_dir)
+    racine = dossier_courant(chemins['modeles'])  # version active, lue une seule fois pour tous les artefacts
+    dossier = dossier_modele(mode, racine)
+    modele, feature_order, manifeste = charger_modele(dossier, backend)
+    chemin_normales = os.path.join(racine, os.path.basename(NORMALES_PATH))
+    if os.path.exists(chemin_normales):
+        normales = NormalesClimatiques.charger(chemin_normales)
+    else:
+        normales = NormalesClimatiques.calculer(lire_donnees(chemins['brut']))
+    moteur = MoteurPrevision(modele, feature_order, horizon=horizon, mode=mode,
+                             corrections=manifeste.get('intervalles', {}).get('correction'))
+    return moteur, normales, version_modele(dossier), manifeste
+
+
+def version_active(station, model_dir=MODEL_DIR):
+    """Version active du registre de la station (None pour un modèle à plat) : sonde de `CacheModeles`."""
+    return version_courante(chemins_station(station, model_dir=model_dir)['modeles'])
+
+
+class CacheModeles:
+    """
+    Cache LRU borné des ressources chargées par station (`chargeur(station)`), partagé entre threads.
+    Au-delà de `taille` stations, la moins récemment utilisée est libérée.
+
+    Avec une `sonde(station)` (version active), chaque lecture compare au plus toutes les
+    `intervalle` secondes la version chargée à la version active. Si elle a changé, la nouvelle
+    est chargée dans un fil en arrière-plan pendant que l'ancienne continue d'être servie, puis
+    l'entrée est remplacée d'un bloc : un appelant qui tient déjà les ressources garde l'ancien modèle.
+    """
+
+    def __init__(self, chargeur, taille=TAILLE_LRU_MODELES, sonde=None, intervalle=INTERVALLE_VERIFICATION_S):
+        self.chargeur = chargeur
+        self.taille = taille
+        self.sonde = sonde
+        self.intervalle = intervalle
+        self._entrees = OrderedDict()
+        self._versions = {}  # station -> (version chargée, instant de la dernière vérification)
+        self._verrou = threading.Lock()
+        self._chargements = {}  # station -> verrou du chargement en cours
+        self._rechargements = {}  # station -> version en cours de chargement en arrière-plan, ou en échec
+        self.compteurs = {'chargements': 0, 'evictions': 0, 'rechargements': 0, 'echecs_rechargement': 0}
+
+    def __contains__(self, station):
+        return station in self._entrees
+
+    def stations(self):
+        """Stations chargées, de la moins à la plus récemment utilisée."""
+        with self._verrou:
+            return list(self._entrees)
+
+    def _verifier(self, station):
+        """Lance le rechargement en arrière-plan si la version active a changé (appelé sous le verrou)."""
+        version, verifie_le = self._versions[station]
+        if time.monotonic() - verifie_le < self.intervalle:
+            return
+        active = self.sonde(station)
+        self._versions[station] = (version, time.monotonic())
+        if active == version:
+            self._rechargements.pop(station, None)  # retour à la version chargée : un échec passé peut être retenté
+        elif self._rechargements.get(station) != active:
+            self._rechargements[station] = active
+            threading.Thread(target=self._recharger, args=(station, active), daemon=True).start()
+
+    def _recharger(self, station, version):
+        try:
+            ressources = self.chargeur(station)
+        except Exception:
+            # L'ancienne version reste servie ; pas de nouvel essai avant un nouveau changement de version
+            with self._verrou:
+                self.compteurs['echecs_rechargement'] += 1
+            return
+        with self._verrou:
+            if station in self._entrees:
+                self._entrees[station] = ressources
+                self._versions[station] = (version, time.monotonic())
+                self.compteurs['rechargements'] += 1
+            self._rechargements.pop(station, None)
+
+    def lire(self, station):
+        with self._verrou:
+            if station in self._entrees:
+                self._entrees.move_to_end(station)
+                if self.sonde is not None:
+                    self._verifier(station)
+                return self._entrees[station]
+            verrou_station = self._chargements.setdefault(station, threading.Lock())
+        # Le chargement se fait hors du verrou global (les autres stations restent servies) ;
+        # deux requêtes simultanées pour la même station ne la chargent qu'une fois
+        with verrou_station:
+            with self._verrou:
+                if station in self._entrees:
+                    self._entrees.move_to_end(station)
+                    return self._entrees[station]
+            # Version lue avant le chargement : un changement pendant celui-ci sera détecté ensuite
+            version = self.sonde(station) if self.sonde is not None else None
+            try:
+                ressources = self.chargeur(station)
+            finally:
+                with self._verrou:
+                    self._chargements.pop(station, None)
+            with self._verrou:
+                self.compteurs['chargements'] += 1
+                self._entrees[station] = ressources
+                self._versions[station] = (version, time.monotonic())
+                while len(self._entrees) > self.taille:
+                    evincee, _ = self._entrees.popitem(last=False)
+                    self._versions.pop(evincee, None)
+                    self.compteurs['evictions'] += 1
+            return ressources
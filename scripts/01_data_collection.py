@@ -1,48 +1,102 @@
 import pandas as pd
-from meteostat import Daily
 from datetime import datetime
+import argparse
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import ajouter_donnees, ecrire_donnees, lire_donnees
+from meteo.features import COLONNES_OBSERVATIONS
+from meteo.horaire import HORAIRE_DIR, WORKERS, SourceHoraireFichiers, SourceHoraireMeteostat, journalier
+from meteo.instrumentation import SuiviEtapes
+from meteo.observations import SourceCSV, SourceMeteostat, StockObservations
+from meteo.stations import STATION_DEFAUT, chemins_station
+
 # --- CONFIGURATION ---
-STATION_ID = '64450' # Brazzaville
+STATION_ID = STATION_DEFAUT # Brazzaville
 DATE_DEBUT = datetime(1991, 1, 1)
 DATE_FIN = datetime(2020, 12, 31)
 FILE_PATH = 'data/meteo_brazzaville_daily.csv'
+STOCK_PATH = 'data/observations.sqlite'
+HEURES_JOUR_COMPLET = 20  # ingestion horaire : jours comptés comme complets dans le rapport
 # --- FIN CONFIGURATION ---
 
-# Assurer que le dossier 'data' existe
-if not os.path.exists('data'):
-    os.makedirs('data')
+parser = argparse.ArgumentParser(description="Synchronise le stock local d'observations et exporte le CSV journalier.")
+parser.add_argument('--source', choices=['meteostat', 'csv'], default='meteostat',
+                    help="'csv' alimente le stock hors ligne à partir d'un fichier local (par défaut le CSV existant).")
+parser.add_argument('--csv-source', default=None, help="Fichier lu par la source 'csv' (par défaut le CSV de la station).")
+parser.add_argument('--export-csv', action='store_true', help="Écrit aussi le CSV (le bundle binaire est toujours écrit).")
+parser.add_argument('--incremental', action='store_true',
+                    help="Synchronise jusqu'à hier et n'ajoute au jeu existant que les jours postérieurs à sa dernière date.")
+parser.add_argument('--horaire', action='store_true',
+                    help="Reconstruit les jours à partir des relevés horaires (Meteostat Hourly, ou fichiers annuels de "
+                         f"{HORAIRE_DIR}/<station>/ avec --source csv), agrégés année par année avec cache.")
+parser.add_argument('--horaire-dossier', default=None, help="Dossier des fichiers horaires annuels (source 'csv').")
+parser.add_argument('--workers', type=int, default=WORKERS, help="Années horaires traitées simultanément.")
+parser.add_argument('--station', default=STATION_ID,
+                    help="Identifiant Meteostat ; les stations autres que Brazzaville sont écrites dans data/stations/<id>/.")
+args = parser.parse_args()
+STATION_ID = args.station
+suivi = SuiviEtapes('01_data_collection')  # METEO_INSTRUMENTATION=1 : durée de chaque étape
+FILE_PATH = chemins_station(STATION_ID)['brut']
+# Agrégats horaires complets (humidité, pression, complétude), à côté du jeu journalier
+HORAIRE_PATH = os.path.splitext(FILE_PATH)[0] + '_horaire.csv'
 
-print("Recherche et téléchargement des données d'observation (Meteostat) en cours...")
+# Assurer que le dossier des données de la station existe
+os.makedirs(os.path.dirname(FILE_PATH), exist_ok=True)
 
 try:
-    # 1. Requête et Récupération des données quotidiennes
-    data = Daily(STATION_ID, DATE_DEBUT, DATE_FIN)
-    data = data.fetch()
+    # 1. Synchronisation incrémentale : seuls les jours absents du stock local sont récupérés
+    suivi.etape('synchronisation')
+    source = SourceCSV(args.csv_source or FILE_PATH) if args.source == 'csv' else SourceMeteostat()
+    stock = StockObservations(STOCK_PATH)
+    derniere = stock.derniere_date(STATION_ID)
+    print(f"Synchronisation du stock {STOCK_PATH} (dernier jour stocké : {derniere or 'aucun'}) via la source '{args.source}'...")
+    nb_nouveaux = stock.synchroniser(STATION_ID, source, DATE_DEBUT, None if args.incremental else DATE_FIN)
+    print(f"{nb_nouveaux} jour(s) ajouté(s) au stock.")
+
+    # 1 ter. Ingestion horaire : jours reconstruits à partir des relevés horaires, prioritaires sur Daily
+    if args.horaire:
+        suivi.etape('agregation_horaire')
+        source_horaire = (SourceHoraireFichiers(args.horaire_dossier or os.path.join(HORAIRE_DIR, STATION_ID))
+                          if args.source == 'csv' else SourceHoraireMeteostat())
+        fin_horaire = pd.Timestamp.today().normalize() - pd.Timedelta(days=1) if args.incremental else DATE_FIN
+        agregats, annees = journalier(STATION_ID, source_horaire, DATE_DEBUT, fin_horaire, workers=args.workers)
+        ecrire_donnees(agregats, HORAIRE_PATH, export_csv=args.export_csv)
+        existantes = stock.lire(STATION_ID, DATE_DEBUT, fin_horaire)
+        stock.enregistrer(STATION_ID, agregats[COLONNES_OBSERVATIONS].combine_first(existantes))
+        complets = int((agregats['heures_temperature'] >= HEURES_JOUR_COMPLET).sum())
+        print(f"Ingestion horaire : {len(agregats)} jour(s) agrégé(s) ({annees['calculees']} année(s) lue(s), "
+              f"{annees['cache']} en cache, {annees['incompletes']} trop incomplète(s) pour le cache), dont {complets} avec au moins {HEURES_JOUR_COMPLET} heures de température ; "
+              f"Tmax/Tmin disponibles pour {int(agregats['temperature_max_jour'].notna().sum())} jour(s) "
+              f"(stock : {int(existantes['temperature_max_jour'].notna().sum())} avant). Agrégats complets : {HORAIRE_PATH}")
+
+    # 1 bis. Mode incrémental : seuls les jours postérieurs au jeu existant lui sont ajoutés
+    if args.incremental:
+        suivi.etape('ajout_incremental')
+        derniere_ligne = lire_donnees(FILE_PATH).index.max()
+        nb_ajoutes = ajouter_donnees(stock.lire(STATION_ID, derniere_ligne + pd.Timedelta(days=1)), FILE_PATH,
+                                     export_csv=args.export_csv)
+        print(f"{nb_ajoutes} jour(s) ajouté(s) à {FILE_PATH} (dernier jour précédent : {derniere_ligne.date()}).")
+        sys.exit(0)
 
-    if data.empty:
-        print("Erreur: Aucune donnée d'observation disponible pour la station 64450 pour cette période.")
+    # 2. Lecture de la période d'entraînement depuis le stock
+    suivi.etape('lecture_stock')
+    df = stock.lire(STATION_ID, DATE_DEBUT, DATE_FIN)
+
+    if df.empty:
+        print(f"Erreur: Aucune donnée d'observation disponible pour la station {STATION_ID} pour cette période.")
         sys.exit(1) # Quitter avec un code d'erreur
 
-    # 2. Renommage et nettoyage initial
-    df = data.rename(columns={
-        'tmax': 'temperature_max_jour',
-        'tmin': 'temperature_min_jour',
-        'prcp': 'precipitation_somme_jour',
-        'wspd': 'vitesse_vent_moyenne_jour'
-    })
-    
-    df = df[['temperature_max_jour', 'temperature_min_jour', 'precipitation_somme_jour', 'vitesse_vent_moyenne_jour']]
-    
-    # 3. Traitement des valeurs manquantes (imputation par la moyenne pour les features)
-    df = df.fillna(df.mean()) 
-    
-    # 4. SAUVEGARDE des données
-    df.to_csv(FILE_PATH)
-    print(f"\nFichier {FILE_PATH} créé avec succès. Dimensions: {df.shape}")
+    # 3. Les valeurs manquantes sont conservées (NaN) : le script 02 complète le calendrier
+    #    et les impute par interpolation ou climatologie (meteo/lacunes.py)
+    print(f"Valeurs manquantes par colonne: {df.isna().sum().to_dict()}")
+
+    # 4. SAUVEGARDE des données (bundle binaire float32, CSV en export optionnel)
+    suivi.etape('sauvegarde')
+    ecrire_donnees(df, FILE_PATH, export_csv=args.export_csv)
+    print(f"\nJeu de données {FILE_PATH} créé avec succès (format bundle{' + CSV' if args.export_csv else ''}). Dimensions: {df.shape}")
 
 except Exception as e:
     print(f"Une erreur est survenue lors de la collecte de données : {e}")
-    sys.exit(1)
\ No newline at end of file
+    sys.exit(1)
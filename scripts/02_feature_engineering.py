@@ -1,54 +1,79 @@
 import pandas as pd
+import argparse
 import os
 import sys
 import numpy as np
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import ajouter_donnees, chemin_bundle, ecrire_donnees, lire_donnees, lire_tableaux
+from meteo.features import COLONNES_OBSERVATIONS, COLONNES_QUALITE, FEATURE_ORDER
+from meteo.instrumentation import SuiviEtapes
+from meteo.lacunes import preparer_serie
+from meteo.mise_a_jour import chemin_queue, construire_jeu, ecrire_queue, nouvelles_lignes
+from meteo.stations import STATION_DEFAUT, chemins_station
+
 # --- CONFIGURATION ---
 INPUT_PATH = 'data/meteo_brazzaville_daily.csv'
 OUTPUT_PATH = 'data/features_finales.csv'
 # --- FIN CONFIGURATION ---
 
+parser = argparse.ArgumentParser(description="Construit les features Lag/Temporelles, les cibles J+1 et les cibles directes J+2 à J+7.")
+parser.add_argument('--export-csv', action='store_true', help="Écrit aussi le CSV (le bundle binaire est toujours écrit).")
+parser.add_argument('--incremental', action='store_true',
+                    help="N'ajoute que les lignes des nouveaux jours, à partir de la queue écrite par la dernière reconstruction complète.")
+parser.add_argument('--station', default=STATION_DEFAUT, help="Identifiant Meteostat de la station (fichiers de meteo/stations.py).")
+args = parser.parse_args()
+INPUT_PATH, OUTPUT_PATH = chemins_station(args.station)['brut'], chemins_station(args.station)['features']
+suivi = SuiviEtapes('02_feature_engineering')  # METEO_INSTRUMENTATION=1 : durée de chaque étape
+
+suivi.etape('lecture')
+
 try:
-    df = pd.read_csv(INPUT_PATH, index_col='time', parse_dates=True)
+    df = lire_donnees(INPUT_PATH)
 except FileNotFoundError:
     print(f"Erreur: Le fichier d'entrée {INPUT_PATH} est introuvable. Exécutez le script 01 en premier.")
     sys.exit(1)
 
 print(f"Chargement des données brutes réussi. Taille initiale: {df.shape}")
 
-# --- ÉTAPE 1 : CRÉATION DES VARIABLES CIBLES (Y) : T° Max et T° Min J+1 ---
-# Shift de -1 place la T° Max/Min du lendemain sur la ligne du jour J
-df['Tmax_Demain'] = df['temperature_max_jour'].shift(-1)
-df['Tmin_Demain'] = df['temperature_min_jour'].shift(-1)
-
-# --- ÉTAPE 2 : CRÉATION DES FEATURES TEMPÉRELLES ---
-df['Mois'] = df.index.month
-df['Jour_de_Annee'] = df.index.dayofyear
-df['Jour_de_Semaine'] = df.index.dayofweek
-
-# --- ÉTAPE 3 : CRÉATION DES FEATURES DE DÉCALAGE (LAG FEATURES) ---
-lags = [1, 2, 3, 7] # J-1, J-2, J-3, J-7
-for lag in lags:
-    df[f'Tmax_Lag_{lag}'] = df['temperature_max_jour'].shift(lag)
-    df[f'Tmin_Lag_{lag}'] = df['temperature_min_jour'].shift(lag)
-    df[f'Prcp_Lag_{lag}'] = df['precipitation_somme_jour'].shift(lag)
-
+# --- MODE INCRÉMENTAL : seules les lignes postérieures à la dernière ligne existante sont calculées ---
+if args.incremental:
+    if not os.path.exists(chemin_queue(OUTPUT_PATH)):
+        print(f"Erreur: Queue {chemin_queue(OUTPUT_PATH)} introuvable. Exécutez une reconstruction complète (sans --incremental).")
+        sys.exit(1)
+    suivi.etape('lignes_incrementales')
+    dates_existantes, _, _ = lire_tableaux(chemin_bundle(OUTPUT_PATH))
+    derniere_ligne = pd.Timestamp(dates_existantes[-1])
+    lignes, queue_suivante = nouvelles_lignes(df, chemin_queue(OUTPUT_PATH), derniere_ligne)
+    if lignes is None:
+        print(f"Aucun nouveau jour brut : {OUTPUT_PATH} est à jour (dernière ligne : {derniere_ligne.date()}).")
+        sys.exit(0)
+    suivi.etape('ajout')
+    nb_ajoutees = ajouter_donnees(lignes, OUTPUT_PATH, export_csv=args.export_csv)
+    ecrire_queue(chemin_queue(OUTPUT_PATH), *queue_suivante)
+    print(f"{nb_ajoutees} ligne(s) ajoutée(s) à {OUTPUT_PATH} (dernière ligne précédente : {derniere_ligne.date()}).")
+    sys.exit(0)
 
-# --- ÉTAPE 4 : NETTOYAGE FINAL ---
-df = df.dropna()
+# --- ÉTAPE 0 : CALENDRIER JOURNALIER COMPLET ET IMPUTATION DES LACUNES ---
+# Sur un calendrier sans trou, un décalage de k lignes est un décalage de k jours
+suivi.etape('calendrier_imputation')
+dates, valeurs, masque = preparer_serie(df)
+print(f"Calendrier complet: {len(dates)} jours ({len(dates) - len(df)} jours absents ajoutés). "
+      f"Valeurs imputées par colonne: {dict(zip(COLONNES_OBSERVATIONS, masque.sum(axis=0).tolist()))}")
 
-# 2. Définition des Features (X) et des Cibles (Y)
-colonnes_cibles = ['Tmax_Demain', 'Tmin_Demain'] # <-- LES DEUX CIBLES
-Y = df[colonnes_cibles]
-# X : on retire les variables brutes de J0 et les cibles
-colonnes_a_retirer = colonnes_cibles + ['temperature_max_jour', 'temperature_min_jour', 
-                      'precipitation_somme_jour', 'vitesse_vent_moyenne_jour']
-X = df.drop(columns=colonnes_a_retirer, errors='ignore')
+# --- ÉTAPES 1 à 4 : CIBLES J+1 (ET DIRECTES J+2..J+7), FEATURES TEMPORELLES ET DE DÉCALAGE, NETTOYAGE ---
+# Même constructeur NumPy que l'inférence (moteur de prévision, app.py, script 04) ;
+# on ne garde que les jours dont les lags sont disponibles et dont les cibles ont été observées
+suivi.etape('features')
+df_final = construire_jeu(dates, valeurs, masque)
 
 # --- ÉTAPE 5 : SAUVEGARDE ---
-df_final = X.join(Y)
-df_final.to_csv(OUTPUT_PATH)
+suivi.etape('sauvegarde')
+ecrire_donnees(df_final, OUTPUT_PATH, export_csv=args.export_csv)
+# Fin de la série brute et climatologie, point de départ des mises à jour incrémentales
+ecrire_queue(chemin_queue(OUTPUT_PATH), dates, valeurs, masque)
 
-print(f"\nFichier de features {OUTPUT_PATH} créé avec succès.")
+print(f"\nFichier de features {OUTPUT_PATH} créé avec succès (format bundle{' + CSV' if args.export_csv else ''}).")
 print(f"Nombre de jours utilisables après nettoyage: {df_final.shape[0]}")
-print(f"Nombre de features créées (X): {X.shape[1]}")
\ No newline at end of file
+print(f"Nombre de features créées (X): {len(FEATURE_ORDER)}")
+print(f"Lignes avec au moins un lag imputé: {int((df_final[COLONNES_QUALITE[0]] > 0).sum())}")
@@ -1,12 +1,32 @@
 import pandas as pd
 import numpy as np
+import argparse
+import hashlib
+import json
 import os
+import shutil
+import time
 import sys
 import joblib
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.base import clone
 from sklearn.multioutput import MultiOutputRegressor
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.features import COLONNES_OBSERVATIONS, HORIZON_MAX, ConstructeurFeatures, cibles_horizon, separer_features_cibles
+from meteo.instrumentation import SuiviEtapes
+from meteo.intervalles import (QUANTILES, calibrer, couverture, decomposer_sortie, mae_par_horizon, parametres_sortie,
+                               sorties_quantiles)
+from meteo.lacunes import preparer_serie
+from meteo.mise_a_jour import SEUIL_DERIVE, controle_derive
+from meteo.modeles import MANIFESTE, charger_modele, completer_manifeste, dossier_modele, exporter_boosters, lire_manifeste
+from meteo.normales import NORMALES_PATH, NormalesClimatiques
+from meteo.prevision import MoteurPrevision
+from meteo.registre_modeles import dossier_courant, dossier_version, nouvelle_version, publier, version_courante
+from meteo.stations import STATION_DEFAUT, chemins_station
+
 # --- CONFIGURATION ---
 INPUT_PATH = 'data/features_finales.csv'
 MODEL_DIR = 'models'
@@ -14,15 +34,54 @@ MODEL_PATH = os.path.join(MODEL_DIR, 'final_model.pkl')
 
 VALIDATION_SPLIT_DATE = '2016-01-01'
 TEST_SPLIT_DATE = '2018-01-01'
+RAW_DATA_PATH = 'data/meteo_brazzaville_daily.csv' # observations brutes pour les normales climatiques
+NORMALES_LISSAGE = 0 # demi-fenêtre (jours) de lissage des normales ; 0 = moyenne du jour exact
+N_ESTIMATORS = 5000
+EARLY_STOPPING_ROUNDS = 200  # itérations sans amélioration de la MAE de validation avant l'arrêt
+ARBRES_INCREMENTAUX = 50  # arbres ajoutés par cible lors d'une mise à jour incrémentale
+FENETRE_INCREMENTALE_JOURS = 365  # fenêtre récente sur laquelle le boosting reprend
+IMPORTANCE_PATH = 'importance_features.csv'  # part du gain total par feature et par cible, à côté du modèle
+SEUIL_ELAGAGE = 0.005  # part du gain en dessous de laquelle une feature est signalée comme candidate à l'élagage
 # --- FIN CONFIGURATION ---
 
+parser = argparse.ArgumentParser(description="Entraîne et évalue le modèle XGBoost multi-sortie (Tmax/Tmin J+1).")
+parser.add_argument('--mode', choices=['early_stopping', 'fixe', 'incremental'], default='early_stopping',
+                    help="'early_stopping' : arrêt par cible sur la validation 2016-2017 et modèle tronqué ; "
+                         f"'fixe' : {N_ESTIMATORS} arbres par cible (comportement historique) ; "
+                         f"'incremental' : {ARBRES_INCREMENTAUX} arbres de plus par cible sur les {FENETRE_INCREMENTALE_JOURS} "
+                         "derniers jours, ou réentraînement complet (early_stopping) si la MAE des nouveaux jours dérive.")
+parser.add_argument('--seuil-derive', type=float, default=SEUIL_DERIVE,
+                    help="Hausse relative de la MAE sur les nouveaux jours au-delà de laquelle le mode incrémental réentraîne tout.")
+parser.add_argument('--horizon-direct', type=int, default=0, choices=range(0, HORIZON_MAX + 1), metavar='H',
+                    help=f"Entraîne aussi le modèle direct J+1..J+H (H <= {HORIZON_MAX}) dans {dossier_modele('direct', MODEL_DIR)}/ "
+                         "et compare sa MAE par horizon à celle du mode récursif (0 : pas de modèle direct).")
+parser.add_argument('--early-stopping-rounds', type=int, default=EARLY_STOPPING_ROUNDS)
+parser.add_argument('--params', type=json.loads, default={},
+                    help="Hyperparamètres XGBoost en JSON, ex. la meilleure ligne du leaderboard du script 06.")
+parser.add_argument('--validation-split-date', default=VALIDATION_SPLIT_DATE)
+parser.add_argument('--test-split-date', default=TEST_SPLIT_DATE)
+parser.add_argument('--sans-features', type=lambda valeur: [nom for nom in valeur.split(',') if nom], default=[],
+                    metavar='NOMS', help="Features écartées de l'entraînement (noms ou préfixes séparés par des virgules, "
+                                         "ex. Vent_Std,Tmax_Moy_3) : le modèle élagué ne les calcule plus à l'inférence.")
+parser.add_argument('--station', default=STATION_DEFAUT,
+                    help="Identifiant Meteostat ; les modèles des stations autres que Brazzaville vont dans models/stations/<id>/.")
+args = parser.parse_args()
+VALIDATION_SPLIT_DATE, TEST_SPLIT_DATE = args.validation_split_date, args.test_split_date
+# Fichiers de la station : data/ et models/ pour Brazzaville, sous-dossiers data/stations/<id>/ et models/stations/<id>/ sinon
+chemins = chemins_station(args.station)
+INPUT_PATH, RAW_DATA_PATH, RACINE_MODELES = chemins['features'], chemins['brut'], chemins['modeles']
+# Registre versionné (meteo/registre_modeles.py) : le modèle actif sert de référence, le nouveau
+# est écrit dans une nouvelle version, activée seulement une fois complète (étape 12)
+DOSSIER_ACTUEL = dossier_courant(RACINE_MODELES)
+suivi = SuiviEtapes('03_train_and_evaluate')  # METEO_INSTRUMENTATION=1 : durée de chaque étape
+
 # 1. Assurer que le dossier 'models' existe
-if not os.path.exists(MODEL_DIR):
-    os.makedirs(MODEL_DIR)
+os.makedirs(RACINE_MODELES, exist_ok=True)
 
 # 2. Chargement des données
+suivi.etape('chargement')
 try:
-    df = pd.read_csv(INPUT_PATH, index_col='time', parse_dates=True)
+    df = lire_donnees(INPUT_PATH)
 except FileNotFoundError:
     print(f"Erreur: Le fichier de features {INPUT_PATH} est introuvable. Exécutez le script 02 en premier.")
     sys.exit(1)
@@ -31,10 +90,12 @@ except FileNotFoundError:
 TARGET_COLUMNS = ['Tmax_Demain', 'Tmin_Demain'] 
 
 # 2. Y est le DataFrame contenant les deux cibles (Shape: (n_samples, 2))
-Y = df[TARGET_COLUMNS]
-
-# 3. X est le DataFrame contenant toutes les autres colonnes (les features)
-X = df.drop(columns=TARGET_COLUMNS)
+# 3. X est le DataFrame contenant toutes les autres colonnes (les features), hors colonnes de qualité
+try:
+    X, Y = separer_features_cibles(df)
+except ValueError as e:
+    print(f"Erreur: {INPUT_PATH} : {e}")
+    sys.exit(1)
 # --- FIN DE LA CORRECTION ---
 
 """
@@ -52,46 +113,294 @@ Y_val = Y[(Y.index >= VALIDATION_SPLIT_DATE) & (Y.index < TEST_SPLIT_DATE)]
 X_test = X[X.index >= TEST_SPLIT_DATE]
 Y_test = Y[Y.index >= TEST_SPLIT_DATE]
 
-print(f"Train: {len(X_train)} jours (1991 - 2015)")
-print(f"Validation: {len(X_val)} jours (2016 - 2017)")
-print(f"Test Final: {len(X_test)} jours (2018 - 2020)")
+print(f"Train: {len(X_train)} jours (jusqu'au {VALIDATION_SPLIT_DATE} exclu)")
+print(f"Validation: {len(X_val)} jours ({VALIDATION_SPLIT_DATE} - {TEST_SPLIT_DATE})")
+print(f"Test Final: {len(X_test)} jours (à partir du {TEST_SPLIT_DATE})")
+if X_val.empty or X_test.empty:
+    # L'early stopping et la calibration des intervalles exigent des jours de validation
+    print(f"Erreur: période de validation ou de test vide. Vérifiez --validation-split-date ({VALIDATION_SPLIT_DATE}) "
+          f"et --test-split-date ({TEST_SPLIT_DATE}).")
+    sys.exit(1)
 
 
 # 4. ENTRAÎNEMENT DU MODÈLE XGBOOST MULTI-SORTIE
 print("\nDébut de l'entraînement du modèle XGBoost Multi-Sortie...")
 
+# Résultats du modèle actuel (s'il existe), pour le rapport comparatif final
+ancien_manifeste = lire_manifeste(DOSSIER_ACTUEL) if os.path.exists(os.path.join(DOSSIER_ACTUEL, MANIFESTE)) else {}
+
+# Features du modèle : celles du script 02 moins les features élaguées ; en mode incrémental,
+# celles du modèle mis à jour (le boosting reprend sur les mêmes colonnes)
+if args.mode == 'incremental' and ancien_manifeste.get('feature_order'):
+    colonnes_features = ancien_manifeste['feature_order']
+else:
+    colonnes_features = [c for c in X.columns if not c.startswith(tuple(args.sans_features))]
+print(f"Features : {len(colonnes_features)} sur les {X.shape[1]} du jeu {INPUT_PATH}")
+X, X_train, X_val, X_test = (x[colonnes_features] for x in (X, X_train, X_val, X_test))
+
+# Mode incrémental : contrôle de dérive sur les jours arrivés depuis le dernier entraînement
+suivi.etape('controle_derive')
+mode = args.mode
+mae_nouveaux_jours = None
+if mode == 'incremental':
+    donnees_jusqu_au = ancien_manifeste.get('entrainement', {}).get('donnees_jusqu_au')
+    if donnees_jusqu_au is None:
+        print("Aucun entraînement de référence avec date de fin des données : réentraînement complet.")
+        mode = 'early_stopping'
+    else:
+        nouveaux_jours = X.index > donnees_jusqu_au
+        if not nouveaux_jours.any():
+            print(f"Aucun nouveau jour depuis le {donnees_jusqu_au} : le modèle actuel est conservé.")
+            sys.exit(0)
+        predicteur_actuel, _, _ = charger_modele(DOSSIER_ACTUEL, 'booster')
+        derive, mae_nouveaux_jours = controle_derive(predicteur_actuel, X[nouveaux_jours], Y[nouveaux_jours],
+                                                     ancien_manifeste.get('mae', {}), seuil=args.seuil_derive)
+        print(f"{int(nouveaux_jours.sum())} nouveau(x) jour(s) depuis le {donnees_jusqu_au}. "
+              f"MAE du modèle actuel : {', '.join(f'{c} {v:.3f}' for c, v in mae_nouveaux_jours.items())} °C "
+              f"(référence : {ancien_manifeste.get('mae', {})}).")
+        if derive:
+            print(f"Dérive détectée (> +{args.seuil_derive:.0%} de la MAE de référence) : réentraînement complet.")
+            mode = 'early_stopping'
+
+# Dossier temporaire de la nouvelle version : mis en place et activé à la publication (étape 12),
+# un entraînement interrompu ne laisse donc aucune version listée ni activable
+VERSION, MODEL_DIR = nouvelle_version(RACINE_MODELES)
+DOSSIER_PUBLIE = dossier_version(RACINE_MODELES, VERSION)  # chemins affichés : ceux de la version publiée
+MODEL_PATH = os.path.join(MODEL_DIR, os.path.basename(MODEL_PATH))
+NORMALES_PATH = os.path.join(MODEL_DIR, os.path.basename(NORMALES_PATH))
+print(f"Nouvelle version du modèle : {VERSION}")
+
 # 1. Définition du régresseur de base
 base_model = XGBRegressor(
-    n_estimators=5000, 
+    n_estimators=N_ESTIMATORS, 
     learning_rate=0.01,
     max_depth=5,
     n_jobs=-1,
     random_state=42
-)
+).set_params(**args.params)
 
 # 2. Utilisation du wrapper MultiOutputRegressor
+suivi.etape('entrainement')
 multi_output_model = MultiOutputRegressor(base_model)
+debut_entrainement = time.perf_counter()
+
+# Sorties : Tmax/Tmin ponctuelles puis bornes quantiles (même ensemble exporté, un seul appel predict)
+sorties = TARGET_COLUMNS + sorties_quantiles()
+if mode == 'incremental':
+    # Un modèle antérieur aux quantiles est mis à jour sans bornes
+    sorties = ancien_manifeste['cibles']
+    fenetre = X.index > X.index.max() - pd.Timedelta(days=FENETRE_INCREMENTALE_JOURS)
+
+estimateurs = {}
+if mode == 'fixe':
+    multi_output_model.fit(X_train, Y_train) 
+    estimateurs.update(zip(TARGET_COLUMNS, multi_output_model.estimators_))
+
+for sortie in sorties:
+    if sortie in estimateurs:
+        continue
+    cible, _ = decomposer_sortie(sortie)
+    estimateur = clone(base_model).set_params(**{'eval_metric': 'mae', **parametres_sortie(sortie)})
+    if mode == 'incremental':
+        # Le boosting reprend depuis les boosters sauvegardés (xgb_model), sur la fenêtre récente seulement
+        estimateur.set_params(n_estimators=ARBRES_INCREMENTAUX)
+        estimateur.fit(X[fenetre], Y.loc[fenetre, cible],
+                       xgb_model=os.path.join(DOSSIER_ACTUEL, ancien_manifeste['fichiers'][sortie]), verbose=False)
+    else:
+        # Le wrapper ne transmet pas un eval_set par cible : chaque estimateur est entraîné
+        # séparément avec early stopping sur la validation (les bornes quantiles aussi en mode 'fixe').
+        estimateur.set_params(early_stopping_rounds=args.early_stopping_rounds)
+        estimateur.fit(X_train, Y_train[cible], eval_set=[(X_val, Y_val[cible])], verbose=False)
+        # Modèle tronqué à la meilleure itération : les arbres suivants ne sont ni sauvegardés ni évalués
+        estimateur._Booster = estimateur.get_booster()[:estimateur.best_iteration + 1]
+    estimateurs[sortie] = estimateur
 
-# Pour la validation dans MultiOutputRegressor, nous utilisons un fit simple 
-# car le wrapper ne supporte pas nativement early_stopping_rounds comme before.
-# Pour simplifier, nous utilisons ici le fit standard.
+if mode != 'fixe':
+    # Le pickle scikit-learn (repli) ne contient que les sorties ponctuelles
+    multi_output_model.estimators_ = [estimateurs[cible] for cible in TARGET_COLUMNS]
+    multi_output_model.n_features_in_ = X_train.shape[1]
+    multi_output_model.feature_names_in_ = np.asarray(X_train.columns, dtype=object)
 
-multi_output_model.fit(X_train, Y_train) 
+duree_entrainement = time.perf_counter() - debut_entrainement
+nb_arbres = {sortie: estimateur.get_booster().num_boosted_rounds() for sortie, estimateur in estimateurs.items()}
+print(f"Entraînement ({mode}) terminé en {duree_entrainement:.1f} s. Arbres retenus : {nb_arbres}")
+
+# Gain par feature : part du gain total (somme des réductions de perte de ses splits) dans chaque booster ponctuel
+gains = {}
+for cible in TARGET_COLUMNS:
+    scores = estimateurs[cible].get_booster().get_score(importance_type='total_gain')
+    total = sum(scores.values()) or 1.0
+    gains[cible] = [scores.get(colonne, 0.0) / total for colonne in X.columns]
+importance = pd.DataFrame(gains, index=pd.Index(X.columns, name='feature'))
+importance['moyenne'] = importance.mean(axis=1)
+importance = importance.sort_values('moyenne', ascending=False)
+importance.round(5).to_csv(os.path.join(MODEL_DIR, IMPORTANCE_PATH))
 
 # 5. ÉVALUATION FINALE (sur l'ensemble de TEST)
-predictions = multi_output_model.predict(X_test)
-predictions_df = pd.DataFrame(predictions, columns=['Tmax_Pred', 'Tmin_Pred'], index=Y_test.index)
+suivi.etape('evaluation')
+if mode == 'incremental':
+    # La fenêtre récente chevauche le test : la MAE de référence (celle du contrôle de dérive)
+    # reste celle du dernier entraînement complet
+    metriques = dict(ancien_manifeste['mae'])
+    print(f"\n--- MISE À JOUR INCRÉMENTALE : MAE de référence conservée ({metriques['global']:.2f} °C) ---")
+else:
+    predictions = multi_output_model.predict(X_test)
+    predictions_df = pd.DataFrame(predictions, columns=['Tmax_Pred', 'Tmin_Pred'], index=Y_test.index)
 
-# Calcul des métriques pour chaque sortie
-mae_max = mean_absolute_error(Y_test['Tmax_Demain'], predictions_df['Tmax_Pred'])
-mae_min = mean_absolute_error(Y_test['Tmin_Demain'], predictions_df['Tmin_Pred'])
+    # Calcul des métriques pour chaque sortie
+    mae_max = mean_absolute_error(Y_test['Tmax_Demain'], predictions_df['Tmax_Pred'])
+    mae_min = mean_absolute_error(Y_test['Tmin_Demain'], predictions_df['Tmin_Pred'])
+    metriques = {'Tmax_Demain': float(mae_max), 'Tmin_Demain': float(mae_min), 'global': float(np.mean([mae_max, mae_min]))}
 
-print(f"\n--- RÉSULTATS D'ÉVALUATION FINALE (2018-2020) ---")
-print(f"Erreur Absolue Moyenne Tmax : {mae_max:.2f} °C")
-print(f"Erreur Absolue Moyenne Tmin : {mae_min:.2f} °C")
-print(f"Erreur Globale Moyenne (MAE) : {np.mean([mae_max, mae_min]):.2f} °C")
-print("-----------------------------------------------------")
+    print(f"\n--- RÉSULTATS D'ÉVALUATION FINALE (depuis le {TEST_SPLIT_DATE}) ---")
+    print(f"Erreur Absolue Moyenne Tmax : {mae_max:.2f} °C")
+    print(f"Erreur Absolue Moyenne Tmin : {mae_min:.2f} °C")
+    print(f"Erreur Globale Moyenne (MAE) : {np.mean([mae_max, mae_min]):.2f} °C")
+    print("-----------------------------------------------------")
 
 # 6. SAUVEGARDE DU MODÈLE
+suivi.etape('sauvegarde')
 joblib.dump(multi_output_model, MODEL_PATH)
-print(f"Modèle Multi-Sortie sauvegardé sous : {MODEL_PATH}")
\ No newline at end of file
+print(f"Modèle Multi-Sortie sauvegardé sous : {os.path.join(DOSSIER_PUBLIE, os.path.basename(MODEL_PATH))}")
+
+# 7. EXPORT DES BOOSTERS NATIFS (UBJSON) + MANIFESTE pour un chargement rapide sans scikit-learn
+manifeste = exporter_boosters([estimateurs[sortie] for sortie in sorties], sorties, MODEL_DIR, metriques)
+print(f"Boosters UBJSON et manifeste exportés dans : {DOSSIER_PUBLIE}/")
+
+# 8. NORMALES CLIMATIQUES 1991-2020 : table par jour de l'année sauvegardée à côté du modèle
+suivi.etape('normales')
+df_brut = lire_donnees(RAW_DATA_PATH)
+normales = NormalesClimatiques.calculer(df_brut, lissage=NORMALES_LISSAGE)
+normales.sauvegarder(NORMALES_PATH)
+print(f"Table des normales climatiques (moyennes, P10/P90) sauvegardée sous : {os.path.join(DOSSIER_PUBLIE, os.path.basename(NORMALES_PATH))}")
+
+# 9. INTERVALLES DE PRÉVISION : marges conformales par horizon (validation), couverture sur le test
+suivi.etape('intervalles')
+predicteur, feature_order, _ = charger_modele(MODEL_DIR, 'compile')
+dates_serie, valeurs_serie, masque_serie = preparer_serie(df_brut)
+serie = pd.DataFrame(valeurs_serie, index=pd.DatetimeIndex(dates_serie), columns=COLONNES_OBSERVATIONS)
+imputations = pd.DataFrame(masque_serie, index=serie.index, columns=COLONNES_OBSERVATIONS)
+couverture_test = {}
+if MoteurPrevision(predicteur, feature_order).quantiles:
+    dates_validation = pd.date_range(VALIDATION_SPLIT_DATE, TEST_SPLIT_DATE, inclusive='left')
+    corrections = calibrer(MoteurPrevision(predicteur, feature_order), serie, dates_validation, imputations)
+    moteur = MoteurPrevision(predicteur, feature_order, corrections=corrections)
+    prevision_test = moteur.prevoir(serie, pd.date_range(TEST_SPLIT_DATE, serie.index.max()))
+    couverture_test = couverture(prevision_test, serie, imputations)
+    completer_manifeste(MODEL_DIR, intervalles={'quantiles': QUANTILES, 'correction': corrections,
+                                               'couverture_test': couverture_test})
+    print(f"Intervalles {QUANTILES[0]:.0%}-{QUANTILES[-1]:.0%} calibrés sur {VALIDATION_SPLIT_DATE} - {TEST_SPLIT_DATE} "
+          f"(marges par horizon : {corrections})")
+
+# 10. MODÈLE DIRECT MULTI-HORIZON : un booster par horizon et par cible, mêmes features de J
+suivi.etape('modele_direct')
+mae_horizons = {}
+if not args.horizon_direct or mode == 'incremental':
+    # Modèle direct non réentraîné : celui de la version actuelle (s'il existe) est repris tel quel
+    if os.path.isdir(dossier_modele('direct', DOSSIER_ACTUEL)):
+        shutil.copytree(dossier_modele('direct', DOSSIER_ACTUEL), dossier_modele('direct', MODEL_DIR),
+                        ignore=shutil.ignore_patterns('*.partage'))
+    if args.horizon_direct:
+        print(f"Mode incrémental : le modèle direct de {dossier_modele('direct', DOSSIER_ACTUEL)}/ n'est pas mis à jour.")
+else:
+    dossier_direct = dossier_modele('direct', MODEL_DIR)
+    os.makedirs(dossier_direct, exist_ok=True)
+    sorties_directes = [cible for h in range(1, args.horizon_direct + 1) for cible in cibles_horizon(h)]
+    debut_direct = time.perf_counter()
+    estimateurs_directs = []
+    for cible in sorties_directes:
+        if cible in TARGET_COLUMNS:
+            # J+1 : même booster que le mode récursif
+            estimateurs_directs.append(estimateurs[cible])
+            continue
+        # Les jours dont la cible J+h est absente ou imputée sont écartés pour cet horizon seulement
+        observe = df[cible].notna()
+        entrainement_h = observe & (df.index < VALIDATION_SPLIT_DATE)
+        validation_h = observe & (df.index >= VALIDATION_SPLIT_DATE) & (df.index < TEST_SPLIT_DATE)
+        estimateur = clone(base_model).set_params(eval_metric='mae', early_stopping_rounds=args.early_stopping_rounds)
+        estimateur.fit(X[entrainement_h], df.loc[entrainement_h, cible],
+                       eval_set=[(X[validation_h], df.loc[validation_h, cible])], verbose=False)
+        estimateur._Booster = estimateur.get_booster()[:estimateur.best_iteration + 1]
+        estimateurs_directs.append(estimateur)
+    duree_direct = time.perf_counter() - debut_direct
+    exporter_boosters(estimateurs_directs, sorties_directes, dossier_direct, entrainement={
+        'mode': 'direct', 'horizon': args.horizon_direct, 'duree_s': round(duree_direct, 2),
+        'donnees_jusqu_au': str(X.index.max().date())})
+
+    # MAE par horizon sur le test, modes récursif et direct, mêmes dates de référence
+    dates_test = pd.date_range(TEST_SPLIT_DATE, serie.index.max())
+    predicteur_direct, feature_order_direct, _ = charger_modele(dossier_direct, 'compile')
+    moteurs = {'recursif': MoteurPrevision(predicteur, feature_order, horizon=args.horizon_direct),
+               'direct': MoteurPrevision(predicteur_direct, feature_order_direct, horizon=args.horizon_direct, mode='direct')}
+    for nom, moteur_h in moteurs.items():
+        mae_horizons[nom] = mae_par_horizon(moteur_h.prevoir(serie, dates_test), serie, imputations)
+    mae_direct = [mae for par_cible in mae_horizons['direct'].values() for mae in par_cible.values()]
+    completer_manifeste(dossier_direct, mae={'global': float(np.mean(mae_direct)), 'par_horizon': mae_horizons['direct']})
+    completer_manifeste(MODEL_DIR, mae_par_horizon=mae_horizons['recursif'])
+    print(f"Modèle direct J+1..J+{args.horizon_direct} entraîné en {duree_direct:.1f} s et exporté dans : {dossier_direct}/")
+
+# 11. RAPPORT : temps d'entraînement, taille et latence du modèle, MAE de test vs. modèle précédent
+suivi.etape('rapport')
+predicteur.predict(X_test.values[:1])
+debut = time.perf_counter()
+for _ in range(100):
+    predicteur.predict(X_test.values[:1])
+entrainement = {
+    'mode': mode,
+    'duree_s': round(duree_entrainement, 2),
+    'arbres': nb_arbres,
+    'taille_octets': sum(os.path.getsize(os.path.join(MODEL_DIR, f)) for f in manifeste['fichiers'].values()),
+    'latence_ligne_ms': round((time.perf_counter() - debut) / 100 * 1e3, 3),
+    'donnees_jusqu_au': str(X.index.max().date()),  # point de départ du prochain contrôle de dérive
+}
+constructeur = ConstructeurFeatures(feature_order)
+fenetre_ligne = serie.to_numpy(dtype=np.float32)[-constructeur.taille_fenetre:]
+debut = time.perf_counter()
+for _ in range(100):
+    constructeur.construire_ligne(fenetre_ligne, serie.index[-1] + pd.Timedelta(days=1))
+entrainement['latence_features_ms'] = round((time.perf_counter() - debut) / 100 * 1e3, 3)
+if mae_nouveaux_jours is not None:
+    entrainement['mae_nouveaux_jours'] = mae_nouveaux_jours
+# Empreinte du jeu de features : deux versions entraînées sur les mêmes données ont la même
+donnees = {'empreinte': hashlib.sha256(pd.util.hash_pandas_object(df).to_numpy().tobytes()).hexdigest()[:12],
+           'lignes': len(df), 'jusqu_au': str(df.index.max().date())}
+completer_manifeste(MODEL_DIR, entrainement=entrainement, donnees=donnees,
+                    importance_gain=importance['moyenne'].round(5).to_dict())
+
+ancien = ancien_manifeste.get('entrainement', {})
+ancienne_mae = ancien_manifeste.get('mae', {})
+_valeur = lambda dictionnaire, cle, format_: format(dictionnaire[cle], format_) if cle in dictionnaire else 'n/d'
+
+print(f"\n--- RAPPORT D'ENTRAÎNEMENT (précédent -> nouveau) ---")
+for cible in TARGET_COLUMNS:
+    print(f"MAE test {cible} : {_valeur(ancienne_mae, cible, '.3f')} -> {metriques[cible]:.3f} °C")
+print(f"MAE test globale : {_valeur(ancienne_mae, 'global', '.3f')} -> {metriques['global']:.3f} °C")
+print(f"Arbres : {ancien.get('arbres', 'n/d')} -> {nb_arbres}")
+print(f"Temps d'entraînement : {_valeur(ancien, 'duree_s', '.1f')} -> {entrainement['duree_s']:.1f} s")
+print(f"Taille des boosters : {_valeur(ancien, 'taille_octets', ',')} -> {entrainement['taille_octets']:,} octets")
+print(f"Latence ligne (backend compilé) : {_valeur(ancien, 'latence_ligne_ms', '.3f')} -> {entrainement['latence_ligne_ms']:.3f} ms")
+print(f"Latence features (une ligne) : {_valeur(ancien, 'latence_features_ms', '.3f')} -> {entrainement['latence_features_ms']:.3f} ms "
+      f"({len(feature_order)} features, {constructeur.taille_fenetre} jours d'historique)")
+print(f"\nPart du gain par feature (Tmax / Tmin), {os.path.join(DOSSIER_PUBLIE, IMPORTANCE_PATH)} :")
+for nom, ligne in importance.head(15).iterrows():
+    print(f"  {nom:22s} {ligne[TARGET_COLUMNS[0]]:6.1%} / {ligne[TARGET_COLUMNS[1]]:6.1%}")
+candidates = importance.index[importance[TARGET_COLUMNS].max(axis=1) < SEUIL_ELAGAGE].tolist()
+if candidates:
+    print(f"Candidates à l'élagage (< {SEUIL_ELAGAGE:.1%} du gain pour chaque cible ; --sans-features puis comparer la MAE) : "
+          f"{','.join(candidates)}")
+for horizon, par_cible in couverture_test.items():
+    for cible, mesures in par_cible.items():
+        print(f"Couverture test J+{horizon} {cible} : {mesures['couverture']:.1%} "
+              f"(nominale {QUANTILES[-1] - QUANTILES[0]:.0%}, largeur moyenne {mesures['largeur']:.2f} °C, n={mesures['n']})")
+for horizon in mae_horizons.get('recursif', {}):
+    print(f"MAE test J+{horizon} (récursif / direct) : "
+          + ', '.join(f"{cible} {mae_horizons['recursif'][horizon][cible]:.3f} / {mae_horizons['direct'][horizon][cible]:.3f}"
+                      for cible in TARGET_COLUMNS) + " °C")
+print("-----------------------------------------------------")
+
+# 12. PUBLICATION : la nouvelle version devient active (remplacement atomique du pointeur) ;
+# l'application et le service la chargent en arrière-plan, sans redémarrage
+precedente = version_courante(RACINE_MODELES) or ('modèle à plat, importé' if ancien_manifeste else 'aucune')
+publier(RACINE_MODELES, VERSION)
+print(f"Version {VERSION} active (précédente : {precedente}). "
+      f"Retour arrière : python -m meteo.registre_modeles revenir --station {args.station}")
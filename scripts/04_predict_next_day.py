@@ -1,120 +1,143 @@
 import pandas as pd
 import numpy as np
-import joblib
+import argparse
 import os
 import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.instrumentation import SuiviEtapes
+from meteo.lots import REFERENCES, TAILLE_LOT, EcrivainLots, PrevisionLots, lire_par_lots
+from meteo.modeles import charger_modele, dossier_modele
+from meteo.observations import StockObservations
+from meteo.prevision import MoteurPrevision
+from meteo.stations import STATION_DEFAUT, charger_station, chemins_station
+
 # --- CONFIGURATION ---
-MODEL_PATH = 'models/final_model.pkl'
+MODEL_DIR = 'models'
+PREDICTEUR_BACKEND = os.environ.get('METEO_PREDICTEUR', 'compile') # 'compile', 'booster' ou 'sklearn'
+HORIZON = int(os.environ.get('METEO_HORIZON', 2)) # 1 à 7 jours
+MODE_PREVISION = os.environ.get('METEO_MODE_PREVISION', 'recursif') # 'recursif' ou 'direct' (models/direct/)
 FEATURES_PATH = 'data/features_finales.csv' 
+STOCK_PATH = 'data/observations.sqlite'
+STATION_ID = os.environ.get('METEO_STATION', STATION_DEFAUT) # Brazzaville par défaut
 REF_DATE = datetime(2025, 12, 3) # <-- VOTRE DATE DE RÉFÉRENCE (Aujourd'hui)
+LOT_BACKEND = 'booster' # mode --lot : mêmes prévisions que 'compile' (écart < 1e-4 °C), bien plus rapide sur les grands lots
 # --- FIN CONFIGURATION ---
 
+parser = argparse.ArgumentParser(description="Prévision J+1..J+H à la date de référence configurée, ou par lots sur un fichier d'entrée.")
+parser.add_argument('--lot', metavar='FICHIER',
+                    help="Prévision par lots en flux (meteo/lots.py) : CSV, Parquet ou '-' (CSV sur l'entrée standard) "
+                         "d'observations (time, colonnes d'observation, station et serie optionnelles) ou de dates "
+                         "(date_reference, station optionnelle).")
+parser.add_argument('--sortie', default='-', metavar='FICHIER',
+                    help="Prévisions du mode --lot : CSV, Parquet, ou '-' pour la sortie standard (défaut).")
+parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT, help="Lignes d'entrée traitées à la fois (mémoire bornée).")
+parser.add_argument('--references', choices=REFERENCES, default='toutes',
+                    help="Entrée d'observations : une prévision par jour observé ('toutes') ou à la fin de chaque série ('fin').")
+args = parser.parse_args()
+
+if args.lot:
+    # Prévision par lots : un moteur par station rencontrée (chargé à la première ligne de la station) ;
+    # le rapport va sur la sortie d'erreur, la sortie standard pouvant recevoir les prévisions
+    moteurs = {}
+
+    def moteur_station(station):
+        if station not in moteurs:
+            moteurs[station] = charger_station(station, LOT_BACKEND, HORIZON, MODE_PREVISION)[0]
+        return moteurs[station]
+
+    def observations_station(station):
+        # Stock local s'il couvre la station, données brutes du script 01 sinon
+        df = StockObservations(STOCK_PATH).lire(station) if os.path.exists(STOCK_PATH) else pd.DataFrame()
+        return df if len(df) else lire_donnees(chemins_station(station)['brut'])
+
+    ecrivain = EcrivainLots(args.sortie)
+    scoring = PrevisionLots(moteur_station, STATION_ID, args.references, observations_station)
+
+    def ecrire(df):
+        ecrivain.ecrire(df)
+        c = scoring.compteurs
+        print(f"  tranche {c['lots']} : {c['lignes']:,} lignes lues, {c['references']:,} dates prévues "
+              f"({c['lignes'] / max(c['duree_s'], 1e-9):,.0f} lignes/s)", file=sys.stderr)
+
+    try:
+        compteurs = scoring.traiter(lire_par_lots(args.lot, args.taille_lot), ecrire)
+    finally:
+        ecrivain.fermer()
+    print(f"{compteurs['lignes']:,} lignes en {compteurs['lots']} tranche(s), {compteurs['references']:,} dates de référence "
+          f"({compteurs['valides']:,} avec J-7..J-1 observés) en {compteurs['duree_s']:.2f} s : "
+          f"{compteurs['lignes'] / max(compteurs['duree_s'], 1e-9):,.0f} lignes/s"
+          + (f" -> {args.sortie}" if args.sortie != '-' else ''), file=sys.stderr)
+    sys.exit(0)
+
+# Fichiers de la station (data/ et models/ pour Brazzaville, sous-dossiers stations/<id>/ sinon)
+MODEL_DIR, FEATURES_PATH = chemins_station(STATION_ID)['modeles'], chemins_station(STATION_ID)['features']
+suivi = SuiviEtapes('04_predict_next_day')  # METEO_INSTRUMENTATION=1 : durée de chaque étape
+
 # 1. Chargement du Modèle Multi-Sortie
+suivi.etape('chargement_modele')
 try:
-    multi_output_model = joblib.load(MODEL_PATH)
-    # Récupérer l'ordre des features à partir du premier estimateur (crucial pour l'input)
-    feature_order = multi_output_model.estimators_[0].get_booster().feature_names 
-    print(f" Modèle Multi-Sortie chargé depuis : {MODEL_PATH}")
+    # Prédicteur du backend configuré + manifeste (ordre des features crucial pour l'input), repli sur le pickle
+    multi_output_model, feature_order, manifeste = charger_modele(dossier_modele(MODE_PREVISION, MODEL_DIR), PREDICTEUR_BACKEND)
+    print(f" Modèle Multi-Sortie chargé depuis : {dossier_modele(MODE_PREVISION, MODEL_DIR)}/ (backend '{multi_output_model.backend}')")
 except Exception as e:
     print(f"Erreur de chargement du modèle : {e}")
     sys.exit(1)
 
 
-# 2. Simulation des Données d'Observation Brutes (J-7 à J)
-# Pour une vraie prédiction en 2025, vous devriez appeler l'API Meteostat
-# pour les observations des 7 derniers jours.
-# Ici, nous SIMULONS cet input en prenant la structure des données d'entraînement.
-try:
-    df_brut_pour_input = pd.read_csv('data/meteo_brazzaville_daily.csv', index_col='time', parse_dates=True)
-except FileNotFoundError:
-    print(f"Erreur: Fichier de données brutes introuvable.")
-    sys.exit(1)
+# Même moteur que l'application : il fixe aussi le nombre de jours d'observations à lire
+# (J-7 à J-1 pour les lags, plus loin si le modèle utilise des statistiques glissantes)
+moteur = MoteurPrevision(multi_output_model, feature_order, horizon=HORIZON, mode=MODE_PREVISION,
+                         corrections=manifeste.get('intervalles', {}).get('correction'))
+
+
+# 2. Observations J-W à J-1 : lues dans le stock local (alimenté par le script 01)
+suivi.etape('observations')
+df_observations = pd.DataFrame(index=pd.DatetimeIndex([]))
+if os.path.exists(STOCK_PATH):
+    df_observations = StockObservations(STOCK_PATH).fenetre(STATION_ID, REF_DATE, taille=moteur.taille_historique)
+
+if (df_observations.index >= REF_DATE - pd.Timedelta(days=7)).sum() == 7:
+    print(f" Observations réelles lues dans le stock local : {STOCK_PATH}")
+else:
+    # Le stock ne couvre pas la date de référence : nous SIMULONS l'input
+    # en prenant la structure des données d'entraînement.
+    try:
+        df_brut_pour_input = lire_donnees(chemins_station(STATION_ID)['brut'])
+    except FileNotFoundError:
+        print(f"Erreur: Fichier de données brutes introuvable.")
+        sys.exit(1)
+
+    # Nous prenons les derniers jours de l'historique et les renommons pour qu'ils couvrent J-W à J-1.
+    # Cela préserve les tendances Lag (Tmax_J-1, Tmax_J-2, etc.) mais utilise la bonne saisonnalité.
+    df_observations = df_brut_pour_input.iloc[-moteur.taille_historique:].copy() # Les derniers jours d'observation de l'historique (2020)
+    df_observations.index = pd.to_datetime(pd.date_range(end=REF_DATE - pd.Timedelta(days=1), periods=len(df_observations)))
+    print(" Stock local absent ou incomplet pour cette date : observations simulées à partir de l'historique.")
+
+
+# --- 3. PRÉDICTION J+1 À J+HORIZON (récursive ou directe) ---
+# Même moteur que l'application : features construites en NumPy, un appel predict par horizon
+# en mode récursif, un seul en mode direct.
+suivi.etape('prevision')
+prevision = moteur.prevoir(df_observations, [REF_DATE])
+
+# Intervalle de prévision 80 % (bornes quantiles calibrées), absent avec un modèle sans sorties quantiles
+intervalle = lambda i, nom: (f"  [80 % : {prevision[f'{nom}_Q10'].iloc[i]:.1f} - {prevision[f'{nom}_Q90'].iloc[i]:.1f}]"
+                             if f'{nom}_Q10' in prevision else '')
+
 
-# Nous prenons les 7 derniers jours de l'historique et les renommons à partir du 04/11/2025
-# Cela préserve les tendances Lag (Tmax_J-1, Tmax_J-2, etc.) mais utilise la bonne saisonnalité.
-df_7_jours_simules = df_brut_pour_input.iloc[-7:].copy() # Les 7 derniers jours d'observation de l'historique (2020)
-df_7_jours_simules.index = pd.to_datetime(pd.date_range(end=REF_DATE, periods=7))
-
-
-# --- 3. FONCTION DE CRÉATION DE FEATURES ---
-def creer_features_pour_prediction(df_historique_7_jours, date_cible):
-    df_temp = df_historique_7_jours.copy()
-    
-    # Création des Lag Features
-    lags = [1, 2, 3, 7]
-    for lag in lags:
-        df_temp[f'Tmax_Lag_{lag}'] = df_temp['temperature_max_jour'].shift(lag)
-        df_temp[f'Tmin_Lag_{lag}'] = df_temp['temperature_min_jour'].shift(lag)
-        df_temp[f'Prcp_Lag_{lag}'] = df_temp['precipitation_somme_jour'].shift(lag)
-
-    # Création des Features Temporelles pour la date cible (celle qui sera J)
-    df_temp['Mois'] = date_cible.month
-    df_temp['Jour_de_Annee'] = date_cible.timetuple().tm_yday
-    df_temp['Jour_de_Semaine'] = date_cible.weekday()
-    
-    # Isoler le dernier jour, qui est le seul qui aura toutes ses Lag Features complètes
-    X_pred_raw = df_temp.iloc[-1].to_frame().T
-    X_pred_raw.index = [date_cible]
-    
-    # Nettoyer les colonnes brutes
-    colonnes_brutes = ['temperature_max_jour', 'temperature_min_jour', 
-                      'precipitation_somme_jour', 'vitesse_vent_moyenne_jour']
-    X_pred = X_pred_raw.drop(columns=colonnes_brutes, errors='ignore')
-    
-    # Assurer l'ordre des colonnes
-    X_pred = X_pred[feature_order]
-    
-    return X_pred
-
-
-# --- 4. PRÉDICTION J+1 (Demain : 2025-11-11) ---
-
-date_pred_j1 = REF_DATE + pd.Timedelta(days=1)
-X_pred_j1 = creer_features_pour_prediction(df_7_jours_simules, REF_DATE)
-
-predictions_j1 = multi_output_model.predict(X_pred_j1.values)[0]
-tmax_j1 = predictions_j1[0]
-tmin_j1 = predictions_j1[1]
-
-
-# --- 5. PRÉDICTION J+2 (Après-demain : 2025-11-12) : Prédiction Récursive ---
-
-date_pred_j2 = REF_DATE + pd.Timedelta(days=2)
-
-# Étape 1 : Créer la nouvelle ligne d'observation (J+1) en utilisant la prédiction J+1
-# Pour la précipitation, nous supposons la valeur du dernier jour connu (J=10/11/2025)
-prcp_j1_assumee = df_7_jours_simules['precipitation_somme_jour'].iloc[-1]
-wspd_j1_assume = df_7_jours_simules['vitesse_vent_moyenne_jour'].iloc[-1]
-
-nouvelle_observation_j1 = pd.DataFrame({
-    'temperature_max_jour': [tmax_j1], 
-    'temperature_min_jour': [tmin_j1],
-    'precipitation_somme_jour': [prcp_j1_assumee],
-    'vitesse_vent_moyenne_jour': [wspd_j1_assume]
-}, index=[date_pred_j1])
-
-# Étape 2 : Ajouter la prédiction J+1 à l'historique simulé pour prédire J+2
-df_8_jours_pour_j2 = pd.concat([df_7_jours_simules, nouvelle_observation_j1])
-
-# Étape 3 : Créer les features pour la prédiction J+2 (J+1 est maintenant le J-1)
-X_pred_j2 = creer_features_pour_prediction(df_8_jours_pour_j2, date_pred_j1)
-
-predictions_j2 = multi_output_model.predict(X_pred_j2.values)[0]
-tmax_j2 = predictions_j2[0]
-tmin_j2 = predictions_j2[1]
-
-
-# 6. AFFICHAGE DES RÉSULTATS
+# 4. AFFICHAGE DES RÉSULTATS
+suivi.etape('affichage')
 print("\n---------------------------------------------------------")
 print(f"   Données de référence : {REF_DATE.strftime('%Y-%m-%d')} (Aujourd'hui)")
 print("---------------------------------------------------------")
-print(f"   Jour de la Prédiction (J+1) : {date_pred_j1.strftime('%Y-%m-%d')} (Demain)")
-print(f"   Prédiction Température MAX : {tmax_j1:.2f} °C")
-print(f"   Prédiction Température MIN : {tmin_j1:.2f} °C")
-print("\n")
-print(f"   Jour de la Prédiction (J+2) : {date_pred_j2.strftime('%Y-%m-%d')} (Après-demain)")
-print(f"   Prédiction Température MAX : {tmax_j2:.2f} °C")
-print(f"   Prédiction Température MIN : {tmin_j2:.2f} °C")
+for i, (date_pred, tmax, tmin) in enumerate(zip(prevision['date_prevue'], prevision['Tmax_Prevue'], prevision['Tmin_Prevue'])):
+    if i:
+        print("\n")
+    nom_jour = {0: ' (Demain)', 1: ' (Après-demain)'}.get(i, '')
+    print(f"   Jour de la Prédiction (J+{i + 1}) : {date_pred.strftime('%Y-%m-%d')}{nom_jour}")
+    print(f"   Prédiction Température MAX : {tmax:.2f} °C{intervalle(i, 'Tmax')}")
+    print(f"   Prédiction Température MIN : {tmin:.2f} °C{intervalle(i, 'Tmin')}")
 print("---------------------------------------------------------")
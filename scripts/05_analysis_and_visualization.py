@@ -5,42 +5,164 @@ import numpy as np
 import joblib
 from xgboost import XGBRegressor
 from sklearn.multioutput import MultiOutputRegressor
-import matplotlib.pyplot as plt
+import matplotlib
+import argparse
 import os
 import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import lire_donnees
+from meteo.features import separer_features_cibles
+from meteo.hindcast import ORDRE_SAISONS, hindcast, metriques, observations_brutes, rapport_html
+from meteo.instrumentation import SuiviEtapes
+from meteo.predicteurs import BACKENDS
+from meteo.prevision import MODES
+from meteo.registre_modeles import dossier_courant
+from meteo.stations import STATION_DEFAUT, charger_station, chemins_station
 
 # --- CONFIGURATION ---
 INPUT_PATH = 'data/features_finales.csv'
 MODEL_PATH = 'models/final_model.pkl'
 TEST_SPLIT_DATE = '2018-01-01'
+HORIZON = int(os.environ.get('METEO_HORIZON', 2))
+MODE_PREVISION = os.environ.get('METEO_MODE_PREVISION', 'recursif')
+HINDCAST_DIR = 'resultats/hindcast'
+HINDCAST_BACKEND = 'booster' # mêmes prévisions que 'compile' (écart < 1e-4 °C), bien plus rapide sur un lot de 30 ans
+FENETRE_GLISSANTE_JOURS = 365  # lissage de la MAE dans le temps (graphique du hindcast)
+MIN_JOURS_GLISSANTE = 60  # en dessous (années lacunaires), la MAE glissante n'est pas tracée
 # --- FIN CONFIGURATION ---
 
+parser = argparse.ArgumentParser(description="Analyse du modèle sur le test 2018-2020, ou hindcast de la logique de l'application.")
+parser.add_argument('--hindcast', action='store_true',
+                    help="Rejoue la prévision de l'application (J+1 direct, J+2.. récursif) pour chaque jour de la période, "
+                         f"en un seul lot, et écrit métriques, graphiques PNG et rapport HTML dans {HINDCAST_DIR}/ (sans affichage).")
+parser.add_argument('--debut', default=None, help="Première date de référence (défaut : 8e jour de la série).")
+parser.add_argument('--fin', default=None, help="Dernière date de référence (défaut : dernier jour observé).")
+parser.add_argument('--horizon', type=int, default=HORIZON)
+parser.add_argument('--mode', choices=MODES, default=MODE_PREVISION)
+parser.add_argument('--backend', choices=BACKENDS, default=HINDCAST_BACKEND)
+parser.add_argument('--station', default=STATION_DEFAUT)
+parser.add_argument('--sortie', default=HINDCAST_DIR)
+args = parser.parse_args()
+if args.hindcast:
+    matplotlib.use('Agg')  # rendu sans affichage : plt.show() bloquerait un serveur
+import matplotlib.pyplot as plt
+
+suivi = SuiviEtapes('05_analysis_and_visualization')  # METEO_INSTRUMENTATION=1 : durée de chaque étape
+
+if args.hindcast:
+    # H1. Moteur de l'application (même backend, horizon, mode et marges des intervalles) et observations brutes
+    suivi.etape('hindcast_chargement')
+    chemins = chemins_station(args.station)
+    try:
+        moteur, _, version, _ = charger_station(args.station, args.backend, args.horizon, args.mode)
+        serie = observations_brutes(lire_donnees(chemins['brut']))
+    except FileNotFoundError as e:
+        print(f"Erreur: {e}. Exécutez les scripts 01 à 03 en premier.")
+        sys.exit(1)
+    debut_periode = pd.Timestamp(args.debut) if args.debut else serie.index.min() + pd.Timedelta(days=7)
+    fin_periode = pd.Timestamp(args.fin) if args.fin else serie.index.max()
+
+    # H2. Toutes les dates de référence en un lot (un appel predict par horizon)
+    suivi.etape('hindcast_prevision')
+    debut = time.perf_counter()
+    prevision, erreurs = hindcast(moteur, serie, debut_periode, fin_periode)
+    duree = time.perf_counter() - debut
+    nb_prevues = int(prevision.loc[prevision['horizon'] == 1, 'Tmax_Prevue'].notna().sum())
+    print(f"Hindcast {debut_periode.date()} - {fin_periode.date()} (station {args.station}, modèle {version}, "
+          f"mode {args.mode}, J+1..J+{moteur.horizon}) : {nb_prevues}/{len(prevision) // moteur.horizon} dates prévues "
+          f"(7 jours d'observations disponibles) en {duree:.2f} s")
+
+    # H3. Métriques par horizon, mois et saison du jour prévu
+    suivi.etape('hindcast_metriques')
+    os.makedirs(args.sortie, exist_ok=True)
+    tableaux = {
+        'Par horizon': metriques(erreurs),
+        'Par saison': metriques(erreurs, ['saison']),
+        'Par mois': metriques(erreurs, ['mois']),
+    }
+    for nom, fichier in zip(tableaux, ['metriques_horizon.csv', 'metriques_saison.csv', 'metriques_mois.csv']):
+        tableaux[nom].to_csv(os.path.join(args.sortie, fichier))
+    prevision.to_csv(os.path.join(args.sortie, 'previsions.csv'), index=False)
+    print("\n--- MÉTRIQUES PAR HORIZON (°C) ---")
+    print(tableaux['Par horizon'].to_string())
+    print("\n--- MAE PAR SAISON (°C) ---")
+    print(tableaux['Par saison']['mae'].unstack('saison').reindex(columns=ORDRE_SAISONS).to_string())
+
+    # H4. Graphiques PNG (MAE par mois, MAE glissante dans le temps) et rapport HTML autonome
+    suivi.etape('hindcast_graphiques')
+    images = []
+    par_mois = tableaux['Par mois']['mae']
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5), sharey=True)
+    for ax, (cible, mae_cible) in zip(axes, par_mois.groupby(level='cible')):
+        for horizon, mae_horizon in mae_cible.groupby(level='horizon'):
+            ax.plot(mae_horizon.index.get_level_values('mois'), mae_horizon.values, marker='o', label=f'J+{horizon}')
+        ax.set_title(f'MAE {cible} par mois du jour prévu')
+        ax.set_xlabel('Mois')
+        ax.set_xticks(range(1, 13))
+        ax.grid(True)
+        ax.legend()
+    axes[0].set_ylabel('MAE (°C)')
+    images.append(os.path.join(args.sortie, 'mae_par_mois.png'))
+    fig.savefig(images[-1], dpi=100, bbox_inches='tight')
+    plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(15, 5))
+    erreurs_absolues = erreurs.assign(absolue=erreurs['erreur'].abs())
+    for (cible, horizon), groupe in erreurs_absolues.groupby(['cible', 'horizon']):
+        mae_glissante = groupe.set_index('date_prevue')['absolue'].rolling(f'{FENETRE_GLISSANTE_JOURS}D', min_periods=MIN_JOURS_GLISSANTE).mean()
+        ax.plot(mae_glissante.index, mae_glissante.values, label=f'{cible} J+{horizon}')
+    ax.set_title(f'MAE glissante sur {FENETRE_GLISSANTE_JOURS} jours')
+    ax.set_ylabel('MAE (°C)')
+    ax.grid(True)
+    ax.legend()
+    images.append(os.path.join(args.sortie, 'mae_glissante.png'))
+    fig.savefig(images[-1], dpi=100, bbox_inches='tight')
+    plt.close(fig)
+
+    chemin_html = os.path.join(args.sortie, 'rapport_hindcast.html')
+    with open(chemin_html, 'w', encoding='utf-8') as f:
+        f.write(rapport_html(
+            f'Hindcast {debut_periode.date()} - {fin_periode.date()}', tableaux, images,
+            f"Station {args.station}, modèle {version}, backend {args.backend}, mode {args.mode}, "
+            f"{nb_prevues} dates de référence prévues. Erreur = prévu - observé."))
+    print(f"\nMétriques, prévisions, graphiques et rapport écrits dans : {args.sortie}/ ({os.path.basename(chemin_html)})")
+    sys.exit(0)
+
 # 1. Chargement des données et du modèle
+suivi.etape('chargement')
 try:
-    df = pd.read_csv(INPUT_PATH, index_col='time', parse_dates=True)
-    multi_output_model = joblib.load(MODEL_PATH)
+    df = lire_donnees(INPUT_PATH)
+    # Pickle de la version active du registre (meteo/registre_modeles.py)
+    multi_output_model = joblib.load(os.path.join(dossier_courant(os.path.dirname(MODEL_PATH)), os.path.basename(MODEL_PATH)))
 except FileNotFoundError:
     print("Erreur: Assurez-vous que les scripts 02 et 03 ont été exécutés avec succès.")
     sys.exit(1)
 
 # Séparation des cibles et des features
-TARGET_COLUMNS = ['Tmax_Demain', 'Tmin_Demain']
-Y = df[TARGET_COLUMNS]
-X = df.drop(columns=TARGET_COLUMNS)
+try:
+    X, Y = separer_features_cibles(df)
+except ValueError as e:
+    print(f"Erreur: {INPUT_PATH} : {e}")
+    sys.exit(1)
 
 # Séparation de l'ensemble de TEST
 X_test = X[X.index >= TEST_SPLIT_DATE]
 Y_test = Y[Y.index >= TEST_SPLIT_DATE]
 
 # 2. Prédiction sur l'ensemble de Test
+suivi.etape('prediction')
 predictions = multi_output_model.predict(X_test)
 predictions_df = pd.DataFrame(predictions, columns=['Tmax_Pred', 'Tmin_Pred'], index=Y_test.index)
 
 
 # --- 3. VISUALISATION DE LA PERFORMANCE (Tmax) ---
+suivi.etape('graphique_tmax')
 plt.figure(figsize=(15, 6))
 plt.plot(Y_test['Tmax_Demain'], label='Tmax Réel', color='blue', alpha=0.7)
-plt.plot(predictions_df['Tmax_Pred'], label='Tmax Prédit (MAE: 1.70°C)', color='red', linestyle='--')
+mae_tmax = (Y_test['Tmax_Demain'] - predictions_df['Tmax_Pred']).abs().mean()
+plt.plot(predictions_df['Tmax_Pred'], label=f'Tmax Prédit (MAE: {mae_tmax:.2f}°C)', color='red', linestyle='--')
 plt.title('Prédiction de la Température Maximale (Tmax) - Ensemble de Test (2018-2020)')
 plt.xlabel('Date')
 plt.ylabel('Température (°C)')
@@ -51,6 +173,7 @@ plt.show()
 
 
 # --- 4. IMPORTANCE DES FEATURES (XGBoost) ---
+suivi.etape('importance')
 # Nous utilisons l'importance des features du modèle qui prédit Tmax (premier estimateur)
 importance = multi_output_model.estimators_[0].feature_importances_
 feature_names = multi_output_model.estimators_[0].get_booster().feature_names
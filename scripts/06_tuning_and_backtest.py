@@ -0,0 +1,62 @@
+import pandas as pd
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.backtest import CACHE_DIR, CacheResultats, classement, executer, grille, plis_glissants
+from meteo.donnees import lire_donnees
+from meteo.features import separer_features_cibles
+
+# --- CONFIGURATION ---
+INPUT_PATH = 'data/features_finales.csv'
+LEADERBOARD_PATH = 'resultats/leaderboard.csv'
+
+# Grille évaluée par défaut (le modèle actuel du script 03 correspond à max_depth=5, learning_rate=0.01)
+PARAM_GRID = {
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.01, 0.05],
+    'subsample': [0.8, 1.0],
+}
+PREMIERE_ANNEE_TEST = 2008
+DERNIERE_ANNEE_TEST = 2020
+# --- FIN CONFIGURATION ---
+
+parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres par backtest glissant (reprise automatique depuis le cache).")
+parser.add_argument('--grille', type=json.loads, default=PARAM_GRID,
+                    help="Grille JSON {paramètre: [valeurs]} (par défaut celle de la configuration).")
+parser.add_argument('--premiere-annee-test', type=int, default=PREMIERE_ANNEE_TEST)
+parser.add_argument('--derniere-annee-test', type=int, default=DERNIERE_ANNEE_TEST)
+parser.add_argument('--processus', type=int, default=None, help="Nombre de processus (par défaut : un par cœur).")
+parser.add_argument('--cache', default=CACHE_DIR)
+args = parser.parse_args()
+
+if not os.path.exists(INPUT_PATH) and not os.path.exists(os.path.splitext(INPUT_PATH)[0] + '.bundle'):
+    print(f"Erreur: Le fichier de features {INPUT_PATH} est introuvable. Exécutez le script 02 en premier.")
+    sys.exit(1)
+try:
+    separer_features_cibles(lire_donnees(INPUT_PATH))  # disposition vérifiée avant de lancer les processus
+except ValueError as e:
+    print(f"Erreur: {INPUT_PATH} : {e}")
+    sys.exit(1)
+
+# 1. Combinaisons et plis à origine glissante
+combinaisons = grille(args.grille)
+plis = plis_glissants(premiere_annee_test=args.premiere_annee_test, derniere_annee_test=args.derniere_annee_test)
+print(f"{len(combinaisons)} combinaison(s) x {len(plis)} pli(s) "
+      f"(test {args.premiere_annee_test}-{args.derniere_annee_test}, validation = 2 années précédentes)")
+
+# 2. Évaluation parallèle, reprise depuis le cache
+resultats = executer(INPUT_PATH, combinaisons, plis, n_processus=args.processus, cache=CacheResultats(args.cache))
+
+# 3. Leaderboard
+tableau = classement(resultats)
+os.makedirs(os.path.dirname(LEADERBOARD_PATH), exist_ok=True)
+tableau.to_csv(LEADERBOARD_PATH)
+
+print("\n--- LEADERBOARD (MAE moyenne sur les plis de test) ---")
+with pd.option_context('display.width', 200, 'display.max_colwidth', 80):
+    print(tableau.round(3).to_string())
+print(f"\nLeaderboard sauvegardé sous : {LEADERBOARD_PATH}")
+print(f"Meilleurs paramètres (à passer au script 03 via --params) : {tableau.index[0]}")
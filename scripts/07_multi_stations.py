@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.stations import chemins_station, registre
+
+# --- CONFIGURATION ---
+DOSSIER_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+ETAPES = {
+    'collecte': '01_data_collection.py',
+    'features': '02_feature_engineering.py',
+    'entrainement': '03_train_and_evaluate.py',
+}
+WORKERS = max(1, (os.cpu_count() or 1) // 2)
+JOURNAL = 'pipeline.log'  # sortie des scripts, écrite dans le dossier du modèle de chaque station
+# --- FIN CONFIGURATION ---
+
+parser = argparse.ArgumentParser(
+    description="Collecte, features et entraînement de plusieurs stations du registre, en processus parallèles.")
+parser.add_argument('--stations', nargs='*', default=None,
+                    help="Identifiants Meteostat (par défaut toutes les stations du registre, meteo/stations.py).")
+parser.add_argument('--etapes', nargs='+', choices=list(ETAPES), default=list(ETAPES))
+parser.add_argument('--workers', type=int, default=WORKERS, help="Stations traitées simultanément.")
+parser.add_argument('--source', choices=['meteostat', 'csv'], default='meteostat',
+                    help="Source de la collecte ; 'csv' relit le CSV brut déjà présent dans le dossier de chaque station.")
+parser.add_argument('--incremental', action='store_true',
+                    help="Passe --incremental aux scripts 01 et 02 et --mode incremental au script 03.")
+parser.add_argument('--params', type=json.loads, default={},
+                    help="Hyperparamètres XGBoost en JSON transmis au script 03 (n_jobs est réparti entre les workers).")
+args = parser.parse_args()
+
+stations = args.stations or list(registre())
+# Les threads de XGBoost sont répartis entre les entraînements simultanés
+params = {'n_jobs': max(1, (os.cpu_count() or 1) // max(1, min(args.workers, len(stations)))), **args.params}
+
+arguments_etape = {
+    'collecte': ['--source', args.source] + (['--incremental'] if args.incremental else []),
+    'features': ['--incremental'] if args.incremental else [],
+    'entrainement': ['--params', json.dumps(params)] + (['--mode', 'incremental'] if args.incremental else []),
+}
+
+
+def executer_station(station):
+    """Enchaîne les étapes d'une station dans des sous-processus ; s'arrête à la première en échec."""
+    journal = os.path.join(chemins_station(station)['modeles'], JOURNAL)
+    os.makedirs(os.path.dirname(journal), exist_ok=True)
+    durees = {}
+    with open(journal, 'w', encoding='utf-8') as sortie:
+        for etape in args.etapes:
+            debut = time.perf_counter()
+            commande = [sys.executable, os.path.join(DOSSIER_SCRIPTS, ETAPES[etape]), '--station', station]
+            resultat = subprocess.run(commande + arguments_etape[etape], stdout=sortie, stderr=subprocess.STDOUT)
+            durees[etape] = time.perf_counter() - debut
+            if resultat.returncode != 0:
+                return station, etape, durees, journal
+    return station, None, durees, journal
+
+
+# 1. Stations traitées en parallèle (un processus par étape, les étapes d'une station s'enchaînent)
+print(f"{len(stations)} station(s), étapes {', '.join(args.etapes)}, {args.workers} worker(s), "
+      f"XGBoost n_jobs={params['n_jobs']} par entraînement")
+debut = time.perf_counter()
+echecs = []
+with ThreadPoolExecutor(max_workers=args.workers) as executeur:
+    for futur in as_completed([executeur.submit(executer_station, station) for station in stations]):
+        station, etape_en_echec, durees, journal = futur.result()
+        detail = ', '.join(f"{etape} {duree:.1f} s" for etape, duree in durees.items())
+        if etape_en_echec:
+            echecs.append(station)
+            print(f"  {station} : ÉCHEC à l'étape '{etape_en_echec}' ({detail}) -> voir {journal}")
+        else:
+            print(f"  {station} : OK ({detail})")
+
+# 2. Bilan
+print(f"\n{len(stations) - len(echecs)}/{len(stations)} station(s) traitée(s) en {time.perf_counter() - debut:.1f} s.")
+sys.exit(1 if echecs else 0)
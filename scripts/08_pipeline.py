@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.pipeline import ETAT_PATH, JOURNAUX_DIR, WORKERS, Etape, Pipeline, modele_actif
+
+# --- CONFIGURATION ---
+# Chemins relatifs à la racine du dépôt (ceux des scripts, pour la station par défaut)
+BRUT_CSV = 'data/meteo_brazzaville_daily.csv'
+BRUT = 'data/meteo_brazzaville_daily.bundle'
+FEATURES = 'data/features_finales.bundle'
+QUEUE_FEATURES = 'data/features_finales.queue.npz'
+MODEL_DIR = 'models'
+HINDCAST_DIR = 'resultats/hindcast'
+ENV_PREVISION = ['METEO_PREDICTEUR', 'METEO_HORIZON', 'METEO_MODE_PREVISION']  # variables lues par les scripts 04 et 05
+STATUTS = {'ok': 'exécutée', 'sautee': 'sautée', 'echec': 'ÉCHEC', 'bloquee': 'bloquée'}
+# --- FIN CONFIGURATION ---
+
+parser = argparse.ArgumentParser(
+    description="Enchaîne les scripts 01 à 05 en ne relançant que les étapes dont le code, les paramètres ou les entrées ont changé.")
+parser.add_argument('--etapes', nargs='+', default=None,
+                    help="Étapes à considérer (par défaut toutes : collecte features entrainement prevision analyse).")
+parser.add_argument('--forcer', nargs='*', default=None,
+                    help="Relance ces étapes même inchangées (toutes si la liste est vide).")
+parser.add_argument('--rafraichir', action='store_true',
+                    help="Relance la collecte Meteostat (source distante, sans entrée locale à comparer).")
+parser.add_argument('--workers', type=int, default=WORKERS, help="Étapes indépendantes exécutées simultanément.")
+parser.add_argument('--source', choices=['meteostat', 'csv'], default='meteostat', help="Source de la collecte (script 01).")
+parser.add_argument('--csv-source', default=None, help=f"Fichier lu par la source 'csv' (par défaut {BRUT_CSV}).")
+parser.add_argument('--validation-split-date', default=None, help="Transmise au script 03 (sinon sa configuration).")
+parser.add_argument('--test-split-date', default=None, help="Transmise au script 03 (sinon sa configuration).")
+parser.add_argument('--params', type=json.loads, default=None, help="Hyperparamètres XGBoost en JSON transmis au script 03.")
+args = parser.parse_args()
+
+# 1. Déclaration des étapes : script, paramètres, entrées, sorties
+modele = modele_actif(MODEL_DIR)  # même objet en sortie de l'entraînement et en entrée des étapes suivantes
+csv_source = args.csv_source or BRUT_CSV
+arguments_entrainement = []
+for option, valeur in (('--validation-split-date', args.validation_split_date), ('--test-split-date', args.test_split_date),
+                       ('--params', json.dumps(args.params, sort_keys=True) if args.params is not None else None)):
+    if valeur is not None:
+        arguments_entrainement += [option, valeur]
+
+etapes = [
+    Etape('collecte', '01_data_collection.py',
+          ['--source', args.source] + (['--csv-source', csv_source] if args.source == 'csv' else []),
+          entrees=[csv_source] if args.source == 'csv' else [], sorties=[BRUT], externe=args.source == 'meteostat'),
+    Etape('features', '02_feature_engineering.py', entrees=[BRUT], sorties=[FEATURES, QUEUE_FEATURES]),
+    Etape('entrainement', '03_train_and_evaluate.py', arguments_entrainement, entrees=[FEATURES, BRUT], sorties=[modele]),
+    # Prévision de la date de référence du script 04 : le produit est sa sortie (JOURNAUX_DIR/prevision.log)
+    Etape('prevision', '04_predict_next_day.py', entrees=[modele, BRUT], environnement=ENV_PREVISION),
+    Etape('analyse', '05_analysis_and_visualization.py', ['--hindcast', '--sortie', HINDCAST_DIR],
+          entrees=[modele, BRUT], sorties=[HINDCAST_DIR], environnement=ENV_PREVISION),
+]
+noms = [etape.nom for etape in etapes]
+for nom in (args.etapes or []) + (args.forcer or []):
+    if nom not in noms:
+        parser.error(f"étape inconnue : {nom} (attendu : {', '.join(noms)})")
+if args.etapes:
+    etapes = [etape for etape in etapes if etape.nom in args.etapes]
+forcer = set(noms if args.forcer == [] else args.forcer or [])
+if args.rafraichir:
+    forcer |= {etape.nom for etape in etapes if etape.externe}
+
+
+# 2. Exécution : étapes inchangées sautées, étapes indépendantes en parallèle
+def rapport(nom, resultat):
+    mesures = f" en {resultat['duree_s']:.1f} s" if resultat['statut'] in ('ok', 'echec') and resultat['duree_s'] else ''
+    if resultat['memoire_mo']:
+        mesures += f", {resultat['memoire_mo']:.0f} Mo max"
+    print(f"  {nom:<13} {STATUTS[resultat['statut']]:<9}{mesures} ({resultat['raison']})", flush=True)
+
+
+debut = time.perf_counter()
+print(f"Pipeline : {', '.join(etape.nom for etape in etapes)} ({args.workers} worker(s), journaux dans {JOURNAUX_DIR}/)")
+resultats = Pipeline(etapes, workers=args.workers).executer(forcer, rapport)
+
+# 3. Bilan
+executees = [nom for nom, resultat in resultats.items() if resultat['statut'] == 'ok']
+echecs = [nom for nom, resultat in resultats.items() if resultat['statut'] in ('echec', 'bloquee')]
+print(f"\n{len(executees)} étape(s) exécutée(s), {len(resultats) - len(executees) - len(echecs)} sautée(s), "
+      f"{len(echecs)} en échec ou bloquée(s), en {time.perf_counter() - debut:.2f} s. État : {ETAT_PATH}")
+sys.exit(1 if echecs else 0)
@@ -0,0 +1,26 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.donnees import chemin_bundle, convertir_csv, lire_bundle
+
+# --- CONFIGURATION ---
+FICHIERS_PAR_DEFAUT = ['data/meteo_brazzaville_daily.csv']  # features_finales : écrit par le script 02 (--export-csv)
+# --- FIN CONFIGURATION ---
+
+parser = argparse.ArgumentParser(description="Convertit les CSV du pipeline au format bundle binaire (et inversement).")
+parser.add_argument('fichiers', nargs='*', default=FICHIERS_PAR_DEFAUT, help="Chemins des CSV à convertir.")
+parser.add_argument('--vers-csv', action='store_true', help="Exporte les bundles existants en CSV au lieu de l'inverse.")
+args = parser.parse_args()
+
+for chemin_csv in args.fichiers:
+    try:
+        if args.vers_csv:
+            lire_bundle(chemin_bundle(chemin_csv)).to_csv(chemin_csv)
+            print(f"{chemin_bundle(chemin_csv)} -> {chemin_csv}")
+        else:
+            print(f"{chemin_csv} -> {convertir_csv(chemin_csv)}")
+    except FileNotFoundError as e:
+        print(f"Erreur: fichier introuvable ({e.filename}).")
+        sys.exit(1)
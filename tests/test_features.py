@@ -0,0 +1,106 @@
+"""
+Parité du constructeur de features NumPy (meteo/features.py) avec une référence pandas
+(`shift` pour les lags, `rolling` décalé d'un jour pour les statistiques glissantes),
+sur une série journalière synthétique.
+
+Usage (depuis la racine du dépôt) : python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.features import (COLONNES_OBSERVATIONS, DUREE_ANNEE, FEATURE_ORDER, FENETRES_GLISSANTES, LAGS,
+                            VARIABLES, VARIABLES_LAG, ConstructeurFeatures)
+
+# --- CONFIGURATION ---
+N_JOURS = 400
+TOLERANCE = 1e-5  # écart relatif toléré (float32 contre float64)
+TOLERANCE_ABSOLUE = 1e-4  # écarts-types nuls : sommes cumulées contre algorithme en ligne de pandas
+# --- FIN CONFIGURATION ---
+
+
+def serie_synthetique(n_jours=N_JOURS, graine=0):
+    """Série journalière plausible : cycle annuel, bruit, pluie nulle la plupart des jours."""
+    generateur = np.random.default_rng(graine)
+    dates = pd.date_range('2019-11-15', periods=n_jours, freq='D', name='time')
+    saison = np.sin(2 * np.pi * dates.dayofyear.to_numpy() / DUREE_ANNEE)
+    pluie = np.where(generateur.random(n_jours) < 0.3, generateur.gamma(2.0, 8.0, n_jours), 0.0)
+    return pd.DataFrame({
+        'temperature_max_jour': 31 + 2 * saison + generateur.normal(0, 1, n_jours),
+        'temperature_min_jour': 22 + saison + generateur.normal(0, 0.7, n_jours),
+        'precipitation_somme_jour': pluie,
+        'vitesse_vent_moyenne_jour': 7 + generateur.normal(0, 1.5, n_jours),
+    }, index=dates)[COLONNES_OBSERVATIONS]
+
+
+def features_pandas(df, dates_cibles):
+    """Référence : features des `dates_cibles` à partir des observations de la veille et des jours précédents."""
+    observations = df.reindex(df.index.union(dates_cibles))
+    features = pd.DataFrame(index=observations.index)
+    features['Mois'] = features.index.month
+    features['Jour_de_Annee'] = features.index.dayofyear
+    features['Jour_de_Semaine'] = features.index.dayofweek
+    for variable in VARIABLES_LAG:
+        for lag in LAGS:
+            features[f'{variable}_Lag_{lag}'] = observations[COLONNES_OBSERVATIONS[VARIABLES[variable]]].shift(lag)
+    for n in FENETRES_GLISSANTES:
+        for variable, j in VARIABLES.items():
+            fenetre = observations[COLONNES_OBSERVATIONS[j]].rolling(n)
+            features[f'{variable}_Moy_{n}'] = fenetre.mean().shift(1)
+            features[f'{variable}_Std_{n}'] = fenetre.std().shift(1)
+            features[f'{variable}_Somme_{n}'] = fenetre.sum().shift(1)
+    angle = 2 * np.pi * features.index.dayofyear / DUREE_ANNEE
+    features['Jour_Sin'], features['Jour_Cos'] = np.sin(angle), np.cos(angle)
+    return features.loc[dates_cibles, FEATURE_ORDER].to_numpy(dtype=np.float64)
+
+
+@pytest.fixture(scope='module')
+def df():
+    return serie_synthetique()
+
+
+@pytest.fixture(scope='module')
+def constructeur():
+    return ConstructeurFeatures(FEATURE_ORDER)
+
+
+def test_historique_egal_reference_pandas(df, constructeur):
+    X = constructeur.construire_historique(df.to_numpy(dtype=np.float32), df.index.values)
+    assert X.shape == (len(df), len(FEATURE_ORDER))
+    np.testing.assert_allclose(X, features_pandas(df, df.index), rtol=TOLERANCE, atol=TOLERANCE_ABSOLUE)
+
+
+def test_historique_lags_avant_debut_manquants(df, constructeur):
+    X = constructeur.construire_historique(df.to_numpy(dtype=np.float32), df.index.values)
+    premier_lag = FEATURE_ORDER.index(f'Tmax_Lag_{max(LAGS)}')
+    assert np.isnan(X[:max(LAGS), premier_lag]).all()
+    assert not np.isnan(X[max(LAGS):, premier_lag]).any()
+
+
+def test_ligne_egale_reference_pandas(df, constructeur):
+    fenetre = df.iloc[-constructeur.taille_fenetre:]
+    date_cible = df.index[-1] + pd.Timedelta(days=1)
+    ligne = constructeur.construire_ligne(fenetre.to_numpy(dtype=np.float32), date_cible)
+    reference = features_pandas(df, pd.DatetimeIndex([date_cible]))
+    np.testing.assert_allclose(ligne, reference, rtol=TOLERANCE, atol=TOLERANCE_ABSOLUE)
+
+
+def test_ligne_ne_lit_que_la_fenetre(df, constructeur):
+    """Les lignes au-delà de `taille_fenetre` n'ont aucun effet sur la ligne construite."""
+    date_cible = df.index[-1] + pd.Timedelta(days=1)
+    complete = constructeur.construire_ligne(df.to_numpy(dtype=np.float32), date_cible)
+    fenetre = constructeur.construire_ligne(df.iloc[-constructeur.taille_fenetre:].to_numpy(dtype=np.float32), date_cible)
+    np.testing.assert_array_equal(complete, fenetre)
+
+
+def test_lot_egal_lignes(df, constructeur):
+    """Mode lot sur plusieurs séries : chaque ligne égale `construire_ligne` sur la série correspondante."""
+    series = np.stack([serie_synthetique(graine=graine).to_numpy(dtype=np.float32) for graine in range(3)])
+    date_cible = df.index[-1] + pd.Timedelta(days=1)
+    X = constructeur.construire_lot(series, series.shape[1], np.full(len(series), np.datetime64(date_cible, 'D')))
+    for i, serie in enumerate(series):
+        np.testing.assert_allclose(X[i:i + 1], constructeur.construire_ligne(serie, date_cible), rtol=TOLERANCE)
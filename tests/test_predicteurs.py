@@ -0,0 +1,106 @@
+"""
+Concordance des backends de prédiction (meteo/predicteurs.py) sur un petit modèle entraîné
+à la volée : features synthétiques (avec valeurs manquantes), quelques arbres par cible,
+une sortie ponctuelle et une borne quantile. Le booster natif sert de référence.
+
+Usage (depuis la racine du dépôt) : python -m pytest tests
+"""
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.multioutput import MultiOutputRegressor
+from xgboost import XGBRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from meteo.features import FEATURE_ORDER, TARGET_COLUMNS
+from meteo.modeles import PICKLE, charger_modele, exporter_boosters
+from meteo.predicteurs import (BACKENDS, PredicteurBooster, PredicteurCompile, PredicteurSklearn,
+                               compiler_boosters)
+
+# --- CONFIGURATION ---
+N_LIGNES = 600
+N_ARBRES = 20
+PROFONDEUR = 4
+TAUX_MANQUANTS = 0.05  # cellules de X mises à NaN (direction par défaut des nœuds)
+TOLERANCE = 1e-3  # °C : les backends ne somment pas les feuilles dans le même ordre
+# --- FIN CONFIGURATION ---
+
+
+def jeu_synthetique(graine=0):
+    generateur = np.random.default_rng(graine)
+    X = pd.DataFrame(generateur.normal(size=(N_LIGNES, len(FEATURE_ORDER))).astype(np.float32), columns=FEATURE_ORDER)
+    y = np.column_stack([30 + 2 * X.iloc[:, 3] - X.iloc[:, 5] + generateur.normal(0, 0.3, N_LIGNES),
+                         22 + X.iloc[:, 4] + 0.5 * X.iloc[:, 6] + generateur.normal(0, 0.3, N_LIGNES)])
+    X = X.mask(generateur.random(X.shape) < TAUX_MANQUANTS)
+    return X, y
+
+
+def regresseur(**parametres):
+    return XGBRegressor(n_estimators=N_ARBRES, max_depth=PROFONDEUR, learning_rate=0.3, n_jobs=1, random_state=0,
+                        **parametres)
+
+
+@pytest.fixture(scope='module')
+def modele():
+    """MultiOutputRegressor ponctuel (Tmax, Tmin) et booster quantile supplémentaire (borne haute de Tmax)."""
+    X, y = jeu_synthetique()
+    multi_output_model = MultiOutputRegressor(regresseur()).fit(X, y)
+    quantile = regresseur(objective='reg:quantileerror', quantile_alpha=0.9).fit(X, y[:, 0])
+    estimateurs = list(multi_output_model.estimators_) + [quantile]
+    cibles = TARGET_COLUMNS + ['Tmax_Demain_q90']
+    X_test, _ = jeu_synthetique(graine=1)
+    return multi_output_model, estimateurs, cibles, X_test.to_numpy(dtype=np.float32)
+
+
+def test_compile_egal_booster(modele):
+    _, estimateurs, cibles, X = modele
+    boosters = [estimateur.get_booster() for estimateur in estimateurs]
+    reference = PredicteurBooster(boosters, FEATURE_ORDER, cibles).predict(X)
+    compile_ = PredicteurCompile(compiler_boosters(boosters), FEATURE_ORDER, cibles)
+    np.testing.assert_allclose(compile_.predict(X), reference, atol=TOLERANCE)
+    # Ligne unique, en vecteur 1D comme en matrice (1, n)
+    np.testing.assert_allclose(compile_.predict(X[0]), reference[:1], atol=TOLERANCE)
+
+
+def test_sklearn_egal_booster(modele):
+    multi_output_model, estimateurs, cibles, X = modele
+    reference = PredicteurBooster([e.get_booster() for e in estimateurs], FEATURE_ORDER, cibles).predict(X)
+    sortie = PredicteurSklearn(multi_output_model, TARGET_COLUMNS).predict(X)
+    np.testing.assert_allclose(sortie, reference[:, :len(TARGET_COLUMNS)], atol=TOLERANCE)
+
+
+def test_compile_par_blocs(modele, monkeypatch):
+    """Le découpage en blocs de lignes ne change pas le résultat."""
+    _, estimateurs, cibles, X = modele
+    tableaux = compiler_boosters([estimateur.get_booster() for estimateur in estimateurs])
+    entier = PredicteurCompile(tableaux, FEATURE_ORDER, cibles).predict(X)
+    monkeypatch.setattr('meteo.predicteurs.ELEMENTS_PAR_BLOC', 7 * len(tableaux['groupes']))
+    np.testing.assert_array_equal(PredicteurCompile(tableaux, FEATURE_ORDER, cibles).predict(X), entier)
+
+
+def test_objectif_non_pris_en_charge():
+    X, y = jeu_synthetique()
+    booster = regresseur(objective='reg:gamma').fit(X, y[:, 0] - y[:, 0].min() + 1).get_booster()
+    with pytest.raises(ValueError, match='Objectif non pris en charge'):
+        compiler_boosters([booster])
+
+
+def test_backends_charges_concordent(modele, tmp_path):
+    """Export (boosters, ensemble compilé, manifeste, pickle) puis chargement de chaque backend."""
+    multi_output_model, estimateurs, cibles, X = modele
+    dossier = str(tmp_path)
+    exporter_boosters(estimateurs, cibles, dossier)
+    joblib.dump(multi_output_model, os.path.join(dossier, PICKLE))
+
+    predicteurs = {backend: charger_modele(dossier, backend)[0] for backend in BACKENDS}
+    reference = predicteurs['booster'].predict(X)
+    assert reference.shape == (len(X), len(cibles))
+    for backend, predicteur in predicteurs.items():
+        assert predicteur.backend == backend
+        assert predicteur.feature_order == FEATURE_ORDER
+        sortie = predicteur.predict(X)
+        np.testing.assert_allclose(sortie, reference[:, :sortie.shape[1]], atol=TOLERANCE, err_msg=backend)